@@ -1,5 +1,7 @@
 import logging
+import signal
 import sys
+import threading
 from typing import Dict, NoReturn, Text
 
 from dime_xai.core.custom_dime_explainer import CustomDIMEExplainer
@@ -7,11 +9,12 @@ from dime_xai.core.dime_core import load_explanation
 from dime_xai.core.rasa_dime_explainer import RasaDIMEExplainer
 from dime_xai.shared.constants import (
     ExplanationType,
+    EXPLANATION_EVENT_DUAL_INSTANCE,
+    EXPLANATION_EVENT_GLOBAL_SCORE,
     DIMEConfig,
     MODEL_TYPE_DIET,
     MODEL_TYPE_OTHER,
     MODEL_MODE_REST,
-    OUTPUT_MODE_GLOBAL,
     PROCESS_QUEUE,
 )
 from dime_xai.shared.exceptions.dime_base_exception import DIMEBaseException
@@ -38,12 +41,26 @@ from dime_xai.shared.exceptions.dime_io_exceptions import (
     EmptyNLUDatasetException,
     InvalidFileExtensionException,
 )
+from dime_xai.shared.explanation import DIMEExplanationStream
 from dime_xai.utils import process_queue
 from dime_xai.utils.io import exit_dime
 
 logger = logging.getLogger(__name__)
 
 
+def _terminate_gracefully(signum, frame) -> NoReturn:
+    raise KeyboardInterrupt()
+
+
+def _log_explanation_event(event: Dict) -> NoReturn:
+    if event['event'] == EXPLANATION_EVENT_GLOBAL_SCORE:
+        logger.info(f"Global feature importance score of the token "
+                    f"`{event['token']}`: {event['score']}")
+    elif event['event'] == EXPLANATION_EVENT_DUAL_INSTANCE:
+        logger.info(f"Calculated the dual feature importance "
+                    f"of the instance `{event['instance']}`")
+
+
 class DimeCLIExplainer:
     """
     Initializes DIME CLI Explainer interface.
@@ -56,10 +73,16 @@ class DimeCLIExplainer:
             configs: Dict = None,
             quiet_mode: bool = False,
             request_id: Text = None,
+            incremental: bool = False,
+            resume: bool = False,
+            stream: bool = False,
     ) -> NoReturn:
         self.configs = configs
         self.quiet_mode = quiet_mode
         self.request_id = request_id
+        self.incremental = incremental
+        self.resume = resume
+        self.stream = stream
 
     def run(self) -> NoReturn:
         """
@@ -71,23 +94,22 @@ class DimeCLIExplainer:
             no return
         """
         logger.debug("Initializing DIME CLI Explainer...")
+
+        # SIGTERM (e.g. from the DIME server's abort route, which only kills
+        # DIME after a grace period) is handled like a keyboard interrupt, so
+        # that global feature importance scores calculated so far are
+        # checkpointed before DIME exits
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, _terminate_gracefully)
         model_type = self.configs[DIMEConfig.MAIN_KEY_BASE][DIMEConfig.SUB_KEY_BASE_MODEL_TYPE]
         model_mode = self.configs[DIMEConfig.MAIN_KEY_BASE][DIMEConfig.SUB_KEY_BASE_MODEL_MODE]
-        output_mode = self.configs[DIMEConfig.MAIN_KEY_CLI][DIMEConfig.SUB_KEY_CLI_OUTPUT_MODE]
 
         # Deprecations, Errors and Warnings
         # in DIME configs and CLI arguments
         if model_mode == MODEL_MODE_REST:
-            logger.warning("Support for REST models is still experimental and "
-                           "could be removed in the upcoming DIME versions "
-                           "due to performance issues.")
-
-            if output_mode == OUTPUT_MODE_GLOBAL:
-                logger.error(f"Global feature importance cannot be calculated on REST "
-                             f"models while using DIME CLI/SERVER. Please try loading "
-                             f"a local model instead. Try jupyter notebooks using DIME "
-                             f"API to get global feature importance from a REST model")
-                exit_dime("output model error")
+            logger.warning("Support for REST models is still experimental. REST models "
+                           "are parsed with a bounded number of concurrent requests, "
+                           "set by 'rest_concurrency' of the performance configs.")
 
         try:
             if model_type == MODEL_TYPE_DIET:
@@ -103,24 +125,61 @@ class DimeCLIExplainer:
                     ngrams=self.configs[DIMEConfig.MAIN_KEY_BASE][DIMEConfig.SUB_KEY_BASE_NGRAMS],
                     min_ngrams=self.configs[DIMEConfig.MAIN_KEY_BASE][DIMEConfig.SUB_KEY_BASE_NGRAMS_MIN],
                     max_ngrams=self.configs[DIMEConfig.MAIN_KEY_BASE][DIMEConfig.SUB_KEY_BASE_NGRAMS_MAX],
+                    min_ngram_frequency=self.configs[DIMEConfig.MAIN_KEY_BASE][
+                        DIMEConfig.SUB_KEY_BASE_NGRAMS_MIN_FREQUENCY],
                     case_sensitive=self.configs[DIMEConfig.MAIN_KEY_BASE][DIMEConfig.SUB_KEY_BASE_CASE_SENSITIVITY],
                     metric=self.configs[DIMEConfig.MAIN_KEY_BASE][DIMEConfig.SUB_KEY_BASE_METRIC],
                     output_mode=self.configs[DIMEConfig.MAIN_KEY_CLI][DIMEConfig.SUB_KEY_CLI_OUTPUT_MODE],
                     quiet_mode=self.quiet_mode,
+                    incremental=self.incremental,
+                    global_workers=self.configs[DIMEConfig.MAIN_KEY_PERFORMANCE][
+                        DIMEConfig.SUB_KEY_PERFORMANCE_GLOBAL_WORKERS],
+                    tf_threads=self.configs[DIMEConfig.MAIN_KEY_PERFORMANCE][DIMEConfig.SUB_KEY_PERFORMANCE_TF_THREADS],
+                    resume=self.resume,
+                    checkpoint_interval=self.configs[DIMEConfig.MAIN_KEY_PERFORMANCE][
+                        DIMEConfig.SUB_KEY_PERFORMANCE_CHECKPOINT_INTERVAL],
+                    approximation_sample_size=self.configs[DIMEConfig.MAIN_KEY_PERFORMANCE][
+                        DIMEConfig.SUB_KEY_PERFORMANCE_APPROXIMATION_SAMPLE_SIZE],
+                    approximation_confidence=self.configs[DIMEConfig.MAIN_KEY_PERFORMANCE][
+                        DIMEConfig.SUB_KEY_PERFORMANCE_APPROXIMATION_CONFIDENCE],
+                    approximation_adaptive=self.configs[DIMEConfig.MAIN_KEY_PERFORMANCE][
+                        DIMEConfig.SUB_KEY_PERFORMANCE_APPROXIMATION_ADAPTIVE],
+                    feature_space=self.configs[DIMEConfig.MAIN_KEY_PERFORMANCE][
+                        DIMEConfig.SUB_KEY_PERFORMANCE_FEATURE_SPACE],
+                    rest_concurrency=self.configs[DIMEConfig.MAIN_KEY_PERFORMANCE][
+                        DIMEConfig.SUB_KEY_PERFORMANCE_REST_CONCURRENCY],
+                    rest_retries=self.configs[DIMEConfig.MAIN_KEY_PERFORMANCE][
+                        DIMEConfig.SUB_KEY_PERFORMANCE_REST_RETRIES],
+                    rest_backoff=self.configs[DIMEConfig.MAIN_KEY_PERFORMANCE][
+                        DIMEConfig.SUB_KEY_PERFORMANCE_REST_BACKOFF],
+                    rest_ejection_time=self.configs[DIMEConfig.MAIN_KEY_PERFORMANCE][
+                        DIMEConfig.SUB_KEY_PERFORMANCE_REST_EJECTION_TIME],
+                    rest_timeout=self.configs[DIMEConfig.MAIN_KEY_PERFORMANCE][
+                        DIMEConfig.SUB_KEY_PERFORMANCE_REST_TIMEOUT],
+                    rest_hedging=self.configs[DIMEConfig.MAIN_KEY_PERFORMANCE][
+                        DIMEConfig.SUB_KEY_PERFORMANCE_REST_HEDGING],
                 )
-                if self.quiet_mode:
-                    explanation = rasa_dime_explainer.explain(inspect=False)
-                    metadata = explanation.get_explanation(output_type=ExplanationType.QUIET)
-                    process_q = process_queue.ProcessQueue(data_source_path=PROCESS_QUEUE)
-                    process_q.update_metadata(
-                        request_id=self.request_id,
-                        metadata=metadata
-                    )
-                    sys.stdout.write(f"success {self.request_id}")
-                else:
-                    explanation = rasa_dime_explainer.explain(inspect=True)
-                    explanation.visualize()
+                with rasa_dime_explainer:
+                    if self.quiet_mode:
+                        explanation = rasa_dime_explainer.explain(inspect=False)
+                        metadata = explanation.get_explanation(output_type=ExplanationType.QUIET)
+                        process_q = process_queue.ProcessQueue(data_source_path=PROCESS_QUEUE)
+                        process_q.update_metadata(
+                            request_id=self.request_id,
+                            metadata=metadata
+                        )
+                        sys.stdout.write(f"success {self.request_id}")
+                    elif self.stream:
+                        with DIMEExplanationStream() as explanation_stream:
+                            for event in explanation_stream.write_all(rasa_dime_explainer.explain_iter()):
+                                _log_explanation_event(event=event)
+                    else:
+                        explanation = rasa_dime_explainer.explain(inspect=True)
+                        explanation.visualize()
             elif model_type == MODEL_TYPE_OTHER:
+                if self.stream:
+                    logger.warning("Streaming explanations is only supported for "
+                                   "DIET models. The --stream flag will be ignored.")
                 custom_dime_explainer = CustomDIMEExplainer(
                     models_path=self.configs[DIMEConfig.MAIN_KEY_BASE][DIMEConfig.SUB_KEY_BASE_MODELS_PATH],
                     model_name=self.configs[DIMEConfig.MAIN_KEY_BASE][DIMEConfig.SUB_KEY_BASE_MODEL_NAME],
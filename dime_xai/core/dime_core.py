@@ -1,5 +1,5 @@
 import logging
-from typing import Optional, List, Dict, Text, Union
+from typing import Optional, List, Dict, Text, Union, Tuple
 
 import numpy as np
 from sklearn.metrics import (
@@ -14,6 +14,7 @@ from dime_xai.shared.constants import (
     NLU_FALLBACK_TAG,
 )
 from dime_xai.shared.explanation import DIMEExplanation
+from dime_xai.shared.model.prediction_batch import PredictionBatch
 from dime_xai.shared.exceptions.dime_core_exceptions import (
     InvalidMetricSpecifiedException,
     InvalidIntentRankingException,
@@ -26,11 +27,13 @@ logger = logging.getLogger(__name__)
 
 
 def get_global_f1_score(
-        model_output: List,
+        model_output: PredictionBatch,
         average: Text = Metrics.AVG_WEIGHTED
 ) -> float:
-    true_labels = [output['intent'] for output in model_output]
-    predicted_labels = [output['predicted_intent'] for output in model_output]
+    # column ids of the model's intent to column
+    # dictionary map one to one to the intent names
+    true_labels = model_output.intent_ids
+    predicted_labels = model_output.predicted_ids
     score = f1_score(
         y_true=true_labels,
         y_pred=predicted_labels,
@@ -40,11 +43,11 @@ def get_global_f1_score(
 
 
 def get_global_accuracy_score(
-        model_output: List,
+        model_output: PredictionBatch,
         normalize: bool = Metrics.AVG_WEIGHTED
 ) -> float:
-    true_labels = [output['intent'] for output in model_output]
-    predicted_labels = [output['predicted_intent'] for output in model_output]
+    true_labels = model_output.intent_ids
+    predicted_labels = model_output.predicted_ids
     score = accuracy_score(
         y_true=true_labels,
         y_pred=predicted_labels,
@@ -88,13 +91,139 @@ def get_global_confidence_score(
     return token_confidence_diff
 
 
+def get_confidence_arrays(
+        model_output: PredictionBatch,
+) -> Dict[Text, np.ndarray]:
+    tags = model_output.tags
+    order = np.argsort(tags, kind='stable')
+    return {
+        'tag': tags[order],
+        'intent_confidence': model_output.get_intent_confidence()[order].astype(np.float64),
+    }
+
+
+def get_confidence_deltas(
+        init_arrays: Dict[Text, np.ndarray],
+        token_arrays: Dict[Text, np.ndarray],
+) -> np.ndarray:
+    # token removed outputs may only cover the affected tags
+    # since the rest of the instances have a difference of 0
+    init_tags = init_arrays['tag']
+    token_tags = token_arrays['tag']
+    if not token_tags.size:
+        return np.zeros(0, dtype=np.float64)
+
+    positions = np.searchsorted(init_tags, token_tags)
+    if np.any(positions >= init_tags.size) or \
+            np.any(init_tags[np.minimum(positions, init_tags.size - 1)] != token_tags):
+        raise InvalidNLUTagException(f"There is a mismatch between NLU tags")
+
+    return init_arrays['intent_confidence'][positions] - token_arrays['intent_confidence']
+
+
+def get_global_confidence_delta(
+        init_arrays: Dict[Text, np.ndarray],
+        token_arrays: Dict[Text, np.ndarray],
+) -> float:
+    return float(np.sum(get_confidence_deltas(init_arrays=init_arrays, token_arrays=token_arrays)))
+
+
+def allocate_stratified_sample(
+        population_sizes: np.ndarray,
+        sample_size: int,
+) -> np.ndarray:
+    # proportional allocation with at least one sample per
+    # stratum, capped at the stratum sizes
+    population_sizes = np.asarray(population_sizes, dtype=np.int64)
+    total = int(population_sizes.sum())
+    if sample_size >= total:
+        return population_sizes.copy()
+
+    allocation = np.minimum(
+        np.maximum(np.floor(population_sizes * sample_size / total).astype(np.int64), 1),
+        population_sizes,
+    )
+    # take back the samples added by the minimum of one from the
+    # strata with the largest sampled share, unless the sample is
+    # smaller than the number of strata
+    while allocation.sum() > sample_size and (allocation > 1).any():
+        sampled = np.where(allocation > 1, allocation / population_sizes, -np.inf)
+        allocation[int(np.argmax(sampled))] -= 1
+    # hand out the remainder to the strata with the largest unsampled share
+    while allocation.sum() < sample_size:
+        remaining = (population_sizes - allocation) / population_sizes
+        allocation[int(np.argmax(remaining))] += 1
+    return allocation
+
+
+def estimate_stratified_total(
+        sample_values: np.ndarray,
+        sample_strata: np.ndarray,
+        population_sizes: Dict,
+) -> Tuple[float, float]:
+    # stratified estimator of a population total and its standard
+    # error with the finite population correction. strata with a
+    # single sample borrow the pooled sample variance
+    sample_values = np.asarray(sample_values, dtype=np.float64)
+    sample_strata = np.asarray(sample_strata)
+    if not sample_values.size:
+        return 0.0, 0.0
+
+    pooled_variance = float(np.var(sample_values, ddof=1)) if sample_values.size > 1 else 0.0
+    estimate = 0.0
+    variance = 0.0
+    for stratum, population_size in population_sizes.items():
+        stratum_values = sample_values[sample_strata == stratum]
+        if not stratum_values.size:
+            continue
+        sample_size = stratum_values.size
+        estimate += population_size * float(np.mean(stratum_values))
+        stratum_variance = float(np.var(stratum_values, ddof=1)) if sample_size > 1 else pooled_variance
+        finite_population_correction = 1.0 - sample_size / population_size
+        variance += population_size ** 2 * finite_population_correction * stratum_variance / sample_size
+    return estimate, float(np.sqrt(max(variance, 0.0)))
+
+
+def get_unstable_ranks(
+        estimates: Dict,
+        standard_errors: Dict,
+        ranking_length: int,
+        z_score: float,
+) -> List:
+    # tokens whose confidence intervals overlap the interval of
+    # an adjacent token in the top ranks, or the boundary between
+    # the top ranks and the rest of the tokens
+    tokens = sorted(estimates, key=lambda token: estimates[token], reverse=True)
+    if len(tokens) <= 1:
+        return []
+
+    lower = {token: estimates[token] - z_score * standard_errors.get(token, 0.0) for token in tokens}
+    upper = {token: estimates[token] + z_score * standard_errors.get(token, 0.0) for token in tokens}
+    top_length = min(ranking_length, len(tokens))
+
+    unstable = set()
+    for index in range(top_length - 1):
+        token, next_token = tokens[index], tokens[index + 1]
+        if lower[token] <= upper[next_token]:
+            unstable.update([token, next_token])
+
+    if top_length < len(tokens):
+        boundary = lower[tokens[top_length - 1]]
+        max_rest_upper = max(upper[token] for token in tokens[top_length:])
+        unstable.update(token for token in tokens[:top_length] if lower[token] <= max_rest_upper)
+        unstable.update(token for token in tokens[top_length:] if upper[token] >= boundary)
+
+    return [token for token in tokens if token in unstable and standard_errors.get(token, 0.0) > 0]
+
+
 def get_global_score(
         token: Text,
-        init_model_output: List,
-        token_model_output: List,
+        init_model_output: PredictionBatch,
+        token_model_output: PredictionBatch,
         scorer: Text = Metrics.DEFAULT,
         average: Text = Metrics.AVG_WEIGHTED,
         normalize: bool = Metrics.NORMALIZE,
+        init_arrays: Dict[Text, np.ndarray] = None,
 ) -> Optional[float]:
     if scorer == Metrics.F1_SCORE:
         logger.warning("F1 Score metric is deprecated and will be removed in DIME XAI 2.0.0 "
@@ -119,35 +248,26 @@ def get_global_score(
         return token_accuracy_diff
 
     elif scorer == Metrics.CONFIDENCE:
-        token_confidence_diff = 0
-        for init_instance in init_model_output:
-            tag = init_instance['tag']
-            token_instance = [x for x in token_model_output if x['tag'] == tag][0]
-
-            if not token_instance:
-                raise InvalidNLUTagException(f"There is a mismatch between NLU tags")
-
-            # if 'intent_ranking' not in init_instance or \
-            #         'intent_ranking' not in token_instance:
-            #     raise EmptyIntentRankingException(f"Failed to retrieve the intent ranking")
-            instance_confidence_score = get_global_confidence_score(
-                init_instance_output=init_instance,
-                token_instance_output=token_instance,
-            )
-            token_confidence_diff += instance_confidence_score
-        return token_confidence_diff
+        if init_arrays is None:
+            init_arrays = get_confidence_arrays(model_output=init_model_output)
+        token_arrays = get_confidence_arrays(model_output=token_model_output)
+        return get_global_confidence_delta(
+            init_arrays=init_arrays,
+            token_arrays=token_arrays,
+        )
     else:
         raise InvalidMetricSpecifiedException(f"The metric must be Accuracy, F1-Score, "
                                               f"or Confidence for Global feature importance")
 
 
 def global_feature_importance(
-        init_model_output: List,
-        token_model_output: List,
+        init_model_output: PredictionBatch,
+        token_model_output: PredictionBatch,
         token: Text,
         scorer: Text = Metrics.CONFIDENCE,
         average: Text = Metrics.AVG_WEIGHTED,
         normalize: bool = Metrics.NORMALIZE,
+        init_arrays: Dict[Text, np.ndarray] = None,
 ) -> Optional[Dict]:
     score = get_global_score(
         init_model_output=init_model_output,
@@ -156,6 +276,7 @@ def global_feature_importance(
         average=average,
         normalize=normalize,
         token=token,
+        init_arrays=init_arrays,
     )
     return score
 
@@ -182,6 +303,49 @@ def dual_feature_importance(
                                               f" for Dual feature importance")
 
 
+def get_local_confidence_scores(
+        init_instance_output: Dict,
+        token_instance_outputs: PredictionBatch,
+) -> np.ndarray:
+    predicted_class = init_instance_output['predicted_intent']
+    init_confidence = init_instance_output['predicted_confidence']
+
+    intent_index = token_instance_outputs.intent_index
+    predicted_column = intent_index.get(predicted_class, -1)
+    token_predicted = token_instance_outputs.predicted_ids
+    same_class = token_predicted == predicted_column
+    fallback = (token_predicted == intent_index.get(NLU_FALLBACK_TAG, -1)) | (predicted_class == NLU_FALLBACK_TAG)
+
+    class_confidence = token_instance_outputs.get_column(column=predicted_column)
+    if np.isnan(class_confidence[~same_class & ~fallback]).any():
+        raise InvalidIntentRankingException(f"The predicted intent is not "
+                                            f"available in the intent ranking list")
+
+    token_confidence = np.where(same_class, token_instance_outputs.predicted_confidence,
+                                np.where(fallback, 0.0, class_confidence))
+    return init_confidence - token_confidence
+
+
+def dual_feature_importance_batch(
+        init_instance_output: Dict,
+        token_instance_outputs: PredictionBatch,
+        scorer: Text = Metrics.CONFIDENCE,
+) -> Optional[np.ndarray]:
+    if scorer in [Metrics.CONFIDENCE]:
+        if 'intent_ranking' not in init_instance_output:
+            raise EmptyIntentRankingException(f"Failed to retrieve the intent ranking")
+
+        return get_local_confidence_scores(
+            init_instance_output=init_instance_output,
+            token_instance_outputs=token_instance_outputs,
+        )
+    else:
+        logger.error("Dual Feature Importance requires Model Confidence as the metric by default. "
+                     "Accuracy and F1-Score are only supported by Global feature importance only.")
+        raise InvalidMetricSpecifiedException(f"The metric must be Model Confidence"
+                                              f" for Dual feature importance")
+
+
 def softmax(
         vector: Union[List, Dict]
 ) -> Union[np.array, Dict]:
@@ -18,6 +18,7 @@ from dime_xai.shared.constants import (
     DEFAULT_NGRAMS_MODE,
     DEFAULT_MAX_NGRAMS,
     DEFAULT_MIN_NGRAMS,
+    DEFAULT_MIN_NGRAM_FREQUENCY,
     DEFAULT_CASE_SENSITIVE_MODE, 
     Metrics,
     Encoding,
@@ -40,6 +41,7 @@ class DIMEExplainer:
             ngrams: bool = DEFAULT_NGRAMS_MODE,
             max_ngrams: int = DEFAULT_MAX_NGRAMS,
             min_ngrams: int = DEFAULT_MIN_NGRAMS,
+            min_ngram_frequency: int = DEFAULT_MIN_NGRAM_FREQUENCY,
             case_sensitive: bool = DEFAULT_CASE_SENSITIVE_MODE,
             metric: Text = Metrics.F1_SCORE,
             testing_data_encoding: Text = Encoding.UTF8,
@@ -64,6 +66,7 @@ class DIMEExplainer:
         self.ngrams = ngrams
         self.max_ngrams = max_ngrams
         self.min_ngrams = min_ngrams
+        self.min_ngram_frequency = min_ngram_frequency
         self.case_sensitive = case_sensitive
         self.metric = metric
         self.testing_data_encoding = testing_data_encoding
@@ -0,0 +1,255 @@
+import logging
+from typing import Text, List, Dict, Optional, Tuple, NoReturn
+
+import numpy as np
+
+from dime_xai.core.dime_core import global_feature_importance
+from dime_xai.shared.constants import (
+    Metrics,
+    MODEL_MODE_LOCAL,
+    DEFAULT_FEATURE_SPACE_MODE,
+)
+from dime_xai.shared.model.prediction_batch import PredictionBatch
+from dime_xai.shared.model.rasa_model import RASAModel
+from dime_xai.shared.testing_data.encoded_corpus import EncodedCorpus
+
+logger = logging.getLogger(__name__)
+
+# state of a global feature importance worker process,
+# initialized once per process by `init_global_worker`
+_worker_state = dict()
+
+
+def get_token_model_output(
+        model: RASAModel,
+        corpus: EncodedCorpus,
+        init_model_output: PredictionBatch,
+        init_output_index: Dict,
+        token: Text,
+        token_tags: List,
+        metric: Text,
+        feature_space: bool = DEFAULT_FEATURE_SPACE_MODE,
+        description: Text = "",
+) -> PredictionBatch:
+    """
+    Re-parses only the tagged examples that contain the
+    given token after removing it. Confidence differences
+    are only computed over these examples, while the other
+    metrics reuse the initial model output for the rest of
+    the dataset. With feature space perturbation, local models
+    with the DIME DIET classifier derive the features of the
+    token removed examples from the cached features of the examples
+
+    Args:
+        model: RASA model used to parse the examples
+        corpus: encoded tagged dataset
+        init_model_output: model output of the tagged dataset
+        init_output_index: tag to initial model output index dictionary
+        token: token to be removed from the dataset
+        token_tags: tags of the examples that contain the token
+        metric: global feature importance metric
+        feature_space: removes the token from the features of the
+            examples instead of their texts, if the model supports it
+        description: a description to be shown as the progress bar prefix
+
+    Returns:
+        model output of the affected examples for the confidence
+            metric, else the model output for the whole tagged
+            dataset, ordered by tag
+    """
+    if feature_space and model.supports_masked_parsing():
+        affected_model_output = model.parse_perturbed_supervised_batch(
+            data_instances=[{
+                'tag': tag,
+                'intent': corpus.get_intent(tag=tag),
+                'example': corpus.get_text(tag=tag),
+            } for tag in token_tags],
+            token=token,
+            description=description,
+        )
+    else:
+        modified_testing_data = corpus.remove_token_from_examples(tags=token_tags, token=token)
+        affected_model_output = model.parse_supervised_batch(
+            data_instances=modified_testing_data,
+            description=description
+        )
+    if metric == Metrics.CONFIDENCE:
+        return affected_model_output
+
+    positions = np.array([init_output_index[tag] for tag in affected_model_output.tags.tolist()], dtype=np.int64)
+    return init_model_output.replace(positions=positions, other=affected_model_output)
+
+
+def get_token_global_score(
+        model: RASAModel,
+        corpus: EncodedCorpus,
+        init_model_output: PredictionBatch,
+        init_output_index: Dict,
+        token: Text,
+        token_tags: List,
+        metric: Text,
+        init_arrays: Dict[Text, np.ndarray] = None,
+        feature_space: bool = DEFAULT_FEATURE_SPACE_MODE,
+        description: Text = "",
+) -> float:
+    """
+    Calculates the global feature importance score of a
+    single token. Shared by the in-process global loop
+    and the global feature importance worker processes
+
+    Args:
+        model: RASA model used to parse the examples
+        corpus: encoded tagged dataset
+        init_model_output: model output of the tagged dataset
+        init_output_index: tag to initial model output index dictionary
+        token: token to calculate the score for
+        token_tags: tags of the examples that contain the token
+        metric: global feature importance metric
+        init_arrays: confidence arrays of the initial model output
+        feature_space: removes the token from the features of the
+            examples instead of their texts, if the model supports it
+        description: a description to be shown as the progress bar prefix
+
+    Returns:
+        global feature importance score
+    """
+    token_model_output = get_token_model_output(
+        model=model,
+        corpus=corpus,
+        init_model_output=init_model_output,
+        init_output_index=init_output_index,
+        token=token,
+        token_tags=token_tags,
+        metric=metric,
+        feature_space=feature_space,
+        description=description,
+    )
+    return global_feature_importance(
+        init_model_output=init_model_output,
+        token_model_output=token_model_output,
+        token=token,
+        scorer=metric,
+        init_arrays=init_arrays,
+    )
+
+
+def _set_tf_threads(tf_threads: int) -> NoReturn:
+    if not tf_threads:
+        return
+    try:
+        import tensorflow as tf
+        tf.config.threading.set_intra_op_parallelism_threads(tf_threads)
+        tf.config.threading.set_inter_op_parallelism_threads(tf_threads)
+    except (ImportError, RuntimeError) as e:
+        logger.warning(f"Failed to set the TensorFlow thread count of the worker. {e}")
+
+
+def init_parse_worker(
+        models_path: Text,
+        model_name: Text,
+        tf_threads: int,
+) -> NoReturn:
+    """
+    Initializes a parsing worker process by loading
+    the local RASA model once per process
+
+    Args:
+        models_path: path to the RASA models directory
+        model_name: name of the RASA model
+        tf_threads: intra-op and inter-op TensorFlow thread
+            count of the worker. 0 keeps the TensorFlow default
+
+    Returns:
+        no return
+    """
+    _set_tf_threads(tf_threads=tf_threads)
+    _worker_state['model'] = RASAModel(
+        model_mode=MODEL_MODE_LOCAL,
+        models_path=models_path,
+        model_name=model_name,
+        quiet_mode=True,
+    )
+
+
+def parse_worker_texts(data_instances: List[Text]) -> List[Dict]:
+    """
+    Parses a chunk of strings inside an initialized
+    worker process
+
+    Args:
+        data_instances: list of strings to be parsed
+
+    Returns:
+        raw model responses in the same order as the input
+    """
+    return _worker_state['model'].parse_texts(data_instances=data_instances)
+
+
+def init_global_worker(
+        models_path: Text,
+        model_name: Text,
+        tf_threads: int,
+        corpus: EncodedCorpus,
+        init_model_output: PredictionBatch,
+        init_output_index: Dict,
+        metric: Text,
+        init_arrays: Optional[Dict[Text, np.ndarray]],
+        feature_space: bool = DEFAULT_FEATURE_SPACE_MODE,
+) -> NoReturn:
+    """
+    Initializes a global feature importance worker process.
+    Loads the local RASA model once per process and keeps
+    the initial model output for scoring tokens
+
+    Args:
+        models_path: path to the RASA models directory
+        model_name: name of the RASA model
+        tf_threads: intra-op and inter-op TensorFlow thread
+            count of the worker. 0 keeps the TensorFlow default
+        corpus: encoded tagged dataset
+        init_model_output: model output of the tagged dataset
+        init_output_index: tag to initial model output index dictionary
+        metric: global feature importance metric
+        init_arrays: confidence arrays of the initial model output
+        feature_space: removes the tokens from the features of the
+            examples instead of their texts, if the model supports it
+
+    Returns:
+        no return
+    """
+    init_parse_worker(models_path=models_path, model_name=model_name, tf_threads=tf_threads)
+    # token outputs share the intent columns of the initial output
+    _worker_state['model'].set_intent_index(intent_index=init_model_output.intent_index)
+    _worker_state['corpus'] = corpus
+    _worker_state['init_model_output'] = init_model_output
+    _worker_state['init_output_index'] = init_output_index
+    _worker_state['metric'] = metric
+    _worker_state['init_arrays'] = init_arrays
+    _worker_state['feature_space'] = feature_space
+
+
+def score_global_token(token_task: Tuple[Text, List]) -> Tuple[Text, float]:
+    """
+    Calculates the global feature importance score of
+    a token inside an initialized worker process
+
+    Args:
+        token_task: token and the tags of the examples
+            that contain the token
+
+    Returns:
+        token and its global feature importance score
+    """
+    token, token_tags = token_task
+    score = get_token_global_score(
+        model=_worker_state['model'],
+        corpus=_worker_state['corpus'],
+        init_model_output=_worker_state['init_model_output'],
+        init_output_index=_worker_state['init_output_index'],
+        token=token,
+        token_tags=token_tags,
+        metric=_worker_state['metric'],
+        init_arrays=_worker_state['init_arrays'],
+        feature_space=_worker_state['feature_space'],
+    )
+    return token, score
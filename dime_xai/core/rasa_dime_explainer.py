@@ -1,20 +1,38 @@
 import logging
+import multiprocessing
 import time
-from copy import deepcopy
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
 from time import process_time
-from typing import Text, Dict, Optional, List
+from typing import Text, Dict, Optional, List, Callable, Any, NoReturn, Tuple, Iterator, Union
 
+import numpy as np
+from scipy.stats import norm
 from tqdm import tqdm
 
 from dime_xai.core.dime_core import (
-    global_feature_importance,
     feature_selection,
-    dual_feature_importance,
+    dual_feature_importance_batch,
+    get_confidence_arrays,
+    get_confidence_deltas,
+    allocate_stratified_sample,
+    estimate_stratified_total,
+    get_unstable_ranks,
     min_max_normalize,
     to_probability_series,
     clip_negative_values,
 )
 from dime_xai.core.dime_explainer import DIMEExplainer
+from dime_xai.core.global_workers import (
+    get_token_model_output,
+    get_token_global_score,
+    init_global_worker,
+    init_parse_worker,
+    parse_worker_texts,
+    score_global_token,
+)
 from dime_xai.shared.constants import (
     DEFAULT_DATA_PATH,
     DEFAULT_MODELS_PATH,
@@ -31,8 +49,28 @@ from dime_xai.shared.constants import (
     DEFAULT_LATEST_TAG,
     DEFAULT_MAX_NGRAMS,
     DEFAULT_MIN_NGRAMS,
+    DEFAULT_MIN_NGRAM_FREQUENCY,
     DEFAULT_NGRAMS_MODE,
     DEFAULT_CASE_SENSITIVE_MODE,
+    DEFAULT_GLOBAL_WORKERS,
+    DEFAULT_TF_THREADS,
+    DEFAULT_CHECKPOINT_INTERVAL,
+    DEFAULT_APPROXIMATION_SAMPLE_SIZE,
+    DEFAULT_APPROXIMATION_CONFIDENCE,
+    DEFAULT_APPROXIMATION_ADAPTIVE,
+    DEFAULT_APPROXIMATION_SEED,
+    DEFAULT_FEATURE_SPACE_MODE,
+    DEFAULT_REST_CONCURRENCY,
+    DEFAULT_REST_RETRIES,
+    DEFAULT_REST_BACKOFF,
+    DEFAULT_REST_EJECTION_TIME,
+    DEFAULT_REST_TIMEOUT,
+    DEFAULT_REST_HEDGING,
+    DEFAULT_DUAL_INSTANCE_BATCH_SIZE,
+    GLOBAL_WORKER_PENDING_TASKS,
+    EXPLANATION_EVENT_GLOBAL_SCORE,
+    EXPLANATION_EVENT_DUAL_INSTANCE,
+    EXPLANATION_EVENT_END,
     Metrics,
     OUTPUT_MODE_GLOBAL,
     OUTPUT_MODE_DUAL,
@@ -44,19 +82,21 @@ from dime_xai.shared.constants import (
 )
 from dime_xai.shared.exceptions.dime_core_exceptions import (
     InvalidMetricSpecifiedException,
-    RasaExplainerException
+    RasaExplainerException,
+    DIMECacheException,
+    RESTModelLoadException,
 )
 from dime_xai.shared.explanation import DIMEExplanation
+from dime_xai.shared.model.prediction_batch import PredictionBatch
 from dime_xai.shared.model.rasa_model import RASAModel
 from dime_xai.shared.testing_data.rasa_testing_data import RASATestingData
 from dime_xai.utils.cache import DIMECache
 from dime_xai.utils.fingerprint import Fingerprint
-from dime_xai.utils.io import get_timestamp_str
+from dime_xai.utils.io import get_timestamp_str, get_unique_list
 from dime_xai.utils.text_preprocessing import (
     bag_of_words,
-    remove_token_from_dataset,
+    bag_of_ngrams,
     lowercase_list,
-    get_token_count,
     remove_token,
     order_dict,
 )
@@ -72,12 +112,13 @@ class RasaDIMEExplainer(DIMEExplainer):
             testing_data_path: Text = DEFAULT_DATA_PATH,
             model_mode: Text = DEFAULT_MODEL_MODE,
             rasa_version: Text = RASA_CORE_VERSION,
-            url: Text = MODEL_REST_WEBHOOK_URL,
+            url: Union[Text, List[Text]] = MODEL_REST_WEBHOOK_URL,
             data_instances: List = None,
             ranking_length: int = DEFAULT_RANKING_LENGTH,
             ngrams: bool = DEFAULT_NGRAMS_MODE,
             max_ngrams: int = DEFAULT_MAX_NGRAMS,
             min_ngrams: int = DEFAULT_MIN_NGRAMS,
+            min_ngram_frequency: int = DEFAULT_MIN_NGRAM_FREQUENCY,
             case_sensitive: bool = DEFAULT_CASE_SENSITIVE_MODE,
             metric: Text = Metrics.F1_SCORE,
             testing_data_encoding: Text = Encoding.UTF8,
@@ -89,6 +130,22 @@ class RasaDIMEExplainer(DIMEExplainer):
             testing_data_version: Text = DEFAULT_NLU_YAML_VERSION,
             output_mode: Text = DEFAULT_OUTPUT_MODE,
             quiet_mode: bool = False,
+            use_cache: bool = True,
+            incremental: bool = False,
+            global_workers: int = DEFAULT_GLOBAL_WORKERS,
+            tf_threads: int = DEFAULT_TF_THREADS,
+            resume: bool = False,
+            checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL,
+            approximation_sample_size: int = DEFAULT_APPROXIMATION_SAMPLE_SIZE,
+            approximation_confidence: float = DEFAULT_APPROXIMATION_CONFIDENCE,
+            approximation_adaptive: bool = DEFAULT_APPROXIMATION_ADAPTIVE,
+            feature_space: bool = DEFAULT_FEATURE_SPACE_MODE,
+            rest_concurrency: int = DEFAULT_REST_CONCURRENCY,
+            rest_retries: int = DEFAULT_REST_RETRIES,
+            rest_backoff: float = DEFAULT_REST_BACKOFF,
+            rest_ejection_time: float = DEFAULT_REST_EJECTION_TIME,
+            rest_timeout: float = DEFAULT_REST_TIMEOUT,
+            rest_hedging: bool = DEFAULT_REST_HEDGING,
     ) -> None:
         super().__init__(
             models_path=models_path,
@@ -101,6 +158,7 @@ class RasaDIMEExplainer(DIMEExplainer):
             ngrams=ngrams,
             max_ngrams=max_ngrams,
             min_ngrams=min_ngrams,
+            min_ngram_frequency=min_ngram_frequency,
             case_sensitive=case_sensitive,
             metric=metric,
             testing_data_encoding=testing_data_encoding,
@@ -115,10 +173,24 @@ class RasaDIMEExplainer(DIMEExplainer):
             quiet_mode=quiet_mode,
         )
         self.rasa_version = rasa_version
+        self.use_cache = use_cache
+        self.incremental = incremental
+        self.global_workers = global_workers
+        self.tf_threads = tf_threads
+        self.resume = resume
+        self.checkpoint_interval = checkpoint_interval
+        self.approximation_sample_size = approximation_sample_size
+        self.approximation_confidence = approximation_confidence
+        self.approximation_adaptive = approximation_adaptive
+        self.feature_space = feature_space
         self.testing_data = RASATestingData(
             testing_data_dir=self.testing_data_path,
             case_sensitive=self.case_sensitive,
             from_rasa=True,
+            ngrams=self.ngrams,
+            min_ngrams=self.min_ngrams,
+            max_ngrams=self.max_ngrams,
+            min_ngram_frequency=self.min_ngram_frequency,
         )
         self.model = RASAModel(
             model_mode=self.model_mode,
@@ -126,6 +198,12 @@ class RasaDIMEExplainer(DIMEExplainer):
             model_name=self.model_name,
             url=self.url,
             quiet_mode=quiet_mode,
+            rest_concurrency=rest_concurrency,
+            rest_retries=rest_retries,
+            rest_backoff=rest_backoff,
+            rest_ejection_time=rest_ejection_time,
+            rest_timeout=rest_timeout,
+            rest_hedging=rest_hedging,
         )
         self.fingerprint = Fingerprint(
             model_fingerprint=self.model.get_fingerprint(),
@@ -143,19 +221,55 @@ class RasaDIMEExplainer(DIMEExplainer):
                 raise InvalidMetricSpecifiedException()
 
         self._cache = self._init_cache()
+        self._global_score_tables = dict()
+        # score tables whose cached scores are marked final
+        self._final_global_score_tables = set()
+        # pool of parsing worker processes of dual mode,
+        # created on demand and shut down by `close`
+        self._dual_executor = None
+
+        if self.feature_space and not self.model.supports_masked_parsing():
+            logger.warning(f"Feature space perturbation requires a local model with the "
+                           f"DIME DIET classifier. DIME will perturb the texts instead.")
+            self.feature_space = False
 
         if self._cache:
             logger.info(f"Successfully loaded the DIME caches\n")
-            pass  # TODO :init cache checks
+            self.model.set_persistent_cache(cache=self._cache)
 
         if not self.case_sensitive:
             self.data_instances = lowercase_list(self.data_instances)
 
         init_model_parse_start_time = process_time()
-        self.init_model_output = self.model.parse_supervised_batch(
-            data_instances=self.testing_data.get_tagged_data(),
-            description="Parsing all instances"
-        )
+        init_records = self._load_cached(
+            self._cache.load_init_output, config=self._get_cache_config()
+        ) if self._cache else None
+        if init_records is not None and not self._matches_tagged_data(records=init_records):
+            logger.warning(f"The cached initial model output does not match the tagged "
+                           f"dataset. DIME will parse the dataset again")
+            init_records = None
+        if init_records is None:
+            self.init_model_output = self.model.parse_supervised_batch(
+                data_instances=self.testing_data.get_tagged_data(),
+                description="Parsing all instances"
+            )
+            self._save_cached(
+                self._cache.save_init_output if self._cache else None,
+                init_output=self.init_model_output.to_records(),
+                config=self._get_cache_config(),
+            )
+        else:
+            self.init_model_output = PredictionBatch.from_records(
+                intent_index=self.model.get_intent_index(),
+                records=init_records,
+            )
+            logger.info(f"Loaded the initial model output from the DIME cache")
+
+        self._init_output_index = {
+            tag: index for index, tag in enumerate(self.init_model_output.tags.tolist())
+        }
+        self._init_confidence_arrays = get_confidence_arrays(model_output=self.init_model_output) \
+            if self.metric == Metrics.CONFIDENCE else None
 
         init_model_parse_end_time = process_time()
         init_model_parse_duration = init_model_parse_end_time - init_model_parse_start_time
@@ -163,6 +277,10 @@ class RasaDIMEExplainer(DIMEExplainer):
         logger.debug('Initialized the DIME explainer')
 
     def _init_cache(self) -> Optional[DIMECache]:
+        if not self.use_cache:
+            logger.debug(f"DIME caches are disabled")
+            return None
+
         logger.debug(f"Initializing DIME caches...")
 
         model_fingerprint = self.model.get_fingerprint()
@@ -176,11 +294,58 @@ class RasaDIMEExplainer(DIMEExplainer):
         logger.debug(f"Received model fingerprint: {model_fingerprint}")
         logger.debug(f"Received data fingerprint: {data_fingerprint}")
 
-        # # handle caches
-        # # TODO :check fingerprints
-        # # TODO :check cache if same prints
-        # # TODO :load cache files if available
-        return DIMECache()
+        try:
+            return DIMECache(
+                model_fingerprint=model_fingerprint,
+                data_fingerprint=data_fingerprint,
+            )
+        except DIMECacheException as e:
+            logger.warning(f"Failed to initialize the DIME cache. DIME will "
+                           f"run without caching model outputs. {e}")
+            return None
+
+    def _get_cache_config(self, with_metric: bool = False, with_ngrams: bool = False) -> Dict:
+        # configs that change the cached model outputs or scores
+        # in addition to the model and data fingerprints
+        cache_config = {'case_sensitive': self.case_sensitive}
+        if with_metric:
+            cache_config['metric'] = self.metric
+            cache_config['feature_space'] = self.feature_space
+        if with_ngrams:
+            cache_config['ngrams'] = {
+                'min_ngrams': self.min_ngrams,
+                'max_ngrams': self.max_ngrams,
+                'min_ngram_frequency': self.min_ngram_frequency,
+            } if self.ngrams else False
+        return cache_config
+
+    def _load_cached(self, loader: Callable, **kwargs) -> Any:
+        try:
+            return loader(**kwargs)
+        except DIMECacheException as e:
+            logger.warning(f"Failed to read from the DIME cache. DIME will "
+                           f"continue without the cache. {e}")
+            self._cache = None
+            return None
+
+    def _matches_tagged_data(self, records: List[Dict]) -> bool:
+        # cached records are matched to the examples by tag
+        tagged_data = self.testing_data.get_tagged_data()
+        if len(records) != len(tagged_data):
+            return False
+        examples = {instance['tag']: (instance['intent'], instance['example']) for instance in tagged_data}
+        return all(examples.get(record.get('tag')) == (record.get('intent'), record.get('example'))
+                   for record in records)
+
+    def _save_cached(self, saver: Optional[Callable], **kwargs) -> NoReturn:
+        if not saver:
+            return
+        try:
+            saver(**kwargs)
+        except DIMECacheException as e:
+            logger.warning(f"Failed to write to the DIME cache. DIME will "
+                           f"continue without the cache. {e}")
+            self._cache = None
 
     @staticmethod
     def _log_duration(duration: float, title: Text):
@@ -191,53 +356,244 @@ class RasaDIMEExplainer(DIMEExplainer):
         elif 3600 <= duration < 86400:
             logger.info(f"{title} feature importance was calculated within {duration / 3600} hours.\n")
 
-    def _global(self, vocabulary: List) -> Optional[Dict]:
-        gfi_start_time = time.time()
-        instance_global_feature_importance = dict()
+    def _get_token_model_output(self, token: Text, token_tags: List, description: Text = "") -> PredictionBatch:
+        return get_token_model_output(
+            model=self.model,
+            corpus=self.testing_data.get_encoded_corpus(),
+            init_model_output=self.init_model_output,
+            init_output_index=self._init_output_index,
+            token=token,
+            token_tags=token_tags,
+            metric=self.metric,
+            feature_space=self.feature_space,
+            description=description,
+        )
 
-        testing_tokens = self.testing_data.get_tokens()
-        init_model_output = self.init_model_output
+    def _use_global_workers(self, token_size: int) -> bool:
+        if not self.global_workers or self.global_workers < 2 or token_size < 2:
+            return False
+        if self.model_mode != MODEL_MODE_LOCAL:
+            logger.warning(f"Global feature importance workers are only supported "
+                           f"for local models. REST models are parsed concurrently "
+                           f"with up to 'rest_concurrency' requests in a single process.")
+            return False
+        return True
 
-        for token in vocabulary:
-            token_count = get_token_count(testing_tokens, token)
-            testing_data = self.testing_data.get_tagged_data()
+    def _iter_tokens_parallel(self, token_tasks: List[Tuple[Text, List]]) -> Iterator[Tuple[Text, float]]:
+        """
+        Shards the given tokens across a pool of worker processes.
+        Each worker loads the local RASA model once, and the scores
+        are merged in the parent process
 
-            if token_count > 0:
-                modified_testing_data = remove_token_from_dataset(
-                    testing_data=testing_data,
-                    token=token
-                )
+        Args:
+            token_tasks: list of tokens and the tags of the
+                examples that contain each token
 
-                token_model_output = self.model.parse_supervised_batch(
-                    data_instances=modified_testing_data,
-                    description=f"Global feature importance [{vocabulary.index(token) + 1}/{len(vocabulary)}]"
-                )
+        Returns:
+            iterator of tokens and global feature importance scores
+        """
+        worker_count = min(self.global_workers, len(token_tasks))
+        logger.info(f"Calculating global feature importance for {len(token_tasks)} "
+                    f"tokens using {worker_count} worker processes")
 
-                logger.info(f"Found {token_count} instances of the token '{token}'")
-                global_feature_importance_score = global_feature_importance(
-                    init_model_output=init_model_output,
-                    token_model_output=token_model_output,
-                    token=token,
-                    scorer=self.metric
-                )
-                logger.info(f'{str.capitalize(self.metric)} difference for the token '
-                            f'`{token}`: {global_feature_importance_score}')
-            else:
-                global_feature_importance_score = 0
-                if self.case_sensitive:
-                    logger.warning(f"Token `{token}` was not found in the vocabulary. Global feature importance "
-                                   f"score was set to 0 by default. Note that `case_sensitive` can be set to "
-                                   f"`False` in the dime config file to discard the case if required.")
+        # longer posting lists first, so that the slowest
+        # tokens do not end up at the tail of a shard
+        token_tasks = sorted(token_tasks, key=lambda token_task: len(token_task[1]), reverse=True)
+        remaining_tasks = iter(token_tasks)
+
+        # tokens are submitted in bounded batches instead of all at once, so
+        # that an interrupted run only waits for the tokens being scored
+        pending_tasks = deque()
+        executor = ProcessPoolExecutor(
+            max_workers=worker_count,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_global_worker,
+            initargs=(
+                self.models_path,
+                self.model_name,
+                self.tf_threads,
+                self.testing_data.get_encoded_corpus(),
+                self.init_model_output,
+                self._init_output_index,
+                self.metric,
+                self._init_confidence_arrays,
+                self.feature_space,
+            ),
+        )
+        try:
+            for token_task in islice(remaining_tasks, worker_count * GLOBAL_WORKER_PENDING_TASKS):
+                pending_tasks.append(executor.submit(score_global_token, token_task))
+
+            with tqdm(total=len(token_tasks), desc="Global feature importance", disable=self.quiet_mode) as progress:
+                while pending_tasks:
+                    token, score = pending_tasks.popleft().result()
+                    next_task = next(remaining_tasks, None)
+                    if next_task:
+                        pending_tasks.append(executor.submit(score_global_token, next_task))
+                    progress.update()
+                    logger.debug(f'{str.capitalize(self.metric)} difference for the token `{token}`: {score}')
+                    yield token, score
+        finally:
+            for pending_task in pending_tasks:
+                pending_task.cancel()
+            executor.shutdown(wait=not pending_tasks)
+
+    def _get_global_score_table(self) -> Dict:
+        # raw global scores are shared by every _global call of this
+        # explainer, so tokens common to several dual mode instances
+        # are only perturbed once. Clipped, normalized and probability
+        # scores depend on the vocabulary and are derived per call
+        table_key = self._get_global_score_table_key()
+        if table_key not in self._global_score_tables:
+            self._global_score_tables[table_key] = self._load_global_checkpoint() or dict()
+        return self._global_score_tables[table_key]
+
+    def _get_global_score_table_key(self) -> Tuple:
+        return self.metric, self.case_sensitive
+
+    def _finalize_global_score_table(self, scored: bool) -> NoReturn:
+        # dual mode reads the shared score table once per instance, so
+        # a table is only finalized again once new tokens are scored
+        table_key = self._get_global_score_table_key()
+        if not scored and table_key in self._final_global_score_tables:
+            return
+        self._save_cached(
+            self._cache.finalize_global_scores if self._cache else None,
+            config=self._get_cache_config(with_metric=True),
+        )
+        self._final_global_score_tables.add(table_key)
+
+    def _load_global_checkpoint(self) -> Optional[Dict]:
+        if not self._cache:
+            return None
+
+        config = self._get_cache_config(with_metric=True)
+        if not self.resume:
+            self._save_cached(self._cache.clear_partial_global_scores, config=config)
+            return self._load_cached(self._cache.load_global_scores, config=config) if self._cache else None
+
+        scores = self._load_cached(self._cache.load_global_scores, config=config, include_partial=True)
+        if scores:
+            logger.info(f"Resuming global feature importance with {len(scores)} "
+                        f"tokens scored by previous runs")
+        return scores
+
+    def _checkpoint_global_scores(self, scores: Dict) -> NoReturn:
+        self._save_cached(
+            self._cache.save_global_scores if self._cache else None,
+            scores=scores,
+            config=self._get_cache_config(with_metric=True),
+            final=False,
+        )
+        if scores and self._cache:
+            logger.debug(f"Checkpointed the global feature importance scores of {len(scores)} tokens")
+
+    def _iter_global_scores(self, vocabulary: List) -> Iterator[Tuple[Text, float]]:
+        """
+        Calculates global feature importance scores and yields
+        each raw score as soon as it is available. Reused scores
+        are yielded first, followed by the calculated scores.
+        Calculated scores are added to the global score table and
+        are checkpointed in the DIME cache every `checkpoint_interval`
+        tokens and when the iteration stops early. Checkpoints are
+        marked final once all tokens are scored
+
+        Args:
+            vocabulary: tokens to calculate the global scores for
+
+        Returns:
+            iterator of tokens and raw global feature importance scores
+        """
+        score_table = self._get_global_score_table()
+        pending_scores = dict()
+        token_scores = None
+        scored = False
+        completed = False
+
+        try:
+            token_tasks = list()
+            for token in vocabulary:
+                if token in score_table:
+                    logger.debug(f"Reusing the global feature importance score "
+                                 f"of the token `{token}`")
+                    yield token, score_table[token]
+                    continue
+
+                token_count = self.testing_data.get_token_count(token=token)
+                token_tags = self.testing_data.get_token_postings(token=token)
+
+                if token_count > 0 and token_tags:
+                    logger.info(f"Found {token_count} instances of the token '{token}' "
+                                f"in {len(token_tags)} examples")
+                    token_tasks.append((token, token_tags))
                 else:
-                    logger.warning(f"Token `{token}` was not found in the vocabulary. Global feature importance "
-                                   f"score was set to 0 by default.")
+                    if self.case_sensitive:
+                        logger.warning(f"Token `{token}` was not found in the vocabulary. Global feature "
+                                       f"importance score was set to 0 by default. Note that `case_sensitive` "
+                                       f"can be set to `False` in the dime config file to discard the case "
+                                       f"if required.")
+                    else:
+                        logger.warning(f"Token `{token}` was not found in the vocabulary. Global feature "
+                                       f"importance score was set to 0 by default.")
+                    pending_scores[token] = score_table[token] = 0
+                    scored = True
+                    yield token, 0
+
+            if self._use_global_workers(token_size=len(token_tasks)):
+                token_scores = self._iter_tokens_parallel(token_tasks=token_tasks)
+            else:
+                token_scores = self._iter_tokens_serial(token_tasks=token_tasks)
+
+            for token, global_feature_importance_score in token_scores:
+                pending_scores[token] = score_table[token] = global_feature_importance_score
+                scored = True
+                if self.checkpoint_interval and len(pending_scores) >= self.checkpoint_interval:
+                    self._checkpoint_global_scores(scores=pending_scores)
+                    pending_scores = dict()
+                yield token, global_feature_importance_score
+            completed = True
+        finally:
+            # stops the workers of a parallel run before checkpointing
+            if token_scores is not None:
+                token_scores.close()
+            if pending_scores:
+                self._checkpoint_global_scores(scores=pending_scores)
+            if completed:
+                self._finalize_global_score_table(scored=scored)
+
+    def _iter_tokens_serial(self, token_tasks: List[Tuple[Text, List]]) -> Iterator[Tuple[Text, float]]:
+        corpus = self.testing_data.get_encoded_corpus()
+        for token_index, (token, token_tags) in enumerate(token_tasks):
+            global_feature_importance_score = get_token_global_score(
+                model=self.model,
+                corpus=corpus,
+                init_model_output=self.init_model_output,
+                init_output_index=self._init_output_index,
+                token=token,
+                token_tags=token_tags,
+                metric=self.metric,
+                init_arrays=self._init_confidence_arrays,
+                feature_space=self.feature_space,
+                description=f"Global feature importance [{token_index + 1}/{len(token_tasks)}]"
+            )
+            logger.info(f'{str.capitalize(self.metric)} difference for the token '
+                        f'`{token}`: {global_feature_importance_score}')
+            yield token, global_feature_importance_score
+
+    def _global(self, vocabulary: List) -> Optional[Dict]:
+        gfi_start_time = time.time()
+        raw_scores = dict(self._iter_global_scores(vocabulary=vocabulary))
+        instance_global_feature_importance = {token: raw_scores[token] for token in vocabulary}
 
-            instance_global_feature_importance[token] = global_feature_importance_score
         gfi_end_time = time.time()
         gfi_duration = gfi_end_time - gfi_start_time
         self._log_duration(duration=gfi_duration, title="Global")
+        return self._get_global_output(raw_scores=instance_global_feature_importance)
+
+    @staticmethod
+    def _get_global_output(raw_scores: Dict) -> Dict:
         global_scores = order_dict(
-            dict_to_order=instance_global_feature_importance,
+            dict_to_order=raw_scores,
             order_by_key=False,
             reverse=True
         )
@@ -251,57 +607,278 @@ class RasaDIMEExplainer(DIMEExplainer):
             "global_probabilities": global_probabilities,
         }
 
-    def _dual(self, data_instance: Text, feature_set: Dict, filter_zeros: bool) -> Optional[Dict]:
-        dfi_start_time = time.time()
-        if filter_zeros:
-            feature_set = {t: s for t, s in feature_set.items() if s > 0}
-        if not feature_set:
-            return {}
+    def _use_incremental(self) -> bool:
+        if not self.incremental:
+            return False
+        if self.metric != Metrics.CONFIDENCE:
+            logger.warning(f"Incremental global feature importance requires the "
+                           f"`{Metrics.CONFIDENCE}` metric since {self.metric} "
+                           f"scores cannot be updated per example. DIME will "
+                           f"recompute all global scores.")
+            return False
+        if not self._cache:
+            logger.warning(f"Incremental global feature importance requires the "
+                           f"DIME cache and a fingerprinted local model. DIME "
+                           f"will recompute all global scores.")
+            return False
+        return True
+
+    def _global_incremental(self, vocabulary: List) -> Optional[Dict]:
+        """
+        Updates the global feature importance scores of the previous
+        incremental run made with the same model and configs. With the
+        confidence metric, the global score of a token is the sum of
+        per example confidence differences, hence only the examples
+        added or changed since the previous run are perturbed, while
+        contributions of the removed examples are subtracted. Tokens
+        that were not scored in the previous run, e.g. n-grams that
+        reached `min_ngram_frequency` since then, are perturbed in
+        all of their examples
 
-        init_instance_output = self.model.parse_unsupervised(data_instance=data_instance)
-        instance_dual_feature_importance = dict()
+        Args:
+            vocabulary: tokens to calculate the global scores for
 
-        selected_features = list(feature_set.keys())
+        Returns:
+            global feature importance scores
+        """
+        gfi_start_time = time.time()
+        config = self._get_cache_config(with_metric=True, with_ngrams=True)
 
-        if not self.quiet_mode:
-            selected_features_clone = deepcopy(selected_features)
-            selected_features = tqdm(selected_features)
+        example_hashes = self.testing_data.get_example_hashes()
+        previous_state = self._load_cached(self._cache.load_incremental_state, config=config)
+        if not self._cache:
+            # failed to read the previous run
+            return self._global(vocabulary=vocabulary)
+        if previous_state is None:
+            logger.info(f"No previous incremental run was found with the same model "
+                        f"and configs. DIME will perturb all examples")
+            previous_hashes, previous_scores = set(), dict()
         else:
-            selected_features_clone = None
+            previous_hashes, previous_scores = previous_state
 
-        for token in selected_features:
-            modified_instance = remove_token(instance=deepcopy(data_instance), token=token)
-            token_instance_output = self.model.parse_unsupervised(data_instance=modified_instance)
+        current_hashes = set(example_hashes)
+        added_tags = {tag for tag, example_hash in enumerate(example_hashes)
+                      if example_hash not in previous_hashes}
+        removed_hashes = previous_hashes - current_hashes
+        logger.info(f"Incremental run: {len(added_tags)} added or changed examples, "
+                    f"{len(removed_hashes)} removed or changed examples, "
+                    f"{len(current_hashes) - len(added_tags)} unchanged examples")
 
-            dual_feature_importance_score = dual_feature_importance(
-                init_instance_output=init_instance_output,
-                token_instance_output=token_instance_output,
-                scorer=Metrics.CONFIDENCE,
-            )
-            if not self.quiet_mode:
-                selected_features.set_description(
-                    f"Dual feature importance "
-                    f"[{selected_features_clone.index(token) + 1}/{len(selected_features_clone)}]"
+        removed_totals = self._load_cached(
+            self._cache.load_contribution_totals,
+            example_hashes=removed_hashes,
+            config=config,
+        ) if removed_hashes else dict()
+        if removed_totals is None:
+            return self._global(vocabulary=vocabulary)
+
+        raw_scores = dict()
+        contributions = list()
+        for token_index, token in enumerate(vocabulary):
+            token_tags = self.testing_data.get_token_postings(token=token)
+            if not token_tags:
+                raw_scores[token] = 0
+                continue
+
+            if token in previous_scores:
+                score = previous_scores[token] - removed_totals.get(token, 0.0)
+                added_token_tags = [tag for tag in token_tags if tag in added_tags]
+            else:
+                score = 0.0
+                added_token_tags = token_tags
+            if added_token_tags:
+                token_arrays = get_confidence_arrays(model_output=self._get_token_model_output(
+                    token=token,
+                    token_tags=added_token_tags,
+                    description=f"Incremental global feature importance [{token_index + 1}/{len(vocabulary)}]"
+                ))
+                deltas = get_confidence_deltas(
+                    init_arrays=self._init_confidence_arrays,
+                    token_arrays=token_arrays,
                 )
-            instance_dual_feature_importance[token] = dual_feature_importance_score
-        dfi_end_time = time.time()
-        dfi_duration = dfi_end_time - dfi_start_time
-        self._log_duration(duration=dfi_duration, title="Dual")
-        dual_result = dict()
-        dual_result['predicted_intent'] = init_instance_output['predicted_intent']
-        dual_result['predicted_confidence'] = init_instance_output['predicted_confidence']
-        dual_result['dual_importance_scores'] = order_dict(
-            dict_to_order=instance_dual_feature_importance,
-            order_by_key=False,
-            reverse=True
+                contributions.extend(
+                    (example_hashes[tag], token, delta)
+                    for tag, delta in zip(token_arrays['tag'].tolist(), deltas.tolist())
+                )
+                score += float(deltas.sum())
+            raw_scores[token] = score
+
+        self._save_cached(
+            self._cache.save_incremental_state if self._cache else None,
+            example_hashes=current_hashes,
+            scores=raw_scores,
+            contributions=contributions,
+            removed_hashes=removed_hashes,
+            config=config,
         )
-        return dual_result
+        self._get_global_score_table().update(raw_scores)
+
+        gfi_end_time = time.time()
+        gfi_duration = gfi_end_time - gfi_start_time
+        self._log_duration(duration=gfi_duration, title="Incremental global")
+        return self._get_global_output(raw_scores=raw_scores)
+
+    def _use_approximation(self) -> bool:
+        if not self.approximation_sample_size:
+            return False
+        if self.metric != Metrics.CONFIDENCE:
+            logger.warning(f"Approximate global feature importance requires the "
+                           f"`{Metrics.CONFIDENCE}` metric since {self.metric} "
+                           f"scores cannot be estimated from sampled examples. "
+                           f"DIME will calculate exact global scores.")
+            return False
+        return True
+
+    def _sample_token_deltas(self, token: Text, token_state: Dict, sample_size: int) -> NoReturn:
+        """
+        Perturbs additional examples of a token until the
+        stratified sample reaches the given size. Examples
+        of each intent are drawn without replacement in the
+        order of the stratum's random permutation
+
+        Args:
+            token: token to be removed from the sampled examples
+            token_state: strata, sampled counts and confidence
+                differences of the examples sampled so far
+            sample_size: total number of examples to sample
+
+        Returns:
+            no return
+        """
+        strata = token_state['strata']
+        allocation = allocate_stratified_sample(
+            population_sizes=[len(stratum_tags) for stratum_tags in strata.values()],
+            sample_size=sample_size,
+        )
+        sample_tags = list()
+        for (intent, stratum_tags), stratum_sample_size in zip(strata.items(), allocation.tolist()):
+            sample_tags.extend(stratum_tags[token_state['sampled'][intent]:stratum_sample_size])
+            token_state['sampled'][intent] = max(token_state['sampled'][intent], stratum_sample_size)
+        if not sample_tags:
+            return
+
+        token_arrays = get_confidence_arrays(model_output=self._get_token_model_output(
+            token=token,
+            token_tags=sorted(sample_tags),
+            description=f"Approximate global feature importance [{token}]"
+        ))
+        deltas = get_confidence_deltas(
+            init_arrays=self._init_confidence_arrays,
+            token_arrays=token_arrays,
+        )
+        token_state['deltas'].extend(deltas.tolist())
+        token_state['delta_strata'].extend(
+            self.testing_data.get_encoded_corpus().get_intent_ids()[token_arrays['tag']].tolist()
+        )
+
+    def _global_approximate(self, vocabulary: List) -> Optional[Dict]:
+        """
+        Estimates global feature importance scores from a stratified
+        random sample of the examples that contain each token. With
+        the confidence metric, the global score of a token is the sum
+        of per example confidence differences, hence the sum is
+        estimated per intent and the standard error of the estimate is
+        reported with the scores. Tokens found in fewer examples than
+        the sample size are scored exactly. In the adaptive mode, tokens
+        whose confidence intervals leave their top ranking uncertain are
+        sampled again with twice the sample size until the ranking is
+        stable or their scores are exact
 
-    def _instance_dual(self, instance: Text, filter_zeros: bool = True) -> Optional[Dict]:
+        Args:
+            vocabulary: tokens to estimate the global scores for
+
+        Returns:
+            estimated global feature importance scores and their
+                standard errors
+        """
+        gfi_start_time = time.time()
+        random_state = np.random.RandomState(DEFAULT_APPROXIMATION_SEED)
+        intent_ids = self.testing_data.get_encoded_corpus().get_intent_ids()
+        z_score = float(norm.ppf((1 + self.approximation_confidence) / 2))
+
+        raw_scores = dict()
+        standard_errors = dict()
+        token_states = dict()
+        for token in vocabulary:
+            token_tags = self.testing_data.get_token_postings(token=token)
+            if not token_tags:
+                logger.warning(f"Token `{token}` was not found in the vocabulary. Global feature "
+                               f"importance score was set to 0 by default.")
+                raw_scores[token] = standard_errors[token] = 0.0
+                continue
+
+            strata = dict()
+            for tag in token_tags:
+                strata.setdefault(int(intent_ids[tag]), list()).append(tag)
+            token_states[token] = {
+                'strata': {intent: random_state.permutation(stratum_tags).tolist()
+                           for intent, stratum_tags in strata.items()},
+                'sampled': {intent: 0 for intent in strata},
+                'sample_size': min(self.approximation_sample_size, len(token_tags)),
+                'population_size': len(token_tags),
+                'deltas': list(),
+                'delta_strata': list(),
+            }
+
+        unstable_tokens = list(token_states.keys())
+        while unstable_tokens:
+            for token in unstable_tokens:
+                token_state = token_states[token]
+                self._sample_token_deltas(token=token, token_state=token_state,
+                                          sample_size=token_state['sample_size'])
+                raw_scores[token], standard_errors[token] = estimate_stratified_total(
+                    sample_values=token_state['deltas'],
+                    sample_strata=token_state['delta_strata'],
+                    population_sizes={intent: len(stratum_tags)
+                                      for intent, stratum_tags in token_state['strata'].items()},
+                )
+                logger.debug(f"Estimated the global feature importance score of the token "
+                             f"`{token}` as {raw_scores[token]} ± {z_score * standard_errors[token]} "
+                             f"from {len(token_state['deltas'])} examples")
+
+            if not self.approximation_adaptive:
+                break
+
+            # a sample without variance, e.g. of a single example, does not
+            # bound the score of a token until all its examples are sampled
+            ranking_errors = dict(standard_errors)
+            for token, token_state in token_states.items():
+                if not standard_errors[token] and len(token_state['deltas']) < token_state['population_size']:
+                    ranking_errors[token] = np.inf
+            unstable_tokens = get_unstable_ranks(
+                estimates=raw_scores,
+                standard_errors=ranking_errors,
+                ranking_length=self.ranking_length,
+                z_score=z_score,
+            )
+            # tokens of unstable ranks always have unsampled
+            # examples, since exact scores have no standard error
+            for token in unstable_tokens:
+                token_state = token_states[token]
+                token_state['sample_size'] = min(token_state['sample_size'] * 2, token_state['population_size'])
+            if unstable_tokens:
+                logger.info(f"Sampling {len(unstable_tokens)} tokens with uncertain rankings again")
+
+        gfi_end_time = time.time()
+        gfi_duration = gfi_end_time - gfi_start_time
+        self._log_duration(duration=gfi_duration, title="Approximate global")
+        global_output = self._get_global_output(raw_scores={token: raw_scores[token] for token in vocabulary})
+        global_output["global_standard_errors"] = {
+            token: standard_errors[token] for token in global_output["global_raw_scores"]
+        }
+        return global_output
+
+    def _get_instance_vocabulary(self, instance: Text) -> List:
+        return bag_of_ngrams(
+            instance=instance,
+            min_ngrams=self.min_ngrams,
+            max_ngrams=self.max_ngrams,
+        ) if self.ngrams else bag_of_words(instances=instance)
+
+    def _get_dual_selection(self, instance: Text) -> Tuple[Dict, Dict]:
         # Getting global feature importance for tokens
         # present in the instance
-        instance_vocab = bag_of_words(instances=instance)
-        global_scores = self._global(vocabulary=instance_vocab)
+        global_scores = self._global(vocabulary=self._get_instance_vocabulary(instance=instance))
 
         global_selection = feature_selection(
             global_scores=global_scores["global_scores_clipped"],
@@ -312,25 +889,39 @@ class RasaDIMEExplainer(DIMEExplainer):
                            "importance score of 0. DIME will not "
                            "be able to proceed with dual feature "
                            "importance calculation.")
-            dual_scores = {}
-            dual_normalized_scores = {}
-            dual_probabilities = {}
+        return global_scores, global_selection
+
+    @staticmethod
+    def _dual(
+            selected_features: List[Text],
+            init_instance_output: Dict,
+            token_instance_outputs: PredictionBatch,
+    ) -> Optional[Dict]:
+        dual_feature_importance_scores = dual_feature_importance_batch(
+            init_instance_output=init_instance_output,
+            token_instance_outputs=token_instance_outputs,
+            scorer=Metrics.CONFIDENCE,
+        )
+        instance_dual_feature_importance = dict(zip(selected_features, dual_feature_importance_scores.tolist()))
+        dual_result = dict()
+        dual_result['predicted_intent'] = init_instance_output['predicted_intent']
+        dual_result['predicted_confidence'] = init_instance_output['predicted_confidence']
+        dual_result['dual_importance_scores'] = order_dict(
+            dict_to_order=instance_dual_feature_importance,
+            order_by_key=False,
+            reverse=True
+        )
+        return dual_result
 
+    @staticmethod
+    def _instance_dual(global_scores: Dict, global_selection: Dict, dual_scores: Dict) -> Dict:
+        if dual_scores:
+            dual_scores_clipped = clip_negative_values(vector=dual_scores['dual_importance_scores'])
+            dual_normalized_scores = min_max_normalize(vector=dual_scores_clipped)
+            dual_probabilities = to_probability_series(series=dual_scores['dual_importance_scores'])
         else:
-            # Getting local feature importance for the
-            # selected tokens in the instance
-            dual_scores = self._dual(
-                data_instance=instance,
-                feature_set=global_selection,
-                filter_zeros=filter_zeros
-            )
-            if dual_scores:
-                dual_scores_clipped = clip_negative_values(vector=dual_scores['dual_importance_scores'])
-                dual_normalized_scores = min_max_normalize(vector=dual_scores_clipped)
-                dual_probabilities = to_probability_series(series=dual_scores['dual_importance_scores'])
-            else:
-                dual_normalized_scores = {}
-                dual_probabilities = {}
+            dual_normalized_scores = {}
+            dual_probabilities = {}
 
         output_dict = {
             'global_scores': global_scores["global_scores_clipped"],
@@ -346,87 +937,324 @@ class RasaDIMEExplainer(DIMEExplainer):
         }
         return output_dict
 
-    def explain(self, persist: bool = True, inspect: bool = False) -> Optional[DIMEExplanation]:
-        try:
-            explanation = dict()
-            explanation['timestamp'] = {'start': get_timestamp_str(sep="-"), 'end': 'unknown'}
+    @staticmethod
+    def _get_dual_instance_scores(instance: Text, dual_output: Dict) -> Dict:
+        return {
+            'instance': instance,
+            'global': {
+                'feature_importance': dual_output['global_scores'],
+                'feature_selection': dual_output['global_selection'],
+                'normalized_scores': dual_output['global_normalized_scores'],
+                'probability_scores': dual_output['global_probabilities'],
+                'predicted_intent': dual_output['predicted_intent'],
+                'predicted_confidence': dual_output['predicted_confidence'],
+            },
+            'dual': {
+                'feature_importance': dual_output['dual_scores'],
+                'normalized_scores': dual_output['dual_normalized_scores'],
+                'probability_scores': dual_output['dual_probabilities'],
+            }
+        }
 
-            if self.output_mode == OUTPUT_MODE_GLOBAL:
-                logger.info(f"Calculating global feature importance "
-                            f"for all tokens in the dataset")
+    def _get_dual_batch_scores(self, instances: List[Text], map_chunks: Optional[Callable] = None) -> List[Dict]:
+        """
+        Calculates dual feature importance for a batch of data
+        instances. The features of all instances are selected
+        first, and the instances and their token removed
+        variants are then parsed together, so that the model
+        parses full batches instead of one instance at a time.
+        Results are reassembled per instance in the input order
 
-                testing_vocab = self.testing_data.get_vocabulary()
-                global_scores = self._global(vocabulary=testing_vocab)
+        Args:
+            instances: data instances to be explained
+            map_chunks: optional function that parses chunks
+                of strings on a pool of worker processes
 
-                explanation['global'] = {
-                    'feature_importance': global_scores["global_scores_clipped"],
-                    'normalized_scores': global_scores["global_normalized_scores"],
-                    'probability_scores': global_scores["global_probabilities"],
-                }
+        Returns:
+            list of dual instance scores in the same order as
+                the instances
+        """
+        dfi_start_time = time.time()
+        dual_tasks = list()
+        data_instances = list()
+        for instance in instances:
+            logger.info(f"Calculating dual feature "
+                        f"importance for the instance: `{instance}`")
+            global_scores, global_selection = self._get_dual_selection(instance=instance)
+            # features with a global score of 0 are not perturbed
+            selected_features = [token for token, score in global_selection.items() if score > 0]
+            dual_task = {
+                'instance': instance,
+                'global_scores': global_scores,
+                'global_selection': global_selection,
+                'selected_features': selected_features,
+                'init_position': len(data_instances),
+                'token_positions': list(),
+                'token_outputs': None,
+            }
+            if selected_features:
+                data_instances.append(instance)
+                dual_task['token_outputs'] = self.model.parse_masked(
+                    data_instance=instance,
+                    tokens=selected_features,
+                ) if self.feature_space else None
+                if dual_task['token_outputs'] is None:
+                    dual_task['token_positions'] = list(range(len(data_instances),
+                                                              len(data_instances) + len(selected_features)))
+                    data_instances += [remove_token(instance=instance, token=token) for token in selected_features]
+            dual_tasks.append(dual_task)
 
-            elif self.output_mode == OUTPUT_MODE_DUAL:
-                all_dime_scores = []
-                for instance in self.data_instances:
-                    logger.info(f"Calculating dual feature "
-                                f"importance for the instance: `{instance}`")
-                    instance_scores = {
-                        'instance': instance,
-                        'global': {
-                            'feature_importance': {},
-                            'feature_selection': {},
-                            'normalized_scores': {},
-                            'probability_scores': {},
-                        },
-                        'dual': {
-                            'feature_importance': {},
-                            'normalized_scores': {},
-                            'probability_scores': {},
-                        }
-                    }
+        model_output = self.model.parse_unsupervised_batch(
+            data_instances=data_instances,
+            description="Dual feature importance",
+            map_chunks=map_chunks,
+        ) if data_instances else None
 
-                    # Getting global and dual feature importance scores
-                    # for tokens present in the instance
-                    dual_output = self._instance_dual(instance=instance, filter_zeros=True)
+        dual_instance_scores = list()
+        for dual_task in dual_tasks:
+            dual_scores = dict()
+            if dual_task['selected_features']:
+                token_outputs = dual_task['token_outputs']
+                if token_outputs is None:
+                    token_outputs = model_output.take(positions=dual_task['token_positions'])
+                dual_scores = self._dual(
+                    selected_features=dual_task['selected_features'],
+                    init_instance_output=model_output[dual_task['init_position']],
+                    token_instance_outputs=token_outputs,
+                )
+            dual_instance_scores.append(self._get_dual_instance_scores(
+                instance=dual_task['instance'],
+                dual_output=self._instance_dual(
+                    global_scores=dual_task['global_scores'],
+                    global_selection=dual_task['global_selection'],
+                    dual_scores=dual_scores,
+                ),
+            ))
 
-                    instance_scores['global']['feature_importance'] = dual_output['global_scores']
-                    instance_scores['global']['feature_selection'] = dual_output['global_selection']
-                    instance_scores['global']['normalized_scores'] = dual_output['global_normalized_scores']
-                    instance_scores['global']['probability_scores'] = dual_output['global_probabilities']
-                    instance_scores['global']['predicted_intent'] = dual_output['predicted_intent']
-                    instance_scores['global']['predicted_confidence'] = dual_output['predicted_confidence']
-                    instance_scores['dual']['feature_importance'] = dual_output['dual_scores']
-                    instance_scores['dual']['normalized_scores'] = dual_output['dual_normalized_scores']
-                    instance_scores['dual']['probability_scores'] = dual_output['dual_probabilities']
+        dfi_end_time = time.time()
+        self._log_duration(duration=dfi_end_time - dfi_start_time, title="Dual")
+        return dual_instance_scores
+
+    def _get_dual_executor(self) -> Optional[ProcessPoolExecutor]:
+        # the worker processes load the model once and are
+        # reused by every explanation until the explainer closes
+        if not self._use_global_workers(token_size=len(self.data_instances)):
+            return None
+        if self._dual_executor is None:
+            logger.info(f"Parsing dual feature importance perturbations "
+                        f"using {self.global_workers} worker processes")
+            self._dual_executor = ProcessPoolExecutor(
+                max_workers=self.global_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_parse_worker,
+                initargs=(
+                    self.models_path,
+                    self.model_name,
+                    self.tf_threads,
+                ),
+            )
+        return self._dual_executor
 
-                    all_dime_scores.append(instance_scores)
-                explanation['dual'] = all_dime_scores
+    def _iter_dual_instance_scores(self) -> Iterator[Dict]:
+        """
+        Calculates dual feature importance for all data instances.
+        Global scores of the tokens of all instances are calculated
+        first, in a single global feature importance run. Instances
+        are then explained in batches of `DEFAULT_DUAL_INSTANCE_BATCH_SIZE`,
+        the perturbations of which are parsed on a shared pool of
+        worker processes when global workers are enabled
 
-            explanation['timestamp']['end'] = get_timestamp_str(sep="-")
+        Returns:
+            iterator of dual instance scores in the order
+                of the data instances
+        """
+        vocabulary = get_unique_list([token for instance in self.data_instances
+                                      for token in self._get_instance_vocabulary(instance=instance)])
+        for _ in self._iter_global_scores(vocabulary=vocabulary):
+            pass
+
+        executor = self._get_dual_executor()
+        map_chunks = partial(executor.map, parse_worker_texts) if executor else None
+        for start in range(0, len(self.data_instances), DEFAULT_DUAL_INSTANCE_BATCH_SIZE):
+            yield from self._get_dual_batch_scores(
+                instances=self.data_instances[start:start + DEFAULT_DUAL_INSTANCE_BATCH_SIZE],
+                map_chunks=map_chunks,
+            )
+
+    def _get_endpoint_fingerprint(self) -> Optional[Text]:
+        # the endpoints are verified again, since a
+        # replica could be redeployed during the run
+        try:
+            return self.model.verify_endpoint_fingerprint()
+        except RESTModelLoadException as e:
+            logger.error(f"{e}")
+            return None
 
-            explanation['config'] = {
+    def _get_explanation_metadata(self) -> Dict:
+        prediction_cache_info = self.model.get_prediction_cache_info()
+        logger.info(f"Prediction cache hits: {prediction_cache_info['hits']}, "
+                    f"misses: {prediction_cache_info['misses']}, "
+                    f"size: {prediction_cache_info['size']}/{prediction_cache_info['max_size']}")
+
+        for endpoint_stats in self.model.get_endpoint_stats():
+            logger.info(f"RASA REST endpoint {endpoint_stats['url']}: "
+                        f"requests: {endpoint_stats['requests']}, "
+                        f"failures: {endpoint_stats['failures']}, "
+                        f"mean latency: {endpoint_stats['mean_latency']:.3f}s, "
+                        f"max latency: {endpoint_stats['max_latency']:.3f}s")
+        if self.model.get_hedged_requests():
+            logger.info(f"Hedged RASA REST requests: {self.model.get_hedged_requests()}")
+
+        return {
+            'config': {
                 'case_sensitive': self.case_sensitive,
                 'output_mode': self.output_mode,
                 'ranking_length': self.ranking_length if self.output_mode in [OUTPUT_MODE_DUAL] else "-",
                 'metric': self.metric if self.output_mode in [OUTPUT_MODE_GLOBAL, OUTPUT_MODE_DUAL] else "-",
-                'ngrams': {'min_ngrams': self.min_ngrams, 'max_ngrams': self.max_ngrams} if self.ngrams else "-"
-            }
-            explanation['model'] = {
+                'ngrams': {
+                    'min_ngrams': self.min_ngrams,
+                    'max_ngrams': self.max_ngrams,
+                    'min_ngram_frequency': self.min_ngram_frequency,
+                } if self.ngrams else "-",
+                'approximation': {
+                    'sample_size': self.approximation_sample_size,
+                    'confidence': self.approximation_confidence,
+                    'adaptive': self.approximation_adaptive,
+                } if self.output_mode == OUTPUT_MODE_GLOBAL and self.approximation_sample_size
+                and self.metric == Metrics.CONFIDENCE else "-",
+            },
+            'model': {
                 'name': self.model_name if self.model_mode == MODEL_MODE_LOCAL else "-",
                 'type': self.model_type,
                 'version': self.rasa_version if self.model_mode == MODEL_MODE_LOCAL else "-",
                 'path': self.models_path if self.model_mode == MODEL_MODE_LOCAL else "-",
                 'mode': self.model_mode,
                 'url': self.url if self.model_mode == MODEL_MODE_REST else "-",
-                'fingerprint': (self.model.get_fingerprint() if self.model_mode == MODEL_MODE_LOCAL else "-") or "-",
-            }
-            explanation['data'] = {
+                'fingerprint': (self.model.get_fingerprint() if self.model_mode == MODEL_MODE_LOCAL
+                                else self._get_endpoint_fingerprint()) or "-",
+                'endpoints': self.model.get_endpoint_stats() if self.model_mode == MODEL_MODE_REST else "-",
+            },
+            'data': {
                 'intents': self.testing_data.get_intent_size(),
                 'instances': self.testing_data.get_instance_size(),
                 'tokens': self.testing_data.get_token_size(),
                 'vocabulary': self.testing_data.get_vocabulary_size(),
                 'path': self.testing_data_path,
                 'fingerprint': self.testing_data.get_fingerprint() or "-",
+            },
+        }
+
+    def explain_iter(self) -> Iterator[Dict]:
+        """
+        Streaming variant of `explain`. Yields a `global_score`
+        event for each token in the global output mode and a
+        `dual_instance` event for each data instance in the dual
+        output mode as soon as they are calculated, followed by an
+        `end` event that carries the timestamps and the explanation
+        config, model and data metadata. Global scores are not
+        normalized since normalization requires all scores. Dual
+        instances are calculated, and yielded, in batches.
+        Incremental and approximated global scores depend on all
+        examples, and are only yielded once all of them are
+        calculated. Raw global scores are still kept in the score
+        table of the explainer, which checkpoints and dual mode
+        reuse, so streaming does not lower the memory of a run
+
+        Returns:
+            iterator of explanation events as dictionaries
+        """
+        try:
+            timestamp = {'start': get_timestamp_str(sep="-"), 'end': 'unknown'}
+
+            if self.output_mode == OUTPUT_MODE_GLOBAL:
+                logger.info(f"Calculating global feature importance "
+                            f"for all tokens in the dataset")
+
+                testing_vocab = self.testing_data.get_ngram_vocabulary()
+                if self._use_approximation():
+                    global_scores = self._global_approximate(vocabulary=testing_vocab)
+                    for token, score in global_scores["global_raw_scores"].items():
+                        yield {
+                            'event': EXPLANATION_EVENT_GLOBAL_SCORE,
+                            'token': token,
+                            'score': score,
+                            'standard_error': global_scores["global_standard_errors"][token],
+                        }
+                else:
+                    if self._use_incremental():
+                        token_scores = self._global_incremental(vocabulary=testing_vocab)["global_raw_scores"].items()
+                    else:
+                        token_scores = self._iter_global_scores(vocabulary=testing_vocab)
+
+                    for token, score in token_scores:
+                        yield {'event': EXPLANATION_EVENT_GLOBAL_SCORE, 'token': token, 'score': score}
+
+            elif self.output_mode == OUTPUT_MODE_DUAL:
+                for dual_instance_scores in self._iter_dual_instance_scores():
+                    yield {
+                        'event': EXPLANATION_EVENT_DUAL_INSTANCE,
+                        **dual_instance_scores,
+                    }
+
+            timestamp['end'] = get_timestamp_str(sep="-")
+            yield {
+                'event': EXPLANATION_EVENT_END,
+                'timestamp': timestamp,
+                **self._get_explanation_metadata(),
             }
+        except Exception as e:
+            raise RasaExplainerException(e)
+
+    def close(self) -> NoReturn:
+        """
+        Shuts down the parsing worker processes and releases the
+        connections and threads of the model. Called when the
+        explainer is used as a context manager
+
+        Returns:
+            no return
+        """
+        if self._dual_executor is not None:
+            self._dual_executor.shutdown()
+            self._dual_executor = None
+        self.model.close()
+
+    def __enter__(self) -> "RasaDIMEExplainer":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> NoReturn:
+        self.close()
+
+    def explain(self, persist: bool = True, inspect: bool = False) -> Optional[DIMEExplanation]:
+        try:
+            explanation = dict()
+            explanation['timestamp'] = {'start': get_timestamp_str(sep="-"), 'end': 'unknown'}
+
+            if self.output_mode == OUTPUT_MODE_GLOBAL:
+                logger.info(f"Calculating global feature importance "
+                            f"for all tokens in the dataset")
+
+                testing_vocab = self.testing_data.get_ngram_vocabulary()
+                if self._use_approximation():
+                    global_scores = self._global_approximate(vocabulary=testing_vocab)
+                elif self._use_incremental():
+                    global_scores = self._global_incremental(vocabulary=testing_vocab)
+                else:
+                    global_scores = self._global(vocabulary=testing_vocab)
+
+                explanation['global'] = {
+                    'feature_importance': global_scores["global_scores_clipped"],
+                    'normalized_scores': global_scores["global_normalized_scores"],
+                    'probability_scores': global_scores["global_probabilities"],
+                }
+                if "global_standard_errors" in global_scores:
+                    explanation['global']['standard_errors'] = global_scores["global_standard_errors"]
+
+            elif self.output_mode == OUTPUT_MODE_DUAL:
+                explanation['dual'] = list(self._iter_dual_instance_scores())
+
+            explanation['timestamp']['end'] = get_timestamp_str(sep="-")
+            explanation.update(self._get_explanation_metadata())
             explanation['filename'] = ""
 
             dime_explanation = DIMEExplanation(explanation=explanation)
@@ -147,6 +147,27 @@ def create_argument_parser():
         action="store_true",
         help="sets the logging level to off.",
     )
+    parser_explainer.add_argument(
+        "--incremental",
+        action="store_true",
+        help="updates global feature importance scores of the previous run "
+             "by only parsing added or changed examples. requires the "
+             "confidence metric and an unchanged model.",
+    )
+    parser_explainer.add_argument(
+        "--resume",
+        action="store_true",
+        help="resumes an interrupted global feature importance run by "
+             "skipping tokens checkpointed in the DIME cache.",
+    )
+    parser_explainer.add_argument(
+        "--stream",
+        action="store_true",
+        help="appends global token scores and dual instance results to a "
+             "JSON Lines file in dime_explanations as they are calculated, "
+             "instead of persisting the explanation once the run ends. "
+             "ignored in quiet mode.",
+    )
 
     parser_visualizer = subparsers.add_parser(
         name="visualize",
@@ -301,6 +322,9 @@ def run_dime_cli() -> NoReturn:
             debug_mode = cmdline_args.debug
             quiet_mode = cmdline_args.quiet
             request_id = cmdline_args.request_id
+            incremental = cmdline_args.incremental
+            resume = cmdline_args.resume
+            stream = cmdline_args.stream
 
             if debug_mode:
                 _set_logging_level(level=LoggingLevel.DEBUG)
@@ -332,6 +356,9 @@ def run_dime_cli() -> NoReturn:
                 configs=configs,
                 quiet_mode=True if quiet_mode else False,
                 request_id=request_id if quiet_mode else None,
+                incremental=incremental,
+                resume=resume,
+                stream=stream,
             )
             dime_cli_explainer.run()
 
@@ -1,7 +1,6 @@
 import logging
 import os
 import platform
-import signal
 import subprocess
 from datetime import datetime
 
@@ -30,6 +29,7 @@ from dime_xai.shared.constants import (
     PROCESS_ID_NONE,
     ServerConfigType,
     PROCESS_QUEUE,
+    DIMEConfig,
 )
 from dime_xai.shared.exceptions.dime_server_exceptions import (
     InvalidProcessIDException,
@@ -42,6 +42,7 @@ from dime_xai.shared.exceptions.dime_server_exceptions import (
     InvalidExplanationSpecifiedException,
 )
 from dime_xai.utils import process_queue
+from dime_xai.utils.config import get_performance_configs
 from dime_xai.utils.io import file_exists
 from dime_xai.utils.process_queue import kill_process_tree
 
@@ -80,6 +81,10 @@ def explain():
 
         if app_env == ServerEnv.STRICT_LOCAL:
             if model_type == MODEL_TYPE_DIET:
+                # performance configs are optional in requests
+                performance_configs = get_performance_configs(
+                    performance_configs=request_data.get(DIMEConfig.MAIN_KEY_PERFORMANCE)
+                )
                 rasa_dime_explainer = RasaDIMEExplainer(
                     models_path=request_data['models_path'],
                     model_name=request_data['model_name'],
@@ -92,8 +97,25 @@ def explain():
                     case_sensitive=request_data['case_sensitive'],
                     metric=request_data['metric'],
                     output_mode=output_mode,
+                    global_workers=performance_configs[DIMEConfig.SUB_KEY_PERFORMANCE_GLOBAL_WORKERS],
+                    tf_threads=performance_configs[DIMEConfig.SUB_KEY_PERFORMANCE_TF_THREADS],
+                    checkpoint_interval=performance_configs[DIMEConfig.SUB_KEY_PERFORMANCE_CHECKPOINT_INTERVAL],
+                    approximation_sample_size=performance_configs[
+                        DIMEConfig.SUB_KEY_PERFORMANCE_APPROXIMATION_SAMPLE_SIZE],
+                    approximation_confidence=performance_configs[
+                        DIMEConfig.SUB_KEY_PERFORMANCE_APPROXIMATION_CONFIDENCE],
+                    approximation_adaptive=performance_configs[
+                        DIMEConfig.SUB_KEY_PERFORMANCE_APPROXIMATION_ADAPTIVE],
+                    feature_space=performance_configs[DIMEConfig.SUB_KEY_PERFORMANCE_FEATURE_SPACE],
+                    rest_concurrency=performance_configs[DIMEConfig.SUB_KEY_PERFORMANCE_REST_CONCURRENCY],
+                    rest_retries=performance_configs[DIMEConfig.SUB_KEY_PERFORMANCE_REST_RETRIES],
+                    rest_backoff=performance_configs[DIMEConfig.SUB_KEY_PERFORMANCE_REST_BACKOFF],
+                    rest_ejection_time=performance_configs[DIMEConfig.SUB_KEY_PERFORMANCE_REST_EJECTION_TIME],
+                    rest_timeout=performance_configs[DIMEConfig.SUB_KEY_PERFORMANCE_REST_TIMEOUT],
+                    rest_hedging=performance_configs[DIMEConfig.SUB_KEY_PERFORMANCE_REST_HEDGING],
                 )
-                explanation_ = rasa_dime_explainer.explain(inspect=True)
+                with rasa_dime_explainer:
+                    explanation_ = rasa_dime_explainer.explain(inspect=True)
                 return {"status": "success", "explanation": explanation_.get_explanation(ExplanationType.QUIET)}, 200
             elif model_type == MODEL_TYPE_OTHER:
                 return {"status": "error", "cause": "Non-DIET models are not supported yet"}, 200
@@ -211,10 +233,7 @@ def abort():
         process_id = process_q.get_pid(request_id=request_id)
         logger.debug(f"Confirmed the existence of the process {process_id} with the request id: {request_id}")
 
-        if platform.system() == "Windows":
-            kill_process_tree(int(process_id))
-        else:
-            os.killpg(os.getpgid(int(process_id)), signal.SIGTERM)
+        kill_process_tree(int(process_id))
         logger.debug(f"Removed the existing process {process_id} with the request id: {request_id}")
 
         # updating the process queue
@@ -22,6 +22,7 @@ class FilePermission:
     READ = "r"
     WRITE = "w"
     OVERWRITE = "w+"
+    APPEND = "a"
 
 
 class Encoding:
@@ -43,6 +44,16 @@ DEFAULT_CACHE_PATH = "./dime_cache"
 DEFAULT_SERVER_CACHE = "server_cache.json"
 SERVER_CACHE = "dime_server_cache.db"
 SERVER_CACHE_TABLE = "server_cache"
+EXPLANATION_CACHE = "dime_explanation_cache.db"
+INIT_OUTPUT_CACHE_TABLE = "init_outputs"
+PREDICTION_CACHE_TABLE = "predictions"
+# appended to the model fingerprint of predictions
+# of examples perturbed in the feature space
+FEATURE_SPACE_FINGERPRINT_SUFFIX = ":feature_space"
+GLOBAL_SCORE_CACHE_TABLE = "global_scores"
+INCREMENTAL_EXAMPLE_TABLE = "incremental_examples"
+INCREMENTAL_CONTRIBUTION_TABLE = "incremental_contributions"
+INCREMENTAL_SCORE_TABLE = "incremental_scores"
 
 # fingerprinting
 DEFAULT_FINGERPRINT_FILE = "dime_fingerprint.json"
@@ -56,6 +67,7 @@ DEFAULT_DATA_FINGERPRINT_PERSIST_PATH = os.path.join(DEFAULT_CACHE_PATH, DEFAULT
 DEFAULT_PERSIST_PATH = "./dime_explanations"
 DEFAULT_PERSIST_FILE = "dime_results"
 DEFAULT_PERSIST_EXTENSION = ".json"
+DEFAULT_STREAM_EXTENSION = ".jsonl"
 EXPLANATION_FILE_REGEX = r"^dime_results_(\d{8})\_(\d{6}).json$"
 
 DEFAULT_MODELS_PATH = "./models"
@@ -85,6 +97,29 @@ RASA_REST_WEBHOOK = "/webhooks/rest/webhook"
 RASA_CORE_URL = "http://localhost:5005"
 MODEL_REST_WEBHOOK_URL = "http://localhost:5005/webhooks/rest/webhook"
 RASA_REST_ENDPOINT_PARSE = "/model/parse"
+RASA_REST_ENDPOINT_STATUS = "/status"
+DEFAULT_PARSE_BATCH_SIZE = 64
+DEFAULT_DUAL_INSTANCE_BATCH_SIZE = 100
+DEFAULT_PREDICTION_CACHE_SIZE = 100000
+DEFAULT_GLOBAL_WORKERS = 0
+GLOBAL_WORKER_PENDING_TASKS = 4
+DEFAULT_TF_THREADS = 0
+DEFAULT_CHECKPOINT_INTERVAL = 50
+DEFAULT_APPROXIMATION_SAMPLE_SIZE = 0
+DEFAULT_APPROXIMATION_CONFIDENCE = 0.95
+DEFAULT_APPROXIMATION_ADAPTIVE = False
+DEFAULT_APPROXIMATION_SEED = 0
+DEFAULT_FEATURE_SPACE_MODE = False
+DEFAULT_REST_CONCURRENCY = 8
+DEFAULT_REST_RETRIES = 3
+DEFAULT_REST_BACKOFF = 0.5
+DEFAULT_REST_EJECTION_TIME = 30.0
+DEFAULT_REST_TIMEOUT = 30.0
+DEFAULT_REST_HEDGING = False
+REST_HEDGING_QUANTILE = 0.95
+REST_HEDGING_MIN_SAMPLES = 20
+REST_LATENCY_WINDOW = 1000
+REST_RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
 OUTPUT_MODE_DUAL = "dual"
 OUTPUT_MODE_GLOBAL = "global"
 DEFAULT_OUTPUT_MODE = OUTPUT_MODE_DUAL
@@ -93,6 +128,9 @@ MAX_RANKING_LENGTH = 10
 DEFAULT_NGRAMS_MODE = False
 DEFAULT_MIN_NGRAMS = 1
 DEFAULT_MAX_NGRAMS = 2
+MAX_NGRAMS = 3
+DEFAULT_MIN_NGRAM_FREQUENCY = 2
+TOKEN_SPAN_CACHE_SIZE = 65536
 DEFAULT_CASE_SENSITIVE_MODE = True
 DEFAULT_DATAFRAME_MODE = False
 DEFAULT_METRIC = "confidence"
@@ -115,21 +153,28 @@ RASA_DIRS_IN_DIME_INIT = ["data", "models"]
 # dime explanations
 DEFAULT_DIME_EXPLANATION_BASE_KEYS = ['global', 'dual', 'config', 'timestamp', 'data', 'model', 'filename']
 DEFAULT_DIME_EXPLANATION_TIMESTAMP_KEYS = ['start', 'end']
-DEFAULT_DIME_EXPLANATION_MODEL_KEYS = ['fingerprint', 'name', 'version', 'type', 'path', 'mode', 'url']
+DEFAULT_DIME_EXPLANATION_MODEL_KEYS = ['fingerprint', 'name', 'version', 'type', 'path', 'mode', 'url', 'endpoints']
 DEFAULT_DIME_EXPLANATION_DATA_KEYS = ['fingerprint', 'tokens', 'vocabulary', 'instances', 'intents', 'path']
-DEFAULT_DIME_EXPLANATION_CONFIG_KEYS = ['case_sensitive', 'output_mode', 'ranking_length', 'metric', 'ngrams']
-DEFAULT_DIME_EXPLANATION_NGRAMS_KEYS = ['min_ngrams', 'max_ngrams']
-DEFAULT_DIME_EXPLANATION_GLOBAL_KEYS = ['feature_importance', 'normalized_scores', 'probability_scores']
+DEFAULT_DIME_EXPLANATION_CONFIG_KEYS = ['case_sensitive', 'output_mode', 'ranking_length', 'metric', 'ngrams',
+                                        'approximation']
+DEFAULT_DIME_EXPLANATION_APPROXIMATION_KEYS = ['sample_size', 'confidence', 'adaptive']
+DEFAULT_DIME_EXPLANATION_NGRAMS_KEYS = ['min_ngrams', 'max_ngrams', 'min_ngram_frequency']
+DEFAULT_DIME_EXPLANATION_GLOBAL_KEYS = ['feature_importance', 'normalized_scores', 'probability_scores',
+                                        'standard_errors']
 DEFAULT_DIME_EXPLANATION_DUAL_KEYS = ['instance', 'global', 'dual']
 DEFAULT_DIME_EXPLANATION_DUAL_SUB_GLOBAL = ['feature_importance', 'feature_selection', 'normalized_scores',
                                             'probability_scores', 'predicted_intent', 'predicted_confidence']
 DEFAULT_DIME_EXPLANATION_DUAL_SUB_DUAL = ['feature_importance', 'normalized_scores', 'probability_scores']
 DEFAULT_VISUALIZATIONS_LIMIT = 10
+EXPLANATION_EVENT_GLOBAL_SCORE = "global_score"
+EXPLANATION_EVENT_DUAL_INSTANCE = "dual_instance"
+EXPLANATION_EVENT_END = "end"
 
 # server process queue
 PROCESS_ID_NONE = -99
 PROCESS_QUEUE = os.path.join(DEFAULT_CACHE_PATH, "process_queue.db")
 PROCESS_QUEUE_TABLE = "process_queue"
+PROCESS_TERMINATION_GRACE_PERIOD = 10
 
 
 # server env
@@ -245,20 +290,35 @@ class DIMEConfig:
     MAIN_KEY_BASE = 'dime_base_configs'
     MAIN_KEY_SERVER = 'dime_server_configs'
     MAIN_KEY_CLI = 'dime_cli_configs'
+    MAIN_KEY_PERFORMANCE = 'dime_performance_configs'
+
+    # sub keys of optional main keys can be partially
+    # specified, and the missing ones take default values
+    OPTIONAL_MAIN_KEYS = ['dime_performance_configs']
 
     MAIN_CONFIG_KEYS = {'dime_base_configs': ['languages', 'data_path', 'models_path', 'model_type', 'model_mode',
                                               'url_endpoint', 'data_instance', 'ranking_length',
                                               'ngrams', 'case_sensitive', 'metric'],
                         'dime_server_configs': ['host', 'port', 'output_mode'],
-                        'dime_cli_configs': ['output_mode']}
+                        'dime_cli_configs': ['output_mode'],
+                        'dime_performance_configs': ['global_workers', 'tf_threads', 'checkpoint_interval',
+                                                     'approximation_sample_size', 'approximation_confidence',
+                                                     'approximation_adaptive', 'feature_space',
+                                                     'rest_concurrency', 'rest_retries', 'rest_backoff',
+                                                     'rest_ejection_time', 'rest_timeout', 'rest_hedging']}
 
     ALL_KEYS = ['dime_base_configs', 'data_path', 'models_path', 'model_type', 'model_mode',
                 'url_endpoint', 'data_instance', 'ranking_length', 'ngrams', 'case_sensitive',
-                'metric', 'dime_server_configs', 'host', 'port', 'dime_cli_configs', 'output_mode']
+                'metric', 'dime_server_configs', 'host', 'port', 'dime_cli_configs', 'output_mode',
+                'dime_performance_configs', 'global_workers', 'tf_threads', 'checkpoint_interval',
+                'approximation_sample_size', 'approximation_confidence', 'approximation_adaptive',
+                'feature_space', 'rest_concurrency', 'rest_retries', 'rest_backoff', 'rest_ejection_time',
+                'rest_timeout', 'rest_hedging']
 
     BASE_CONFIG_PROPS = {'ngrams': ['max_ngrams', 'min_ngrams'],
                          'models_path': ['model_name'],
                          'model_type': ['rasa_version']}
+    OPTIONAL_BASE_CONFIG_PROPS = {'ngrams': ['min_ngram_frequency']}
 
     SERVER_CONFIG_PROPS = {}
     CLI_CONFIG_PROPS = {}
@@ -276,12 +336,40 @@ class DIMEConfig:
     SUB_KEY_BASE_NGRAMS = "ngrams"
     SUB_KEY_BASE_NGRAMS_MAX = "max_ngrams"
     SUB_KEY_BASE_NGRAMS_MIN = "min_ngrams"
+    SUB_KEY_BASE_NGRAMS_MIN_FREQUENCY = "min_ngram_frequency"
     SUB_KEY_BASE_CASE_SENSITIVITY = "case_sensitive"
     SUB_KEY_BASE_METRIC = "metric"
     SUB_KEY_SERVER_HOST = 'host'
     SUB_KEY_SERVER_PORT = 'port'
     SUB_KEY_CLI_OUTPUT_MODE = 'output_mode'
     SUB_KEY_CLI_EXPLANATION_FILE = 'explanation_file'
+    SUB_KEY_PERFORMANCE_GLOBAL_WORKERS = 'global_workers'
+    SUB_KEY_PERFORMANCE_TF_THREADS = 'tf_threads'
+    SUB_KEY_PERFORMANCE_CHECKPOINT_INTERVAL = 'checkpoint_interval'
+    SUB_KEY_PERFORMANCE_APPROXIMATION_SAMPLE_SIZE = 'approximation_sample_size'
+    SUB_KEY_PERFORMANCE_APPROXIMATION_CONFIDENCE = 'approximation_confidence'
+    SUB_KEY_PERFORMANCE_APPROXIMATION_ADAPTIVE = 'approximation_adaptive'
+    SUB_KEY_PERFORMANCE_FEATURE_SPACE = 'feature_space'
+    SUB_KEY_PERFORMANCE_REST_CONCURRENCY = 'rest_concurrency'
+    SUB_KEY_PERFORMANCE_REST_RETRIES = 'rest_retries'
+    SUB_KEY_PERFORMANCE_REST_BACKOFF = 'rest_backoff'
+    SUB_KEY_PERFORMANCE_REST_EJECTION_TIME = 'rest_ejection_time'
+    SUB_KEY_PERFORMANCE_REST_TIMEOUT = 'rest_timeout'
+    SUB_KEY_PERFORMANCE_REST_HEDGING = 'rest_hedging'
+
+    PERFORMANCE_CONFIG_DEFAULTS = {'global_workers': DEFAULT_GLOBAL_WORKERS,
+                                   'tf_threads': DEFAULT_TF_THREADS,
+                                   'checkpoint_interval': DEFAULT_CHECKPOINT_INTERVAL,
+                                   'approximation_sample_size': DEFAULT_APPROXIMATION_SAMPLE_SIZE,
+                                   'approximation_confidence': DEFAULT_APPROXIMATION_CONFIDENCE,
+                                   'approximation_adaptive': DEFAULT_APPROXIMATION_ADAPTIVE,
+                                   'feature_space': DEFAULT_FEATURE_SPACE_MODE,
+                                   'rest_concurrency': DEFAULT_REST_CONCURRENCY,
+                                   'rest_retries': DEFAULT_REST_RETRIES,
+                                   'rest_backoff': DEFAULT_REST_BACKOFF,
+                                   'rest_ejection_time': DEFAULT_REST_EJECTION_TIME,
+                                   'rest_timeout': DEFAULT_REST_TIMEOUT,
+                                   'rest_hedging': DEFAULT_REST_HEDGING}
 
     @staticmethod
     def verify_config_key(key_name: Text) -> Optional[bool]:
@@ -315,6 +403,10 @@ class DIMEConfig:
     def get_cli_keys_length() -> Optional[int]:
         return len(DIMEConfig.MAIN_CONFIG_KEYS[DIMEConfig.MAIN_KEY_CLI])
 
+    @staticmethod
+    def verify_performance_config_key(key_name: Text) -> Optional[bool]:
+        return key_name in DIMEConfig.MAIN_CONFIG_KEYS[DIMEConfig.MAIN_KEY_PERFORMANCE]
+
 
 class Metrics:
     F1_SCORE = 'f1-score'
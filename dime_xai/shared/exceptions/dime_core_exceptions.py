@@ -83,3 +83,7 @@ class DatasetParseException(DIMECoreException):
 
 class RasaExplainerException(DIMECoreException):
     pass
+
+
+class DIMECacheException(DIMECoreException):
+    pass
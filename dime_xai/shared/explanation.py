@@ -1,7 +1,7 @@
 import json
 import logging
 import os
-from typing import Dict, Union, Text, Optional, NoReturn, List
+from typing import Dict, Union, Text, Optional, NoReturn, List, Iterable, Iterator
 
 from termgraph import termgraph as tg
 
@@ -9,12 +9,14 @@ from dime_xai.shared.constants import (
     DEFAULT_PERSIST_PATH,
     DEFAULT_PERSIST_FILE,
     DEFAULT_PERSIST_EXTENSION,
+    DEFAULT_STREAM_EXTENSION,
     DEFAULT_DIME_EXPLANATION_BASE_KEYS,
     DEFAULT_DIME_EXPLANATION_DATA_KEYS,
     DEFAULT_DIME_EXPLANATION_MODEL_KEYS,
     DEFAULT_DIME_EXPLANATION_TIMESTAMP_KEYS,
     DEFAULT_DIME_EXPLANATION_CONFIG_KEYS,
     DEFAULT_DIME_EXPLANATION_NGRAMS_KEYS,
+    DEFAULT_DIME_EXPLANATION_APPROXIMATION_KEYS,
     OUTPUT_MODE_GLOBAL,
     OUTPUT_MODE_DUAL,
     DEFAULT_DIME_EXPLANATION_GLOBAL_KEYS,
@@ -42,6 +44,19 @@ from dime_xai.utils.io import (
 logger = logging.getLogger(__name__)
 
 
+def _create_persist_dir() -> NoReturn:
+    if not dir_exists(DEFAULT_PERSIST_PATH):
+        logger.warning("The default explanation directory does not exist. "
+                       "A new directory will be created to persist the "
+                       "DIME explanations.")
+        try:
+            os.mkdir(DEFAULT_PERSIST_PATH)
+        except OSError:
+            raise DIMEExplanationDirectoryException(f"Error occurred while attempting "
+                                                    f"to create the explanations "
+                                                    f"directory")
+
+
 class DIMEExplanation:
     def __init__(self, explanation: Union[Dict, Text]):
         if isinstance(explanation, Text):
@@ -75,16 +90,7 @@ class DIMEExplanation:
             name: Text = None,
             overwrite: bool = False
     ) -> Optional[Text]:
-        if not dir_exists(DEFAULT_PERSIST_PATH):
-            logger.warning("The default explanation directory does not exist. "
-                           "A new directory will be created to persist the "
-                           "DIME explanations.")
-            try:
-                os.mkdir(DEFAULT_PERSIST_PATH)
-            except OSError:
-                raise DIMEExplanationDirectoryException(f"Error occurred while attempting "
-                                                        f"to create the explanations "
-                                                        f"directory")
+        _create_persist_dir()
 
         if not name:
             name = self.file_name
@@ -145,11 +151,17 @@ class DIMEExplanation:
                 return False
 
         if isinstance(self.explanation['config']['ngrams'], Dict):
-            for key in list(self.explanation['ngrams'].keys()):
+            for key in list(self.explanation['config']['ngrams'].keys()):
                 if key not in DEFAULT_DIME_EXPLANATION_NGRAMS_KEYS:
                     logger.error(f"Invalid key '{key}' found under DIME explanation's 'ngrams' key")
                     return False
 
+        if isinstance(self.explanation['config'].get('approximation'), Dict):
+            for key in list(self.explanation['config']['approximation'].keys()):
+                if key not in DEFAULT_DIME_EXPLANATION_APPROXIMATION_KEYS:
+                    logger.error(f"Invalid key '{key}' found under DIME explanation's 'approximation' key")
+                    return False
+
         if self.explanation['config']['output_mode'] == OUTPUT_MODE_GLOBAL:
             for key in self.explanation['global']:
                 if key not in DEFAULT_DIME_EXPLANATION_GLOBAL_KEYS:
@@ -335,3 +347,66 @@ class DIMEExplanation:
             return decoded_json
         else:
             return None
+
+
+class DIMEExplanationStream:
+    """
+    Appends streamed DIME explanation events to a JSON Lines
+    file in the dime_explanations directory while an explanation
+    is being calculated. Each event is flushed as soon as it is
+    written, so that partial results are available during the run
+    """
+    def __init__(self, name: Text = None):
+        self.file_name = name or DEFAULT_PERSIST_FILE + "_" + \
+                         get_timestamp_str(sep="_") + \
+                         DEFAULT_STREAM_EXTENSION
+        self.full_file_path = os.path.join(DEFAULT_PERSIST_PATH, self.file_name)
+        self._file = None
+
+    def open(self) -> NoReturn:
+        _create_persist_dir()
+        try:
+            self._file = open(self.full_file_path, encoding=Encoding.UTF8, mode=FilePermission.APPEND)
+        except Exception as e:
+            raise DIMEExplanationFilePersistException(f"Failed to open the DIME explanation "
+                                                      f"stream: {self.full_file_path}. {e}")
+
+    def write(self, event: Dict) -> NoReturn:
+        if self._file is None:
+            self.open()
+        try:
+            self._file.write(json.dumps(event, ensure_ascii=False) + "\n")
+            self._file.flush()
+        except Exception as e:
+            raise DIMEExplanationFilePersistException(f"Failed to append a DIME explanation "
+                                                      f"event to {self.full_file_path}. {e}")
+
+    def write_all(self, events: Iterable[Dict]) -> Iterator[Dict]:
+        """
+        Appends each event to the stream and passes it
+        through, so that the events can be consumed while
+        they are being persisted
+
+        Args:
+            events: iterable of explanation events
+
+        Returns:
+            iterator of the same explanation events
+        """
+        for event in events:
+            self.write(event=event)
+            yield event
+
+    def close(self) -> NoReturn:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            logger.info(f"DIME explanation events were persisted in dime_explanations "
+                        f"directory under {self.file_name}")
+
+    def __enter__(self) -> "DIMEExplanationStream":
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> NoReturn:
+        self.close()
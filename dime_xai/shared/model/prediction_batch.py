@@ -0,0 +1,311 @@
+import logging
+from typing import Dict, List, Optional, Text, Iterator
+
+import numpy as np
+
+from dime_xai.shared.constants import NLU_FALLBACK_TAG
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionBatch:
+    """
+    Compact model output of a batch of parsed instances. The
+    confidences of all intents are stored in a float64 matrix
+    of instances and intents, the columns of which are given
+    by an intent to column dictionary shared by all batches of
+    a model. Intents that are not in the intent ranking of an
+    instance are NaN. Predicted intents, and the labeled intents
+    of supervised instances, are stored as arrays of column ids.
+    Instances are still accessible as the output dictionaries of
+    the model, which are only built on access
+    """
+
+    def __init__(
+            self,
+            intent_index: Dict[Text, int],
+            examples: List[Text],
+            predicted_ids: np.ndarray,
+            predicted_confidence: np.ndarray,
+            confidences: np.ndarray,
+            tags: Optional[np.ndarray] = None,
+            intent_ids: Optional[np.ndarray] = None,
+    ):
+        self.intent_index = intent_index
+        self.examples = examples
+        self.predicted_ids = predicted_ids
+        self.predicted_confidence = predicted_confidence
+        self.confidences = confidences
+        self.tags = tags
+        self.intent_ids = intent_ids
+        self._intent_names = list()
+
+    @classmethod
+    def from_responses(
+            cls,
+            intent_index: Dict[Text, int],
+            examples: List[Text],
+            responses: List[Dict],
+            tags: Optional[List[int]] = None,
+            intents: Optional[List[Text]] = None,
+    ) -> "PredictionBatch":
+        """
+        Builds a prediction batch from the parsed outputs of a
+        RASA model. Intents that are not in the intent to column
+        dictionary yet are added to it
+
+        Args:
+            intent_index: intent to column dictionary of the model
+            examples: parsed strings
+            responses: parsed outputs of the strings, as returned
+                by `Interpreter.parse` or the RASA HTTP API
+            tags: tags of the instances of a tagged dataset
+            intents: labeled intents of a supervised dataset
+
+        Returns:
+            prediction batch of the instances in the same order
+        """
+        predicted_intents = [response['intent']['name'] or NLU_FALLBACK_TAG for response in responses]
+        rankings = [response.get('intent_ranking') or [] for response in responses]
+        for intent in predicted_intents + (list(intents) if intents is not None else []):
+            intent_index.setdefault(intent, len(intent_index))
+
+        rows = list()
+        columns = list()
+        values = list()
+        for row, ranking in enumerate(rankings):
+            for ranked_intent in ranking:
+                rows.append(row)
+                columns.append(intent_index.setdefault(ranked_intent['name'], len(intent_index)))
+                values.append(ranked_intent['confidence'])
+
+        confidences = np.full((len(responses), len(intent_index)), np.nan, dtype=np.float64)
+        confidences[rows, columns] = values
+        return cls(
+            intent_index=intent_index,
+            examples=list(examples),
+            predicted_ids=np.array([intent_index[intent] for intent in predicted_intents], dtype=np.int32),
+            predicted_confidence=np.array([response['intent']['confidence'] or 0.0 for response in responses],
+                                          dtype=np.float64),
+            confidences=confidences,
+            tags=np.array(tags, dtype=np.int64) if tags is not None else None,
+            intent_ids=np.array([intent_index[intent] for intent in intents], dtype=np.int32)
+            if intents is not None else None,
+        )
+
+    @classmethod
+    def from_records(cls, intent_index: Dict[Text, int], records: List[Dict]) -> "PredictionBatch":
+        """
+        Builds a prediction batch from model output dictionaries,
+        e.g. the initial model output loaded from the DIME cache
+
+        Args:
+            intent_index: intent to column dictionary of the model
+            records: model output dictionaries as returned by `to_records`
+
+        Returns:
+            prediction batch of the records in the same order
+        """
+        return cls.from_responses(
+            intent_index=intent_index,
+            examples=[record['example'] for record in records],
+            responses=[{
+                'intent': {'name': record['predicted_intent'], 'confidence': record['predicted_confidence']},
+                'intent_ranking': record.get('intent_ranking', []),
+            } for record in records],
+            tags=[record['tag'] for record in records]
+            if records and all('tag' in record for record in records) else None,
+            intents=[record['intent'] for record in records]
+            if records and all('intent' in record for record in records) else None,
+        )
+
+    def __len__(self) -> int:
+        return len(self.examples)
+
+    def __iter__(self) -> Iterator[Dict]:
+        for index in range(len(self.examples)):
+            yield self.get_record(index=index)
+
+    def __getitem__(self, index: int) -> Dict:
+        return self.get_record(index=index)
+
+    def get_intent_names(self) -> List[Text]:
+        if len(self._intent_names) != len(self.intent_index):
+            self._intent_names = [None] * len(self.intent_index)
+            for intent, column in self.intent_index.items():
+                self._intent_names[column] = intent
+        return self._intent_names
+
+    def get_predicted_intents(self) -> List[Text]:
+        intent_names = self.get_intent_names()
+        return [intent_names[column] for column in self.predicted_ids.tolist()]
+
+    def get_intents(self) -> Optional[List[Text]]:
+        if self.intent_ids is None:
+            return None
+        intent_names = self.get_intent_names()
+        return [intent_names[column] for column in self.intent_ids.tolist()]
+
+    def get_confidences(self, width: Optional[int] = None) -> np.ndarray:
+        """
+        Returns the confidence matrix, padded with NaN columns
+        for the intents added to the intent to column dictionary
+        after the batch was built
+
+        Args:
+            width: number of columns. Defaults to the number of
+                intents in the intent to column dictionary
+
+        Returns:
+            confidence matrix of instances and intents
+        """
+        width = len(self.intent_index) if width is None else width
+        if self.confidences.shape[1] >= width:
+            return self.confidences
+        padding = np.full((self.confidences.shape[0], width - self.confidences.shape[1]), np.nan, dtype=np.float64)
+        return np.hstack([self.confidences, padding])
+
+    def get_column(self, column: int) -> np.ndarray:
+        """
+        Returns the confidences of a single intent across the
+        instances. NaN marks instances that do not rank the intent
+
+        Args:
+            column: column id of the intent
+
+        Returns:
+            float64 array of confidences
+        """
+        if column < 0 or column >= self.confidences.shape[1]:
+            return np.full(len(self.examples), np.nan, dtype=np.float64)
+        return self.confidences[:, column]
+
+    def get_intent_confidence(self) -> np.ndarray:
+        """
+        Returns the confidence of the labeled intent of each
+        instance. Labeled intents that are not ranked have a
+        confidence of 0
+
+        Returns:
+            float64 array of confidences
+        """
+        if self.intent_ids is None:
+            return np.zeros(len(self.examples), dtype=np.float64)
+        confidences = self.get_confidences(width=int(self.intent_ids.max(initial=-1)) + 1)
+        return np.nan_to_num(confidences[np.arange(len(self.examples)), self.intent_ids], nan=0.0)
+
+    def has_ranking(self) -> np.ndarray:
+        return ~np.isnan(self.confidences).all(axis=1)
+
+    def _align(self, other: "PredictionBatch") -> "PredictionBatch":
+        # maps the column ids of a batch built with
+        # another intent to column dictionary
+        if other.intent_index is self.intent_index:
+            return other
+        columns = np.array([self.intent_index.setdefault(intent, len(self.intent_index))
+                            for intent in other.get_intent_names()], dtype=np.int32)
+        confidences = np.full((len(other), len(self.intent_index)), np.nan, dtype=np.float64)
+        confidences[:, columns] = other.get_confidences()
+        return PredictionBatch(
+            intent_index=self.intent_index,
+            examples=other.examples,
+            predicted_ids=columns[other.predicted_ids],
+            predicted_confidence=other.predicted_confidence,
+            confidences=confidences,
+            tags=other.tags,
+            intent_ids=columns[other.intent_ids] if other.intent_ids is not None else None,
+        )
+
+    def take(self, positions: List[int]) -> "PredictionBatch":
+        """
+        Selects the instances at the given positions
+
+        Args:
+            positions: positions of the selected instances
+
+        Returns:
+            prediction batch of the selected instances in
+                the order of the positions
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        return PredictionBatch(
+            intent_index=self.intent_index,
+            examples=[self.examples[position] for position in positions.tolist()],
+            predicted_ids=self.predicted_ids[positions],
+            predicted_confidence=self.predicted_confidence[positions],
+            confidences=self.confidences[positions],
+            tags=self.tags[positions] if self.tags is not None else None,
+            intent_ids=self.intent_ids[positions] if self.intent_ids is not None else None,
+        )
+
+    def replace(self, positions: np.ndarray, other: "PredictionBatch") -> "PredictionBatch":
+        """
+        Replaces the instances at the given positions with the
+        instances of another batch, without modifying this batch
+
+        Args:
+            positions: positions of the replaced instances
+            other: batch of the replacing instances, in the same
+                order as the positions
+
+        Returns:
+            prediction batch with the replaced instances
+        """
+        other = self._align(other=other)
+        width = len(self.intent_index)
+        confidences = self.get_confidences(width=width).copy()
+        confidences[positions] = other.get_confidences(width=width)
+        examples = list(self.examples)
+        for position, example in zip(positions.tolist(), other.examples):
+            examples[position] = example
+
+        predicted_ids = self.predicted_ids.copy()
+        predicted_ids[positions] = other.predicted_ids
+        predicted_confidence = self.predicted_confidence.copy()
+        predicted_confidence[positions] = other.predicted_confidence
+        return PredictionBatch(
+            intent_index=self.intent_index,
+            examples=examples,
+            predicted_ids=predicted_ids,
+            predicted_confidence=predicted_confidence,
+            confidences=confidences,
+            tags=self.tags,
+            intent_ids=self.intent_ids,
+        )
+
+    def get_record(self, index: int) -> Dict:
+        """
+        Builds the model output dictionary of an instance
+
+        Args:
+            index: position of the instance in the batch
+
+        Returns:
+            dictionary with the keys 'example', 'predicted_intent',
+                'predicted_confidence' and 'intent_ranking', along
+                with 'intent' and 'intent_confidence' for supervised
+                instances and 'tag' for tagged instances
+        """
+        intent_names = self.get_intent_names()
+        row = self.confidences[index]
+        ranked_columns = np.flatnonzero(~np.isnan(row))
+        ranked_columns = ranked_columns[np.argsort(-row[ranked_columns], kind='stable')]
+
+        record = dict()
+        if self.tags is not None:
+            record['tag'] = int(self.tags[index])
+        if self.intent_ids is not None:
+            record['intent'] = intent_names[self.intent_ids[index]]
+        record['example'] = self.examples[index]
+        record['predicted_intent'] = intent_names[self.predicted_ids[index]]
+        record['predicted_confidence'] = float(self.predicted_confidence[index])
+        if self.intent_ids is not None:
+            intent_column = int(self.intent_ids[index])
+            record['intent_confidence'] = float(np.nan_to_num(row[intent_column], nan=0.0)) \
+                if intent_column < len(row) else 0.0
+        record['intent_ranking'] = [{'name': intent_names[column], 'confidence': float(row[column])}
+                                    for column in ranked_columns.tolist()]
+        return record
+
+    def to_records(self) -> List[Dict]:
+        return list(self)
@@ -1,24 +1,34 @@
 import logging
 import os
-from concurrent.futures import ThreadPoolExecutor
-from typing import Text, NoReturn, List, Dict, Union, Optional
+from typing import Text, NoReturn, List, Dict, Union, Optional, Tuple, Set, Callable, Iterable
 
-import requests
 from rasa.cli.utils import get_validated_path
 from rasa.model import get_model, get_model_subdirectories
+from rasa.nlu.constants import TOKENS_NAMES, FEATURIZER_CLASS_ALIAS
+from rasa.nlu.featurizers.sparse_featurizer.count_vectors_featurizer import CountVectorsFeaturizer
 from rasa.nlu.model import Interpreter
-from requests import Response
+from rasa.shared.nlu.constants import TEXT
+from rasa.shared.nlu.training_data.message import Message
 from tqdm import tqdm
 
 from dime_xai.shared.constants import (
-    RASA_REST_ENDPOINT_PARSE,
     MODEL_MODE_LOCAL,
     NLU_FALLBACK_TAG,
+    DEFAULT_PARSE_BATCH_SIZE,
+    DEFAULT_PREDICTION_CACHE_SIZE,
+    FEATURE_SPACE_FINGERPRINT_SUFFIX,
+    DEFAULT_REST_CONCURRENCY,
+    DEFAULT_REST_RETRIES,
+    DEFAULT_REST_BACKOFF,
+    DEFAULT_REST_EJECTION_TIME,
+    DEFAULT_REST_TIMEOUT,
+    DEFAULT_REST_HEDGING,
 )
 from dime_xai.shared.exceptions.dime_core_exceptions import (
-    RESTModelLoadException,
+    DIMECacheException,
     ModelFingerprintPersistException,
     DatasetParseException,
+    RESTModelLoadException,
     RasaModelLoadException,
 )
 from dime_xai.shared.exceptions.dime_io_exceptions import (
@@ -26,11 +36,19 @@ from dime_xai.shared.exceptions.dime_io_exceptions import (
     ModelLoadException,
 )
 from dime_xai.shared.model.model import Model
+from dime_xai.shared.model.prediction_batch import PredictionBatch
+from dime_xai.shared.model.rasa_rest_client import RasaRESTClient
+from dime_xai.utils.cache import PredictionCache, DIMECache
 from dime_xai.utils.fingerprint import generate_model_fingerprint
 from dime_xai.utils.io import (
     get_latest_model_name,
     file_exists,
 )
+from dime_xai.utils.text_preprocessing import (
+    get_token_positions,
+    remove_token,
+    tokenize,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -46,8 +64,15 @@ class RASAModel(Model):
             model_mode: Text,
             models_path: Text = None,
             model_name: Text = None,
-            url: Text = None,
+            url: Union[Text, List[Text]] = None,
             quiet_mode: bool = False,
+            prediction_cache_size: int = DEFAULT_PREDICTION_CACHE_SIZE,
+            rest_concurrency: int = DEFAULT_REST_CONCURRENCY,
+            rest_retries: int = DEFAULT_REST_RETRIES,
+            rest_backoff: float = DEFAULT_REST_BACKOFF,
+            rest_ejection_time: float = DEFAULT_REST_EJECTION_TIME,
+            rest_timeout: float = DEFAULT_REST_TIMEOUT,
+            rest_hedging: bool = DEFAULT_REST_HEDGING,
     ) -> NoReturn:
         self._model_mode = model_mode
         self._models_path = models_path
@@ -57,8 +82,31 @@ class RASAModel(Model):
         self._nlu_model = None
         self._metadata = dict()
         self._fingerprint = None
+        self._prediction_cache = PredictionCache(max_size=prediction_cache_size)
+        self._persistent_cache = None
+        # tag to (example, featurized message) dictionary of the
+        # tagged examples, used to perturb them in the feature space
+        self._featurized_messages = dict()
+        # intent to confidence matrix column dictionary
+        # shared by the prediction batches of the model
+        self._intent_index = dict()
+        self._rest_client = None
+        # fingerprint of the model served by all REST endpoints,
+        # verified on the first parse instead of on construction
+        self._endpoint_fingerprint = None
+        self._endpoint_verified = False
         if model_mode == MODEL_MODE_LOCAL:
             self._load_model()
+        else:
+            self._rest_client = RasaRESTClient(
+                url=url,
+                concurrency=rest_concurrency,
+                retries=rest_retries,
+                backoff=rest_backoff,
+                ejection_time=rest_ejection_time,
+                timeout=rest_timeout,
+                hedging=rest_hedging,
+            )
 
     def _load_model(
             self,
@@ -96,6 +144,8 @@ class RASAModel(Model):
                                      f"the RASA model '{model_name}'")
 
         if self._nlu_model:
+            self._featurized_messages = dict()
+            self._intent_index = dict()
             self._metadata = self._nlu_model.model_metadata.metadata
             try:
                 self._fingerprint = generate_model_fingerprint(
@@ -125,9 +175,24 @@ class RASAModel(Model):
         )
         self._load_model(model_name=latest_model_name)
 
+    def _to_prediction_batch(
+            self,
+            examples: List[Text],
+            model_responses: List[Dict],
+            tags: Optional[List[int]] = None,
+            intents: Optional[List[Text]] = None,
+    ) -> PredictionBatch:
+        return PredictionBatch.from_responses(
+            intent_index=self._intent_index,
+            examples=examples,
+            responses=model_responses,
+            tags=tags,
+            intents=intents,
+        )
+
     def _process_supervised_output(
             self, data_instance: Dict,
-            model_response: Union[Dict, Response]
+            model_response: Dict
     ) -> Dict:
         """
         Generates the output dictionary for predictions obtained
@@ -138,339 +203,606 @@ class RASAModel(Model):
             data_instance: data instance dictionary with labeled
                 intent. Must have the keys, 'intent' and 'example'.
 
-            model_response:  output provided by the RASA model.
-                Model response is a dictionary for local models
-                and is an HTTP Response if the model is REST.
+            model_response:  parsed output of the local or
+                REST RASA model as a dictionary
 
         Returns:
             Dict: A dictionary that contains 'intent', 'example',
                 'predicted intent', 'predicted confidence',
                 'intent_confidence', and 'intent_ranking'.
         """
-        if self._model_mode == MODEL_MODE_LOCAL:
-            output = {
-                'example': data_instance['example'],
-                'intent': data_instance['intent'],
-                'predicted_intent': model_response['intent']['name'] or NLU_FALLBACK_TAG,
-                'predicted_confidence': model_response['intent']['confidence'],
-                'intent_confidence': [x['confidence']
-                                      for x
-                                      in model_response['intent_ranking']
-                                      if x['name'] == data_instance['intent']][0]
-                if 'intent_ranking' in model_response else 0.0,
-                'intent_ranking': model_response['intent_ranking']
-                if 'intent_ranking' in model_response else []
-            }
-        else:
-            output = {
-                'example': data_instance['example'],
-                'intent': data_instance['intent'],
-                'predicted_intent': model_response.json()['intent']['name'] or NLU_FALLBACK_TAG,
-                'predicted_confidence': model_response.json()['intent']['confidence'],
-                'intent_confidence': [x['confidence']
-                                      for x
-                                      in model_response.json()['intent_ranking']
-                                      if x['name'] == data_instance['intent']][0]
-                if 'intent_ranking' in model_response.json() else 0.0,
-                'intent_ranking': model_response.json()['intent_ranking']
-                if 'intent_ranking' in model_response.json() else []
-            }
-        return output
-
-    def _process_supervised_batch_output(self, model_response) -> List:
-        if self._model_mode == MODEL_MODE_LOCAL:
-            output = [{'example': response[0],
-                       'intent': response[1],
-                       'predicted_intent': response[2].result()['intent']['name'] or NLU_FALLBACK_TAG,
-                       'predicted_confidence': response[2].result()['intent']['confidence'],
-                       'intent_confidence': [x['confidence'] for x
-                                             in response[2].result()['intent_ranking']
-                                             if x['name'] == response[1]][0]
-                       if 'intent_ranking' in response[2].result() else 0.0,
-                       'intent_ranking': response[2].result()['intent_ranking']
-                       if 'intent_ranking' in response[2].result() else []
-                       }
-                      for response in model_response]
-        else:
-            output = [{'example': response[0],
-                       'intent': response[1],
-                       'predicted_intent': response[2].result().json()['intent']['name'] or NLU_FALLBACK_TAG,
-                       'predicted_confidence': response[2].result().json()['intent']['confidence'],
-                       'intent_confidence': [x['confidence'] for x
-                                             in response[2].result().json()['intent_ranking']
-                                             if x['name'] == response[1]][0]
-                       if 'intent_ranking' in response[2].result().json() else 0.0,
-                       'intent_ranking': response[2].result()['intent_ranking']
-                       if 'intent_ranking' in response[2].result().json() else []
-                       }
-                      for response in model_response]
-        return output
-
-    def _process_unsupervised_output(self, data_instance: Text, model_response: Union[Dict, Response]) -> Dict:
-        if self._model_mode == MODEL_MODE_LOCAL:
-            output = {
-                'example': data_instance,
-                'predicted_intent': model_response['intent']['name'] or NLU_FALLBACK_TAG,
-                'predicted_confidence': model_response['intent']['confidence'],
-                'intent_ranking': model_response['intent_ranking']
-                if 'intent_ranking' in model_response else []
-            }
-        else:
-            output = {
-                'example': data_instance,
-                'predicted_intent': model_response.json()['intent']['name'] or NLU_FALLBACK_TAG,
-                'predicted_confidence': model_response.json()['intent']['confidence'],
-                'intent_ranking': model_response.json()['intent_ranking']
-                if 'intent_ranking' in model_response.json() else []
-            }
-        return output
-
-    def _process_unsupervised_batch_output(self, model_response) -> List:
-        if self._model_mode == MODEL_MODE_LOCAL:
-            output = [{'example': response[0],
-                       'predicted_intent': response[1].result()['intent']['name'] or NLU_FALLBACK_TAG,
-                       'predicted_confidence': response[1].result()['intent']['confidence'],
-                       'intent_ranking': response[1].result()['intent_ranking']
-                       if 'intent_ranking' in response[1].result() else []
-                       }
-                      for response in model_response]
-        else:
-            output = [{'example': response[0],
-                       'predicted_intent': response[1].result().json()['intent']['name'] or NLU_FALLBACK_TAG,
-                       'predicted_confidence': response[1].result().json()['intent']['confidence'],
-                       'intent_ranking': response[1].result().json()['intent_ranking']
-                       if 'intent_ranking' in response[1].result().json() else []
-                       }
-                      for response in model_response]
-        return output
+        return self._to_prediction_batch(
+            examples=[data_instance['example']],
+            model_responses=[model_response],
+            intents=[data_instance['intent']],
+        )[0]
+
+    def _process_supervised_batch_output(self, model_response) -> PredictionBatch:
+        return self._to_prediction_batch(
+            examples=[response[0] for response in model_response],
+            model_responses=[response[2] for response in model_response],
+            intents=[response[1] for response in model_response],
+        )
+
+    def _process_unsupervised_output(self, data_instance: Text, model_response: Dict) -> Dict:
+        return self._to_prediction_batch(
+            examples=[data_instance],
+            model_responses=[model_response],
+        )[0]
+
+    def _process_unsupervised_batch_output(self, model_response) -> PredictionBatch:
+        return self._to_prediction_batch(
+            examples=[response[0] for response in model_response],
+            model_responses=[response[1] for response in model_response],
+        )
 
     def _process_tagged_supervised_batch_output(
             self,
             model_response: List,
-    ) -> List:
-        if self._model_mode == MODEL_MODE_LOCAL:
-            output = [{'tag': response[0]['tag'],
-                       'intent': response[0]['intent'],
-                       'example': response[0]['example'],
-                       'predicted_intent': response[1].result()['intent']['name'] or NLU_FALLBACK_TAG,
-                       'predicted_confidence': response[1].result()['intent']['confidence'],
-                       'intent_confidence': [x['confidence'] for x
-                                             in response[1].result()['intent_ranking']
-                                             if x['name'] == response[0]['intent']][0]
-                       if 'intent_ranking' in response[1].result() else 0.0,
-                       'intent_ranking': response[1].result()['intent_ranking']
-                       if 'intent_ranking' in response[1].result() else []
-                       }
-                      for response in model_response]
-        else:
-            output = [{'tag': response[0]['tag'],
-                       'intent': response[0]['intent'],
-                       'example': response[0]['example'],
-                       'predicted_intent': response[1].result().json()['intent']['name'] or NLU_FALLBACK_TAG,
-                       'predicted_confidence': response[1].result().json()['intent']['confidence'],
-                       'intent_confidence': [x['confidence'] for x
-                                             in response[1].result().json()['intent_ranking']
-                                             if x['name'] == response[1]][0]
-                       if 'intent_ranking' in response[1].result().json() else 0.0,
-                       'intent_ranking': response[1].result()['intent_ranking']
-                       if 'intent_ranking' in response[1].result().json() else []
-                       }
-                      for response in model_response]
-        return output
-
-    def _parse_rest(self, data_instance: Text) -> Response:
-        try:
-            request_body = {'text': data_instance}
-            response = requests.post(url=self._url + RASA_REST_ENDPOINT_PARSE, json=request_body)
-            if response.status_code != 200:
-                raise Exception
+    ) -> PredictionBatch:
+        return self._to_prediction_batch(
+            examples=[response[0]['example'] for response in model_response],
+            model_responses=[response[1] for response in model_response],
+            tags=[response[0]['tag'] for response in model_response],
+            intents=[response[0]['intent'] for response in model_response],
+        )
 
-            return response
-        except Exception:
-            raise RESTModelLoadException(f"Exception occurred while parsing the RASA REST model")
-
-    def _parse_batch_rest(
-            self,
-            dataset: Union[Dict, List],
-            is_supervised: bool = True,
-            description: Text = ""
-    ) -> List:
-        rasa_responses = list()
-        try:
-            if is_supervised:
-                if not self.quiet_mode:
-                    dataset = tqdm(dataset.items())
-                    dataset.set_description(f"{description}")
-                for intent, examples in dataset:
-                    with ThreadPoolExecutor(max_workers=os.cpu_count() * 5) as executor:
-                        for example in examples:
-                            future = executor.submit(
-                                self._parse_rest,
-                                example,
-                            )
-                            rasa_responses.append([example, intent, future])
-                return self._process_supervised_batch_output(rasa_responses)
-            else:
-                if not self.quiet_mode:
-                    dataset = tqdm(dataset)
-                for example in dataset:
-                    with ThreadPoolExecutor(max_workers=os.cpu_count() * 5) as executor:
-                        future = executor.submit(
-                            self._parse_rest,
-                            example,
-                        )
-                        rasa_responses.append([example, future])
-                return self._process_unsupervised_batch_output(rasa_responses)
-        except Exception as e:
-            logger.error(f"Exception occurred. {e}")
-            raise DatasetParseException(e)
+    def _parse_rest(self, data_instance: Text) -> Dict:
+        return self._rest_client.parse(data_instance=data_instance)
 
     def _parse_tagged_batch(
             self,
             dataset: List,
             description: Text = "",
-            use_threading: bool = True,
-    ) -> List:
+    ) -> PredictionBatch:
         """
         Parses a tagged supervised dataset passed as a List using
-        a REST Rasa model. Uses threading if specified to parse
-        large datasets
+        a local or a REST Rasa model
 
         Args:
             dataset: dataset as a List of Dicts with 'tag', 'intent' and 'example' as keys
             description: A description to be shown as the progress bar prefix
 
-        Returns: The list of parsed instance dictionaries with keys 'tag', 'intent', 'example',
-        'predicted_intent', 'predicted_confidence', and 'intent_ranking'
+        Returns: The prediction batch of the parsed instances, the records of which have the
+        keys 'tag', 'intent', 'example', 'predicted_intent', 'predicted_confidence', and 'intent_ranking'
 
         """
-        rasa_responses = list()
+        try:
+            rasa_responses = self.parse_texts(
+                data_instances=[instance['example'] for instance in dataset],
+                description=description,
+            )
+            return self._process_tagged_supervised_batch_output(
+                [[instance, response] for instance, response in zip(dataset, rasa_responses)]
+            )
+        except KeyboardInterrupt:
+            raise KeyboardInterrupt()
+        except Exception as e:
+            raise DatasetParseException(e)
+
+    def _parse_local(self, data_instance: Text) -> Dict:
+        return self._nlu_model.parse(data_instance)
 
+    def _parse(self, data_instance: Text) -> Dict:
         if self._model_mode == MODEL_MODE_LOCAL:
-            parsing_function = self._parse_local
-        else:
-            parsing_function = self._parse_rest
+            return self._parse_local(data_instance=data_instance)
+        return self._parse_rest(data_instance=data_instance)
+
+    def _get_cache_fingerprint(self, feature_space: bool = False) -> Optional[Text]:
+        # predictions of examples perturbed in the feature space are
+        # kept apart from the predictions of the same texts
+        if feature_space:
+            return f"{self._fingerprint}{FEATURE_SPACE_FINGERPRINT_SUFFIX}"
+        if self._rest_client is not None:
+            if not self._endpoint_verified:
+                self._endpoint_fingerprint = self.verify_endpoint_fingerprint()
+                self._endpoint_verified = True
+            return self._endpoint_fingerprint or ",".join(self._rest_client.get_urls())
+        return self._fingerprint
+
+    def _parse_cached(self, data_instance: Text) -> Dict:
+        cache_fingerprint = self._get_cache_fingerprint()
+        raw_response = self._prediction_cache.get(cache_fingerprint, data_instance)
+        if raw_response is None:
+            raw_response = self._parse(data_instance=data_instance)
+            self._prediction_cache.put(cache_fingerprint, data_instance, raw_response)
+        return raw_response
+
+    def set_persistent_cache(self, cache: Optional[DIMECache]) -> NoReturn:
+        """
+        Attaches an on-disk DIME cache that backs the in-memory
+        prediction cache. Only local models are fingerprinted,
+        hence the cache is ignored for REST models
+
+        Args:
+            cache: DIME cache keyed by this model's fingerprint
+
+        Returns:
+            no return
+        """
+        if self._model_mode == MODEL_MODE_LOCAL and self._fingerprint:
+            self._persistent_cache = cache
 
+    def _load_persisted_predictions(self, data_instances: List[Text], feature_space: bool = False) -> Dict:
+        if not self._persistent_cache or not data_instances:
+            return dict()
         try:
-            if not self.quiet_mode:
-                dataset = tqdm(dataset)
-                dataset.set_description(f"{description}")
-            if use_threading:
-                for instance in dataset:
-                    example = instance['example']
-                    with ThreadPoolExecutor(max_workers=os.cpu_count() * 5) as executor:
-                        future = executor.submit(
-                            parsing_function,
-                            example,
-                        )
-                        rasa_responses.append([instance, future])
+            return self._persistent_cache.load_predictions(texts=data_instances, feature_space=feature_space)
+        except DIMECacheException as e:
+            logger.warning(f"Failed to load cached predictions. DIME will "
+                           f"continue without the prediction cache. {e}")
+            self._persistent_cache = None
+            return dict()
+
+    def _persist_predictions(self, predictions: Dict, feature_space: bool = False) -> NoReturn:
+        if not self._persistent_cache or not predictions:
+            return
+        try:
+            self._persistent_cache.save_predictions(predictions=predictions, feature_space=feature_space)
+        except DIMECacheException as e:
+            logger.warning(f"Failed to persist predictions. DIME will "
+                           f"continue without the prediction cache. {e}")
+            self._persistent_cache = None
+
+    def _get_cached_responses(self, data_instances: List[Text], feature_space: bool = False) -> Tuple[Dict, Dict]:
+        """
+        Looks up the cached predictions of a list of strings,
+        first in memory and then in the attached DIME cache
+
+        Args:
+            data_instances: list of strings to be parsed
+            feature_space: looks up the predictions of the
+                examples perturbed in the feature space instead
+
+        Returns:
+            normalized string to raw response dictionary of the
+                cached strings, and normalized string to string
+                dictionary of the uncached strings
+        """
+        cache_fingerprint = self._get_cache_fingerprint(feature_space=feature_space)
+        responses = dict()
+        uncached_instances = dict()
+        for data_instance in data_instances:
+            normalized_instance = PredictionCache.normalize(data_instance)
+            if normalized_instance in responses or normalized_instance in uncached_instances:
+                continue
+            raw_response = self._prediction_cache.get(cache_fingerprint, data_instance)
+            if raw_response is None:
+                uncached_instances[normalized_instance] = data_instance
             else:
-                raise NotImplementedError()
-            return self._process_tagged_supervised_batch_output(rasa_responses)
+                responses[normalized_instance] = raw_response
 
-        except NotImplementedError:
-            raise NotImplementedError()
-        except Exception as e:
-            raise Exception(f"Exception occurred. {e}")
+        for key, raw_response in self._load_persisted_predictions(
+                data_instances=list(uncached_instances.keys()),
+                feature_space=feature_space,
+        ).items():
+            self._prediction_cache.put(cache_fingerprint, uncached_instances.pop(key), raw_response)
+            responses[key] = raw_response
+        return responses, uncached_instances
 
-    def _parse_local(self, data_instance: Text) -> Dict:
-        return self._nlu_model.parse(data_instance)
+    def _parse_local_batch(self, data_instances: List[Text]) -> List[Dict]:
+        """
+        Parses a batch of strings using the local RASA model. Runs
+        each pipeline component once over the whole batch when the
+        component supports batch processing (e.g. the DIME DIET
+        classifier), else processes the messages one by one. The
+        output matches the output of `Interpreter.parse`
+
+        Args:
+            data_instances: list of strings to be parsed
 
-    def _parse_batch_local(
+        Returns:
+            list of parsed outputs in the same order as the input
+        """
+        outputs = [Interpreter.default_output_attributes() for _ in data_instances]
+        indexed_messages = list()
+        for index, data_instance in enumerate(data_instances):
+            # blank strings are not processed, and only carry an
+            # empty text, as in `Interpreter.parse`
+            if not data_instance.strip():
+                outputs[index][TEXT] = ""
+                continue
+            data = Interpreter.default_output_attributes()
+            data[TEXT] = data_instance
+            indexed_messages.append((index, Message(data=data)))
+
+        messages = [message for _, message in indexed_messages]
+        if messages:
+            for component in self._nlu_model.pipeline:
+                if hasattr(component, "process_batch"):
+                    component.process_batch(messages, **self._nlu_model.context)
+                else:
+                    for message in messages:
+                        component.process(message, **self._nlu_model.context)
+
+        for index, message in indexed_messages:
+            outputs[index].update(message.as_dict(only_output_properties=True))
+        return outputs
+
+    def parse_texts(
+            self,
+            data_instances: List[Text],
+            batch_size: int = DEFAULT_PARSE_BATCH_SIZE,
+            description: Text = "",
+            map_chunks: Optional[Callable[[List[List[Text]]], Iterable[List]]] = None,
+    ) -> List[Dict]:
+        """
+        Parses a list of strings in chunks of `batch_size`. Cached
+        predictions are reused, either from memory or from the attached
+        DIME cache, and duplicate strings are parsed only once. Local
+        models process each chunk as a single batch, while REST models
+        parse the strings of a chunk concurrently
+
+        Args:
+            data_instances: list of strings to be parsed
+            batch_size: number of strings parsed at once
+            description: A description to be shown as the progress bar prefix
+            map_chunks: optional function that parses the uncached chunks
+                elsewhere, e.g. on a pool of worker processes, and yields
+                the raw responses of each chunk in the order of the chunks
+
+        Returns:
+            parsed outputs as dictionaries, in the same order as the
+                input, for both local and REST models
+        """
+        batch_size = max(int(batch_size or DEFAULT_PARSE_BATCH_SIZE), 1)
+        cache_fingerprint = self._get_cache_fingerprint()
+        normalized_instances = [PredictionCache.normalize(data_instance) for data_instance in data_instances]
+        responses, uncached_instances = self._get_cached_responses(data_instances=data_instances)
+
+        uncached_keys = list(uncached_instances.keys())
+        new_responses = dict()
+        progress_bar = tqdm(total=len(uncached_keys), disable=self.quiet_mode)
+        progress_bar.set_description(f"{description}")
+        try:
+            chunk_keys_list = [uncached_keys[start:start + batch_size]
+                               for start in range(0, len(uncached_keys), batch_size)]
+            chunks = [[uncached_instances[key] for key in chunk_keys] for chunk_keys in chunk_keys_list]
+            chunk_outputs = map_chunks(chunks) if map_chunks and chunks else map(self._parse_chunk, chunks)
+            for chunk_keys, chunk, chunk_responses in zip(chunk_keys_list, chunks, chunk_outputs):
+                for key, data_instance, raw_response in zip(chunk_keys, chunk, chunk_responses):
+                    responses[key] = raw_response
+                    self._prediction_cache.put(cache_fingerprint, data_instance, raw_response)
+                    if self._model_mode == MODEL_MODE_LOCAL:
+                        new_responses[key] = raw_response
+                progress_bar.update(len(chunk))
+        finally:
+            progress_bar.close()
+            self._persist_predictions(new_responses)
+        return [responses[normalized_instance] for normalized_instance in normalized_instances]
+
+    def _parse_chunk(self, data_instances: List[Text]) -> List[Dict]:
+        if self._model_mode == MODEL_MODE_LOCAL:
+            return self._parse_local_batch(data_instances)
+        return self._rest_client.parse_batch(data_instances=data_instances)
+
+    def _get_masked_classifier_index(self) -> Optional[int]:
+        if self._model_mode != MODEL_MODE_LOCAL or not self._nlu_model:
+            return None
+        for index, component in enumerate(self._nlu_model.pipeline):
+            if hasattr(component, "process_masked"):
+                return index
+        return None
+
+    def supports_masked_parsing(self) -> bool:
+        return self._get_masked_classifier_index() is not None
+
+    def _featurize(self, data_instance: Text) -> Message:
+        data = Interpreter.default_output_attributes()
+        data[TEXT] = data_instance
+        message = Message(data=data)
+        for component in self._nlu_model.pipeline[:self._get_masked_classifier_index()]:
+            component.process(message, **self._nlu_model.context)
+        return message
+
+    def _get_decomposable_origins(self) -> Set[Text]:
+        return {component.component_config.get(FEATURIZER_CLASS_ALIAS) or component.name
+                for component in self._nlu_model.pipeline[:self._get_masked_classifier_index()]
+                if isinstance(component, CountVectorsFeaturizer)}
+
+    def _is_decomposable(self, message: Message, data_instance: Text) -> bool:
+        # the tokens of the RASA tokenizer must be the DIME tokens, and
+        # all text features must be the sums of the token features
+        rasa_tokens = [token.text for token in message.get(TOKENS_NAMES[TEXT], [])]
+        classifier = self._nlu_model.pipeline[self._get_masked_classifier_index()]
+        return rasa_tokens == (tokenize(data_instance) or []) and \
+            classifier.is_decomposable(message, self._get_decomposable_origins())
+
+    def _get_featurized_message(self, tag: int, data_instance: Text) -> Optional[Message]:
+        """
+        Featurizes a tagged example once, by the components preceding
+        the DIME DIET classifier, and caches the message by its tag.
+        Messages are only cached when the token removed examples can
+        be derived from their features, that is when the tokens of the
+        RASA tokenizer are the DIME tokens and all text features are
+        decomposable into token features
+
+        Args:
+            tag: tag of the example
+            data_instance: example string
+
+        Returns:
+            featurized message, or None if the example has to be
+                re-featurized after removing a token
+        """
+        cached_instance, message = self._featurized_messages.get(tag, (None, None))
+        if cached_instance == data_instance:
+            return message
+
+        message = self._featurize(data_instance=data_instance)
+        if not self._is_decomposable(message=message, data_instance=data_instance):
+            message = None
+        self._featurized_messages[tag] = (data_instance, message)
+        return message
+
+    def _parse_masked_messages(self, masked_messages: List[Tuple[Message, List[int]]]) -> List[Dict]:
+        """
+        Runs the DIME DIET classifier, and the pipeline components
+        following it, over featurized messages with the tokens at
+        the masked positions dropped from their features
+
+        Args:
+            masked_messages: list of featurized message and masked
+                token positions pairs
+
+        Returns:
+            list of parsed outputs in the same order as the input,
+                which match the output of `Interpreter.parse`
+        """
+        classifier_index = self._get_masked_classifier_index()
+        pipeline = self._nlu_model.pipeline
+        context = self._nlu_model.context
+        processed_messages = pipeline[classifier_index].process_masked_batch(masked_messages, **context)
+
+        messages = [message for message in processed_messages if message]
+        for component in pipeline[classifier_index + 1:]:
+            if hasattr(component, "process_batch"):
+                component.process_batch(messages, **context)
+            else:
+                for message in messages:
+                    component.process(message, **context)
+
+        outputs = list()
+        for message in processed_messages:
+            output = Interpreter.default_output_attributes()
+            if message:
+                output.update(message.as_dict(only_output_properties=True))
+            outputs.append(output)
+        return outputs
+
+    def parse_masked(self, data_instance: Text, tokens: List[Text]) -> Optional[PredictionBatch]:
+        """
+        Parses a string once per given token with the token dropped
+        in the feature space of the DIME DIET classifier. The string
+        is featurized once by the components preceding the classifier,
+        and the classifier predicts all perturbations in a single
+        forward pass. Like the tagged examples of global feature
+        importance, the string is only perturbed in the feature space
+        when the tokens of the RASA tokenizer are the DIME tokens and
+        all text features are decomposable into token features
+
+        Args:
+            data_instance: string to be perturbed
+            tokens: tokens or whitespace joined n-grams to drop
+
+        Returns:
+            prediction batch of the perturbations in the same order
+                as the tokens, with the token removed strings as the
+                examples, or None if the model does not support feature
+                space perturbation or the features are not decomposable
+        """
+        if not self.supports_masked_parsing() or not data_instance:
+            return None
+
+        message = self._featurize(data_instance=data_instance)
+        if not self._is_decomposable(message=message, data_instance=data_instance):
+            logger.debug(f"The features of the instance are not decomposable into the "
+                         f"features of its tokens. DIME will perturb the text instead")
+            return None
+
+        rasa_tokens = [token.text for token in message.get(TOKENS_NAMES[TEXT], [])]
+        masks = [get_token_positions(tokens=rasa_tokens, token=token) for token in tokens]
+        masked_indices = [index for index, mask in enumerate(masks) if mask]
+        try:
+            masked_responses = self._parse_masked_messages(
+                [(message, masks[index]) for index in masked_indices]
+            )
+        except ValueError as e:
+            logger.debug(f"Failed to perturb the instance in the feature space. {e}")
+            return None
+
+        perturbed_instances = [remove_token(instance=data_instance, token=token) for token in tokens]
+        raw_responses = dict()
+        for index, raw_response in zip(masked_indices, masked_responses):
+            raw_response[TEXT] = perturbed_instances[index]
+            raw_responses[index] = raw_response
+
+        unaligned_indices = [index for index in range(len(tokens)) if index not in raw_responses]
+        if unaligned_indices:
+            logger.debug(f"{len(unaligned_indices)} tokens could not be aligned with the "
+                         f"tokens of the RASA tokenizer and were removed from the text")
+            text_responses = self.parse_texts(
+                data_instances=[perturbed_instances[index] for index in unaligned_indices],
+                description="Dual feature importance",
+            )
+            raw_responses.update(zip(unaligned_indices, text_responses))
+
+        return self._process_unsupervised_batch_output(
+            [[perturbed_instances[index], raw_responses[index]] for index in range(len(tokens))]
+        )
+
+    def parse_perturbed_supervised_batch(
+            self,
+            data_instances: Union[List, Tuple],
+            token: Text,
+            batch_size: int = DEFAULT_PARSE_BATCH_SIZE,
+            description: Text = "",
+    ) -> PredictionBatch:
+        """
+        Parses a tagged supervised dataset after removing a token
+        from each example. With the DIME DIET classifier, examples
+        are featurized once and cached by their tags, and the
+        features of the token removed examples are derived from the
+        cached sparse features by dropping the rows of the token,
+        instead of re-running the featurizers. Examples with features
+        that cannot be decomposed into token features are parsed as
+        token removed strings, same as with other models
+
+        Args:
+            data_instances: tagged dataset as a List of Dicts with 'tag',
+                'intent' and 'example' as keys, before removing the token
+            token: token or whitespace joined n-gram to be removed
+            batch_size: number of examples parsed at once
+            description: A description to be shown as the progress bar prefix
+
+        Returns: The prediction batch of the parsed instances, the records of which have the
+        keys 'tag', 'intent', 'example', 'predicted_intent', 'predicted_confidence', and
+        'intent_ranking', with the token removed examples as 'example'
+
+        """
+        perturbed_instances = [{**instance, 'example': remove_token(instance=instance['example'], token=token)}
+                               for instance in data_instances]
+        if not self.supports_masked_parsing():
+            return self.parse_supervised_batch(data_instances=perturbed_instances, description=description)
+
+        try:
+            batch_size = max(int(batch_size or DEFAULT_PARSE_BATCH_SIZE), 1)
+            cache_fingerprint = self._get_cache_fingerprint(feature_space=True)
+            responses, uncached_instances = self._get_cached_responses(
+                data_instances=[instance['example'] for instance in perturbed_instances],
+                feature_space=True,
+            )
+
+            masked_instances = list()
+            text_instances = list()
+            for instance, perturbed_instance in zip(data_instances, perturbed_instances):
+                key = PredictionCache.normalize(perturbed_instance['example'])
+                if uncached_instances.pop(key, None) is None:
+                    continue
+                message = self._get_featurized_message(tag=instance['tag'], data_instance=instance['example'])
+                mask = get_token_positions(
+                    tokens=[rasa_token.text for rasa_token in message.get(TOKENS_NAMES[TEXT], [])],
+                    token=token,
+                ) if message else []
+                if mask:
+                    masked_instances.append((key, perturbed_instance['example'], message, mask))
+                else:
+                    text_instances.append(perturbed_instance['example'])
+
+            new_responses = dict()
+            progress_bar = tqdm(total=len(masked_instances), disable=self.quiet_mode)
+            progress_bar.set_description(f"{description}")
+            try:
+                for start in range(0, len(masked_instances), batch_size):
+                    chunk = masked_instances[start:start + batch_size]
+                    try:
+                        chunk_responses = self._parse_masked_messages(
+                            [(message, mask) for _, _, message, mask in chunk]
+                        )
+                    except ValueError as e:
+                        logger.debug(f"Failed to perturb the examples in the feature space. {e}")
+                        text_instances += [data_instance for _, data_instance, _, _ in chunk]
+                        chunk_responses = list()
+                    for (key, data_instance, _, _), raw_response in zip(chunk, chunk_responses):
+                        raw_response[TEXT] = data_instance
+                        responses[key] = raw_response
+                        new_responses[key] = raw_response
+                        self._prediction_cache.put(cache_fingerprint, data_instance, raw_response)
+                    progress_bar.update(len(chunk))
+            finally:
+                progress_bar.close()
+                self._persist_predictions(new_responses, feature_space=True)
+
+            text_responses = self.parse_texts(data_instances=text_instances, description=description)
+            responses.update(zip([PredictionCache.normalize(data_instance) for data_instance in text_instances],
+                                 text_responses))
+            return self._process_tagged_supervised_batch_output(
+                [[instance, responses[PredictionCache.normalize(instance['example'])]]
+                 for instance in perturbed_instances]
+            )
+        except KeyboardInterrupt:
+            raise KeyboardInterrupt()
+        except Exception as e:
+            raise DatasetParseException(e)
+
+    def _parse_batch(
             self,
             dataset: Union[Dict, List],
             is_supervised: bool = True,
             description: Text = "",
-    ) -> List:
-        local_responses = list()
+            map_chunks: Optional[Callable] = None,
+    ) -> PredictionBatch:
         try:
             if is_supervised:
-                if not self.quiet_mode:
-                    dataset = tqdm(dataset.items())
-                    dataset.set_description(f"{description}")
-
-                for intent, examples in dataset:
-                    with ThreadPoolExecutor(max_workers=os.cpu_count() * 5) as executor:
-                        for example in examples:
-                            future = executor.submit(
-                                self._parse_local,
-                                example
-                            )
-                            local_responses.append([example, intent, future])
-                return self._process_supervised_batch_output(local_responses)
+                labeled_examples = [[example, intent]
+                                    for intent, examples in dataset.items()
+                                    for example in examples]
+                rasa_responses = self.parse_texts(
+                    data_instances=[example for example, _ in labeled_examples],
+                    description=description,
+                    map_chunks=map_chunks,
+                )
+                return self._process_supervised_batch_output(
+                    [[example, intent, response]
+                     for (example, intent), response in zip(labeled_examples, rasa_responses)]
+                )
             else:
-                if not self.quiet_mode:
-                    dataset = tqdm(dataset)
-                for example in dataset:
-                    with ThreadPoolExecutor(max_workers=os.cpu_count() * 5) as executor:
-                        future = executor.submit(
-                            self._parse_local,
-                            example
-                        )
-                        local_responses.append([example, future])
-                return self._process_unsupervised_batch_output(local_responses)
+                rasa_responses = self.parse_texts(
+                    data_instances=list(dataset),
+                    description=description,
+                    map_chunks=map_chunks,
+                )
+                return self._process_unsupervised_batch_output(
+                    [[example, response] for example, response in zip(dataset, rasa_responses)]
+                )
         except KeyboardInterrupt:
             raise KeyboardInterrupt()
         except Exception as e:
+            logger.error(f"Exception occurred. {e}")
             raise DatasetParseException(e)
 
     def parse_supervised(self, data_instance: Dict) -> Dict:
-        if self._model_mode == MODEL_MODE_LOCAL:
-            raw_response = self._parse_local(
-                data_instance=data_instance['example']
-            )
-        else:
-            raw_response = self._parse_rest(
-                data_instance=data_instance['example']
-            )
+        raw_response = self._parse_cached(data_instance=data_instance['example'])
         return self._process_supervised_output(
             data_instance=data_instance,
             model_response=raw_response
         )
 
-    def parse_supervised_batch(self, data_instances: Union[List, Dict], description: Text = "") -> List:
+    def parse_supervised_batch(
+            self,
+            data_instances: Union[List, Tuple, Dict],
+            description: Text = "",
+    ) -> PredictionBatch:
         if isinstance(data_instances, Dict):
-            if self._model_mode == MODEL_MODE_LOCAL:
-                model_response = self._parse_batch_local(
-                    dataset=data_instances,
-                    description=description
-                )
-                return model_response
-            else:
-                bot_responses = self._parse_batch_rest(
-                    dataset=data_instances,
-                    description=description
-                )
-                return bot_responses
-        elif isinstance(data_instances, List):
-            model_response = self._parse_tagged_batch(
+            return self._parse_batch(
+                dataset=data_instances,
+                description=description
+            )
+        elif isinstance(data_instances, (List, Tuple)):
+            return self._parse_tagged_batch(
                 dataset=data_instances,
                 description=description
             )
-            return model_response
 
     def parse_unsupervised(self, data_instance: Text) -> Dict:
-        if self._model_mode == MODEL_MODE_LOCAL:
-            raw_response = self._parse_local(data_instance=data_instance)
-        else:
-            raw_response = self._parse_rest(data_instance=data_instance)
+        raw_response = self._parse_cached(data_instance=data_instance)
         return self._process_unsupervised_output(data_instance=data_instance, model_response=raw_response)
 
-    def parse_unsupervised_batch(self, data_instances: List, description: Text = "") -> List:
-        if self._model_mode == MODEL_MODE_LOCAL:
-            model_response = self._parse_batch_local(
-                dataset=data_instances,
-                is_supervised=False,
-                description=description
-            )
-            return model_response
-        else:
-            bot_responses = self._parse_batch_rest(
-                dataset=data_instances,
-                is_supervised=False,
-                description=description
-            )
-            return bot_responses
+    def parse_unsupervised_batch(
+            self,
+            data_instances: List,
+            description: Text = "",
+            map_chunks: Optional[Callable] = None,
+    ) -> PredictionBatch:
+        return self._parse_batch(
+            dataset=data_instances,
+            is_supervised=False,
+            description=description,
+            map_chunks=map_chunks,
+        )
+
+    def get_prediction_cache_info(self) -> Dict:
+        return self._prediction_cache.info()
 
     def get_model_metadata(self) -> Optional[Dict]:
         return self._metadata
@@ -478,16 +810,68 @@ class RASAModel(Model):
     def get_fingerprint(self) -> Optional[Text]:
         return self._fingerprint
 
-    def test_diet_compatibility(self, intents: List) -> bool:
-        if self._model_mode == MODEL_MODE_LOCAL:
-            raw_response = self._parse_local(data_instance='test')
-            diet_labels = [x['name'] for x in raw_response['intent_ranking']] \
-                if 'intent_ranking' in raw_response else []
+    def verify_endpoint_fingerprint(self) -> Optional[Text]:
+        """
+        Verifies that all endpoints of a REST model serve the
+        same model, by the fingerprints of their `/status` endpoints
 
-        else:
-            raw_response = self._parse_rest(data_instance='test')
-            diet_labels = [x['name'] for x in raw_response.json()['intent_ranking']] \
-                if 'intent_ranking' in raw_response.json() else []
+        Returns:
+            fingerprint of the served model, else None if it is a
+                local model or no endpoint reports its model
+
+        Raises:
+            RESTModelLoadException: if the endpoints serve different models
+        """
+        if self._rest_client is None:
+            return None
+
+        fingerprints = self._rest_client.get_fingerprints()
+        unique_fingerprints = {fingerprint for fingerprint in fingerprints.values() if fingerprint}
+        if len(unique_fingerprints) > 1:
+            raise RESTModelLoadException(f"The RASA REST endpoints serve different models. "
+                                         f"Model fingerprints: {fingerprints}")
+        if not unique_fingerprints:
+            logger.warning(f"Failed to retrieve the model fingerprint of the RASA REST endpoints")
+            return None
+        if None in fingerprints.values():
+            logger.warning(f"Failed to verify the model fingerprint of the RASA REST endpoints "
+                           f"{[url for url, fingerprint in fingerprints.items() if not fingerprint]}")
+        return unique_fingerprints.pop()
+
+    def get_endpoint_stats(self) -> List[Dict]:
+        return self._rest_client.get_endpoint_stats() if self._rest_client is not None else []
+
+    def get_hedged_requests(self) -> int:
+        return self._rest_client.hedged_requests if self._rest_client is not None else 0
+
+    def get_intent_index(self) -> Dict[Text, int]:
+        return self._intent_index
+
+    def set_intent_index(self, intent_index: Dict[Text, int]) -> NoReturn:
+        self._intent_index = intent_index
+
+    def close(self) -> NoReturn:
+        """
+        Shuts down the pooled connections and the request threads
+        of a REST model. A closed model opens them again if it is
+        used afterwards
+
+        Returns:
+            no return
+        """
+        if self._rest_client is not None:
+            self._rest_client.close()
+
+    def __enter__(self) -> "RASAModel":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> NoReturn:
+        self.close()
+
+    def test_diet_compatibility(self, intents: List) -> bool:
+        raw_response = self._parse(data_instance='test')
+        diet_labels = [x['name'] for x in raw_response['intent_ranking']] \
+            if 'intent_ranking' in raw_response else []
 
         intents.append(NLU_FALLBACK_TAG)
         unique_labels = sorted(list(set(intents)))
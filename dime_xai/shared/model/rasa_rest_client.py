@@ -0,0 +1,351 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait, as_completed
+from typing import Text, List, NoReturn, Dict, Union, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from dime_xai.shared.constants import (
+    RASA_REST_ENDPOINT_PARSE,
+    RASA_REST_ENDPOINT_STATUS,
+    DEFAULT_REST_CONCURRENCY,
+    DEFAULT_REST_RETRIES,
+    DEFAULT_REST_BACKOFF,
+    DEFAULT_REST_EJECTION_TIME,
+    DEFAULT_REST_TIMEOUT,
+    DEFAULT_REST_HEDGING,
+    REST_RETRY_STATUS_CODES,
+    REST_HEDGING_QUANTILE,
+    REST_HEDGING_MIN_SAMPLES,
+    REST_LATENCY_WINDOW,
+)
+from dime_xai.shared.exceptions.dime_core_exceptions import RESTModelLoadException
+
+logger = logging.getLogger(__name__)
+
+
+class RESTEndpoint:
+    """
+    A single RASA server of a REST RASA model. Keeps the
+    number of requests in flight, the request and failure
+    counts, the latencies of the successful requests, and
+    the time until which the endpoint is ejected
+    """
+
+    def __init__(self, url: Text) -> NoReturn:
+        self.url = url.rstrip('/')
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.ejected_until = 0.0
+
+    def get_stats(self) -> Dict:
+        successes = self.requests - self.failures
+        return {
+            'url': self.url,
+            'requests': self.requests,
+            'failures': self.failures,
+            'mean_latency': round(self.total_latency / successes, 6) if successes else 0.0,
+            'max_latency': round(self.max_latency, 6),
+        }
+
+
+class _RetryableStatusException(Exception):
+    pass
+
+
+class _RequestTimeoutException(Exception):
+    pass
+
+
+# failures after which a request is sent again,
+# possibly to another endpoint
+_RETRYABLE_EXCEPTIONS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    _RetryableStatusException,
+    _RequestTimeoutException,
+)
+
+
+class RasaRESTClient:
+    """
+    HTTP client of a REST RASA model served by one or more
+    identical RASA servers. Requests share a session that keeps
+    the connections to each server alive, and are sent to the
+    endpoint with the fewest requests in flight, in round-robin
+    order on ties. An endpoint that fails is ejected for
+    `ejection_time` seconds and the request is retried on
+    another endpoint, with exponential backoff once no other
+    endpoint is available. Requests without a complete response
+    within `timeout` seconds are abandoned and retried the same
+    way. Batches are parsed concurrently on a long-lived pool of
+    `concurrency` threads, which also bounds the number of parse
+    calls in flight. With `hedging`, a duplicate of a request that
+    takes longer than the 95th percentile of the recent latencies
+    is sent, the first response is kept and the other copy is
+    not retried
+    """
+
+    def __init__(
+            self,
+            url: Union[Text, List[Text]],
+            concurrency: int = DEFAULT_REST_CONCURRENCY,
+            retries: int = DEFAULT_REST_RETRIES,
+            backoff: float = DEFAULT_REST_BACKOFF,
+            ejection_time: float = DEFAULT_REST_EJECTION_TIME,
+            timeout: float = DEFAULT_REST_TIMEOUT,
+            hedging: bool = DEFAULT_REST_HEDGING,
+    ) -> NoReturn:
+        urls = [url] if isinstance(url, str) else list(url or [])
+        if not urls:
+            raise RESTModelLoadException("No URL was specified for the RASA REST model")
+
+        self._endpoints = [RESTEndpoint(url=endpoint_url) for endpoint_url in urls]
+        self.concurrency = max(int(concurrency or DEFAULT_REST_CONCURRENCY), 1)
+        self._retries = max(int(retries or 0), 0)
+        self._backoff = backoff or 0.0
+        self._ejection_time = ejection_time
+        self._timeout = timeout or None
+        self._hedging = hedging
+        adapter = HTTPAdapter(pool_connections=len(self._endpoints), pool_maxsize=self.concurrency)
+        self._session = requests.Session()
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        self._next_endpoint = 0
+        self._endpoint_lock = threading.Lock()
+        # latencies of the recent successful requests, and
+        # the hedging delay last derived from them
+        self._latencies = deque(maxlen=REST_LATENCY_WINDOW)
+        self._latency_samples = 0
+        self._hedge_delay = None
+        self.hedged_requests = 0
+        self._executor = None
+        # requests of `parse` calls that hedge run on a separate
+        # pool, since the calls themselves may run on the batch pool
+        self._hedge_executor = None
+        # HTTP requests run on their own pool, so that the calls
+        # waiting for them can give up once `timeout` passes
+        self._request_executor = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="dime-rest")
+            return self._executor
+
+    def _get_hedge_executor(self) -> ThreadPoolExecutor:
+        # room for a request and its duplicate per parse call
+        with self._executor_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(max_workers=self.concurrency * 2,
+                                                          thread_name_prefix="dime-rest-hedge")
+            return self._hedge_executor
+
+    def _get_request_executor(self) -> ThreadPoolExecutor:
+        # room for a request and its duplicate per parse call, and
+        # for the abandoned requests that have not returned yet
+        with self._executor_lock:
+            if self._request_executor is None:
+                self._request_executor = ThreadPoolExecutor(max_workers=self.concurrency * 4,
+                                                            thread_name_prefix="dime-rest-request")
+            return self._request_executor
+
+    def _acquire_endpoint(self) -> RESTEndpoint:
+        # least outstanding requests among the endpoints that are
+        # not ejected, starting from the next endpoint in round-robin
+        # order. If all of them are ejected, the endpoint that is
+        # reinstated first is used
+        with self._endpoint_lock:
+            now = time.monotonic()
+            endpoint_size = len(self._endpoints)
+            candidates = [(self._next_endpoint + offset) % endpoint_size for offset in range(endpoint_size)]
+            healthy_candidates = [index for index in candidates if self._endpoints[index].ejected_until <= now]
+            if healthy_candidates:
+                index = min(healthy_candidates, key=lambda candidate: self._endpoints[candidate].outstanding)
+            else:
+                index = min(candidates, key=lambda candidate: self._endpoints[candidate].ejected_until)
+            self._next_endpoint = (index + 1) % endpoint_size
+
+            endpoint = self._endpoints[index]
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def _release_endpoint(self, endpoint: RESTEndpoint, latency: Optional[float]) -> NoReturn:
+        # a missing latency marks a failed request
+        with self._endpoint_lock:
+            endpoint.outstanding -= 1
+            if latency is None:
+                endpoint.failures += 1
+                endpoint.ejected_until = time.monotonic() + self._ejection_time
+            else:
+                endpoint.total_latency += latency
+                endpoint.max_latency = max(endpoint.max_latency, latency)
+                self._latencies.append(latency)
+                self._latency_samples += 1
+                if self._latency_samples % REST_HEDGING_MIN_SAMPLES == 0:
+                    latencies = sorted(self._latencies)
+                    self._hedge_delay = latencies[int(REST_HEDGING_QUANTILE * (len(latencies) - 1))]
+
+    def _has_healthy_endpoint(self) -> bool:
+        now = time.monotonic()
+        return any(endpoint.ejected_until <= now for endpoint in self._endpoints)
+
+    def _post(self, endpoint: RESTEndpoint, data_instance: Text) -> Dict:
+        start_time = time.monotonic()
+        try:
+            response = self._session.post(
+                url=endpoint.url + RASA_REST_ENDPOINT_PARSE,
+                json={'text': data_instance},
+                timeout=self._timeout,
+            )
+            if response.status_code in REST_RETRY_STATUS_CODES:
+                raise _RetryableStatusException(f"Status code {response.status_code} from {endpoint.url}")
+        except Exception:
+            self._release_endpoint(endpoint=endpoint, latency=None)
+            raise
+        self._release_endpoint(endpoint=endpoint, latency=time.monotonic() - start_time)
+
+        if response.status_code != 200:
+            raise Exception(f"Status code {response.status_code} from {endpoint.url}")
+        parsed_output = response.json()
+        if not isinstance(parsed_output, dict) or 'intent' not in parsed_output:
+            raise Exception(f"The response of {endpoint.url} is not a parsed output")
+        return parsed_output
+
+    def _post_with_deadline(self, endpoint: RESTEndpoint, data_instance: Text) -> Dict:
+        # the socket timeout only bounds each read of a response, hence
+        # a request is abandoned once it takes longer than `timeout`
+        future = self._get_request_executor().submit(self._post, endpoint, data_instance)
+        try:
+            return future.result(timeout=self._timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise _RequestTimeoutException(f"No response from {endpoint.url} within {self._timeout}s")
+
+    def _parse_with_retries(self, data_instance: Text, cancelled: Optional[threading.Event] = None) -> Dict:
+        backoff_step = 0
+        for attempt in range(self._retries + 1):
+            endpoint = self._acquire_endpoint()
+            try:
+                return self._post_with_deadline(endpoint=endpoint, data_instance=data_instance)
+            except _RETRYABLE_EXCEPTIONS as e:
+                if attempt == self._retries or (cancelled is not None and cancelled.is_set()):
+                    raise RESTModelLoadException(f"Exception occurred while parsing the RASA REST model. {e}")
+                logger.debug(f"Retrying a failed request to the RASA REST model. {e}")
+                if not self._has_healthy_endpoint():
+                    time.sleep(self._backoff * (2 ** backoff_step))
+                    backoff_step += 1
+            except Exception as e:
+                raise RESTModelLoadException(f"Exception occurred while parsing the RASA REST model. {e}")
+
+    def parse(self, data_instance: Text) -> Dict:
+        """
+        Parses a string with the `/model/parse` endpoint of one of
+        the RASA servers. The response body is decoded once, into the
+        same dictionary that `Interpreter.parse` returns for local models
+
+        Args:
+            data_instance: string to be parsed
+
+        Returns:
+            parsed output of the RASA model
+        """
+        hedge_delay = self._hedge_delay if self._hedging else None
+        if hedge_delay is None:
+            return self._parse_with_retries(data_instance=data_instance)
+
+        executor = self._get_hedge_executor()
+        cancelled = threading.Event()
+        futures = [executor.submit(self._parse_with_retries, data_instance, cancelled)]
+        done, _ = wait(futures, timeout=hedge_delay)
+        if not done:
+            with self._endpoint_lock:
+                self.hedged_requests += 1
+            logger.debug(f"Hedging a REST parse request that took longer than {hedge_delay:.3f}s")
+            futures.append(executor.submit(self._parse_with_retries, data_instance, cancelled))
+
+        # the first successful response wins, and the request only
+        # fails if all of its copies fail. The losing copy is not
+        # retried, and is cancelled if it has not started yet
+        exception = None
+        try:
+            for future in as_completed(futures):
+                try:
+                    return future.result()
+                except RESTModelLoadException as e:
+                    exception = e
+            raise exception
+        finally:
+            cancelled.set()
+            for future in futures:
+                future.cancel()
+
+    def parse_batch(self, data_instances: List[Text]) -> List[Dict]:
+        """
+        Parses a list of strings concurrently
+
+        Args:
+            data_instances: list of strings to be parsed
+
+        Returns:
+            parsed outputs in the same order as the input
+        """
+        if len(data_instances) < 2:
+            return [self.parse(data_instance=data_instance) for data_instance in data_instances]
+        return list(self._get_executor().map(self.parse, data_instances))
+
+    def get_urls(self) -> List[Text]:
+        return [endpoint.url for endpoint in self._endpoints]
+
+    def get_endpoint_stats(self) -> List[Dict]:
+        """
+        Reports the requests, the failures and the latencies
+        in seconds of each endpoint
+
+        Returns:
+            list of dictionaries with 'url', 'requests', 'failures',
+                'mean_latency' and 'max_latency' as keys
+        """
+        with self._endpoint_lock:
+            return [endpoint.get_stats() for endpoint in self._endpoints]
+
+    def get_fingerprints(self) -> Dict[Text, Optional[Text]]:
+        """
+        Fingerprints the model served by each endpoint, using the
+        model fingerprint reported by its `/status` endpoint
+
+        Returns:
+            URL to model fingerprint dictionary. The fingerprint is
+                None if an endpoint does not report its model
+        """
+        from rasa.shared.utils.io import deep_container_fingerprint
+
+        fingerprints = dict()
+        for endpoint in self._endpoints:
+            try:
+                response = self._session.get(url=endpoint.url + RASA_REST_ENDPOINT_STATUS, timeout=self._timeout)
+                response.raise_for_status()
+                model_fingerprint = response.json().get('fingerprint')
+                fingerprints[endpoint.url] = deep_container_fingerprint(model_fingerprint) \
+                    if model_fingerprint else None
+            except Exception as e:
+                logger.debug(f"Failed to retrieve the model status of {endpoint.url}. {e}")
+                fingerprints[endpoint.url] = None
+        return fingerprints
+
+    def close(self) -> NoReturn:
+        with self._executor_lock:
+            executors = [self._executor, self._hedge_executor, self._request_executor]
+            self._executor, self._hedge_executor, self._request_executor = None, None, None
+        for executor in executors:
+            if executor is not None:
+                executor.shutdown(wait=True)
+        self._session.close()
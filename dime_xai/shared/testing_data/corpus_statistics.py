@@ -0,0 +1,151 @@
+import logging
+from typing import List, Text, Dict
+
+import numpy as np
+
+from dime_xai.shared.constants import DEFAULT_MIN_NGRAM_FREQUENCY
+from dime_xai.shared.testing_data.encoded_corpus import EncodedCorpus
+
+logger = logging.getLogger(__name__)
+
+
+class CorpusStatistics:
+    """
+    Term frequencies, document frequencies, per intent
+    frequencies and postings of the tokens, and of the
+    n-grams of up to `max_ngrams` words, of an encoded
+    corpus. All statistics are computed together over the
+    token id array of the corpus, and are looked up by a
+    token to term index dictionary. Postings are stored as
+    a flat array of tags with CSR-style offsets per term.
+    N-grams found in fewer examples than `min_ngram_frequency`
+    are pruned. Term frequencies count the occurrences in the
+    distinct example texts, while the other statistics count
+    the tagged examples
+    """
+
+    def __init__(
+            self,
+            corpus: EncodedCorpus,
+            max_ngrams: int = 1,
+            min_ngram_frequency: int = DEFAULT_MIN_NGRAM_FREQUENCY,
+    ):
+        self._term_index = dict()
+        self._vocabulary = list()
+        self._ngrams = list()
+        self.pruned_ngrams = 0
+
+        example_size = corpus.get_size()
+        intent_size = len(corpus.get_intents())
+        intent_ids = corpus.get_intent_ids().astype(np.int64)
+        token_ids = corpus.get_ids().astype(np.int64)
+        positions = corpus.get_positions().astype(np.int64)
+        distinct_examples = corpus.get_distinct_examples()
+        vocabulary = corpus.get_vocabulary()
+
+        term_frequencies = list()
+        document_frequencies = list()
+        intent_frequencies = list()
+        postings = list()
+        for ngram_size in range(1, max(max_ngrams, 1) + 1):
+            # start positions of the n-grams that
+            # do not span across examples
+            starts = np.flatnonzero(
+                positions[:len(positions) - ngram_size + 1] == positions[ngram_size - 1:]
+            )
+            if not starts.size:
+                break
+            ngram_ids = np.stack([token_ids[starts + index] for index in range(ngram_size)], axis=1)
+            ngram_examples = positions[starts]
+            terms, occurrences = np.unique(ngram_ids, axis=0, return_inverse=True)
+            occurrences = occurrences.reshape(-1)
+            term_size = len(terms)
+
+            term_frequency = np.bincount(occurrences[distinct_examples[ngram_examples]], minlength=term_size)
+            term_intent_frequency = np.bincount(
+                occurrences * intent_size + intent_ids[ngram_examples],
+                minlength=term_size * intent_size,
+            ).reshape(term_size, intent_size)
+            # unique (term, example) pairs, ordered by the term and the tag
+            term_examples = np.unique(occurrences * example_size + ngram_examples)
+            example_terms = term_examples // example_size
+            document_frequency = np.bincount(example_terms, minlength=term_size)
+
+            kept = document_frequency >= (min_ngram_frequency if ngram_size > 1 else 1)
+            self.pruned_ngrams += int(term_size - kept.sum())
+
+            for term in terms[kept].tolist():
+                name = ' '.join(vocabulary[token_id] for token_id in term)
+                self._term_index[name] = len(self._term_index)
+                if ngram_size == 1:
+                    self._vocabulary.append(name)
+                else:
+                    self._ngrams.append(name)
+            term_frequencies.append(term_frequency[kept])
+            document_frequencies.append(document_frequency[kept])
+            intent_frequencies.append(term_intent_frequency[kept])
+            postings.append(term_examples[kept[example_terms]] % example_size)
+
+        self._intents = corpus.get_intents()
+        self._term_frequencies = np.concatenate(term_frequencies) if term_frequencies \
+            else np.empty(0, dtype=np.int64)
+        self._document_frequencies = np.concatenate(document_frequencies) if document_frequencies \
+            else np.empty(0, dtype=np.int64)
+        self._intent_frequencies = np.concatenate(intent_frequencies) if intent_frequencies \
+            else np.empty((0, intent_size), dtype=np.int64)
+        self._postings = np.concatenate(postings).astype(np.int32) if postings \
+            else np.empty(0, dtype=np.int32)
+        self._postings_offsets = np.concatenate([[0], np.cumsum(self._document_frequencies)]).astype(np.int64)
+        self._vocabulary.sort()
+        self._ngrams.sort()
+
+        if self.pruned_ngrams:
+            logger.info(f"Pruned {self.pruned_ngrams} n-grams found in fewer "
+                        f"than {min_ngram_frequency} examples")
+
+    def get_vocabulary(self) -> List[Text]:
+        return self._vocabulary
+
+    def get_ngrams(self) -> List[Text]:
+        return self._ngrams
+
+    def get_term_frequency(self, token: Text) -> int:
+        term = self._term_index.get(token)
+        return int(self._term_frequencies[term]) if term is not None else 0
+
+    def get_document_frequency(self, token: Text) -> int:
+        term = self._term_index.get(token)
+        return int(self._document_frequencies[term]) if term is not None else 0
+
+    def get_intent_frequencies(self, token: Text) -> Dict[Text, int]:
+        """
+        Counts the occurrences of a token, or an n-gram,
+        in the examples of each intent
+
+        Args:
+            token: token or whitespace joined n-gram
+
+        Returns:
+            intent to number of occurrences dictionary
+        """
+        term = self._term_index.get(token)
+        if term is None:
+            return {}
+        return {intent: frequency for intent, frequency
+                in zip(self._intents, self._intent_frequencies[term].tolist()) if frequency}
+
+    def get_postings(self, token: Text) -> List[int]:
+        """
+        Retrieves the tags of the examples that contain
+        a token or an indexed n-gram
+
+        Args:
+            token: token or whitespace joined n-gram
+
+        Returns:
+            list of tags in the ascending order
+        """
+        term = self._term_index.get(token)
+        if term is None:
+            return []
+        return self._postings[self._postings_offsets[term]:self._postings_offsets[term + 1]].tolist()
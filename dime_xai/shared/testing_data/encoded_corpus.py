@@ -0,0 +1,220 @@
+import logging
+from typing import List, Optional, Text, Dict, Union, Tuple
+
+import numpy as np
+
+from dime_xai.utils.text_preprocessing import (
+    tokenize_spans,
+    splice_spans,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class EncodedCorpus:
+    """
+    Integer-encoded representation of a tagged dataset.
+    Tokens of all examples are stored as a flat int32 array
+    of vocabulary ids, sliced per example by CSR-style
+    offsets, along with the character spans of each token
+    and the intent id of each example. Examples are indexed
+    by their tags. A text listed under several intents is
+    tagged once per intent, while the token counts include
+    each distinct text once, as in the testing data tokens
+    """
+
+    def __init__(self, tagged_data: Union[List, Tuple]):
+        self._texts = [instance['example'] for instance in tagged_data]
+        self._intents = sorted({instance['intent'] for instance in tagged_data})
+        intent_index = {intent: intent_id for intent_id, intent in enumerate(self._intents)}
+        self._intent_ids = np.array([intent_index[instance['intent']] for instance in tagged_data], dtype=np.int32)
+
+        self._token_index = dict()
+        token_ids = list()
+        token_spans = list()
+        offsets = [0]
+        for text in self._texts:
+            for start, end in tokenize_spans(text):
+                token_ids.append(self._token_index.setdefault(text[start:end], len(self._token_index)))
+                token_spans.append((start, end))
+            offsets.append(len(token_ids))
+
+        self._vocabulary = list(self._token_index)
+        self._ids = np.array(token_ids, dtype=np.int32)
+        self._offsets = np.array(offsets, dtype=np.int64)
+        self._spans = np.array(token_spans, dtype=np.int32).reshape(-1, 2)
+        # example index of each token position
+        self._positions = np.repeat(np.arange(len(self._texts), dtype=np.int32), np.diff(self._offsets))
+        # first example of each distinct text
+        first_tags = dict()
+        self._distinct = np.array([first_tags.setdefault(text, tag) == tag for tag, text in enumerate(self._texts)],
+                                  dtype=bool)
+
+        logger.debug(f"Encoded {len(self._ids)} tokens of {len(self._texts)} "
+                     f"examples with a vocabulary of {len(self._vocabulary)} tokens")
+
+    def get_size(self) -> int:
+        return len(self._texts)
+
+    def get_token_size(self) -> int:
+        return int(np.diff(self._offsets)[self._distinct].sum())
+
+    def get_vocabulary(self) -> List[Text]:
+        return self._vocabulary
+
+    def get_vocabulary_size(self) -> int:
+        return len(self._vocabulary)
+
+    def get_intents(self) -> List[Text]:
+        return self._intents
+
+    def get_intent_ids(self) -> np.ndarray:
+        return self._intent_ids
+
+    def get_intent(self, tag: int) -> Text:
+        return self._intents[self._intent_ids[tag]]
+
+    def get_text(self, tag: int) -> Text:
+        return self._texts[tag]
+
+    def get_ids(self) -> np.ndarray:
+        return self._ids
+
+    def get_positions(self) -> np.ndarray:
+        return self._positions
+
+    def get_distinct_examples(self) -> np.ndarray:
+        return self._distinct
+
+    def get_distinct_ids(self) -> np.ndarray:
+        return self._ids[self._distinct[self._positions]]
+
+    def get_token_ids(self, tag: int) -> np.ndarray:
+        return self._ids[self._offsets[tag]:self._offsets[tag + 1]]
+
+    def encode(self, token: Text) -> Optional[np.ndarray]:
+        """
+        Encodes a token, or a whitespace joined n-gram,
+        as an array of vocabulary ids
+
+        Args:
+            token: token or whitespace joined n-gram
+
+        Returns:
+            array of vocabulary ids, or None if any word
+                is not in the vocabulary
+        """
+        ids = [self._token_index.get(word) for word in token.split(' ')]
+        if None in ids:
+            return None
+        return np.array(ids, dtype=np.int32)
+
+    def decode(self, token_ids: np.ndarray) -> List[Text]:
+        return [self._vocabulary[token_id] for token_id in token_ids.tolist()]
+
+    def get_term_frequencies(self) -> np.ndarray:
+        """
+        Counts the occurrences of each vocabulary token
+        in the distinct example texts
+
+        Returns:
+            array of token counts indexed by vocabulary id
+        """
+        return np.bincount(self.get_distinct_ids(), minlength=len(self._vocabulary))
+
+    def get_document_frequencies(self) -> np.ndarray:
+        """
+        Counts the tagged examples that contain each vocabulary token
+
+        Returns:
+            array of example counts indexed by vocabulary id
+        """
+        vocabulary_size = len(self._vocabulary)
+        example_tokens = np.unique(self._positions.astype(np.int64) * vocabulary_size + self._ids)
+        return np.bincount(example_tokens % vocabulary_size, minlength=vocabulary_size)
+
+    @staticmethod
+    def _find_occurrences(token_ids: np.ndarray, ngram_ids: np.ndarray) -> np.ndarray:
+        # start positions of all occurrences of an
+        # id sequence within an array of token ids
+        ngram_size = len(ngram_ids)
+        if ngram_size > len(token_ids):
+            return np.empty(0, dtype=np.int64)
+        starts = np.flatnonzero(token_ids[:len(token_ids) - ngram_size + 1] == ngram_ids[0])
+        for index in range(1, ngram_size):
+            starts = starts[token_ids[starts + index] == ngram_ids[index]]
+        return starts
+
+    def get_postings(self, token: Text) -> List[int]:
+        """
+        Retrieves the tags of the examples that contain
+        a token or a whitespace joined n-gram
+
+        Args:
+            token: token or whitespace joined n-gram
+
+        Returns:
+            list of tags in the ascending order
+        """
+        ngram_ids = self.encode(token=token)
+        if ngram_ids is None:
+            return []
+        starts = self._find_occurrences(token_ids=self._ids, ngram_ids=ngram_ids)
+        # n-grams do not span across examples
+        starts = starts[self._positions[starts] == self._positions[starts + len(ngram_ids) - 1]]
+        return np.unique(self._positions[starts]).tolist()
+
+    def remove_token(self, tag: int, token: Text) -> Text:
+        """
+        Removes all occurrences of a token, or a whitespace
+        joined n-gram, from an example. Occurrences are found
+        by masking the example's vocabulary ids, and their
+        character spans are spliced out of the original text
+
+        Args:
+            tag: tag of the example
+            token: token or whitespace joined n-gram to be removed
+
+        Returns:
+            token removed example text
+        """
+        text = self._texts[tag]
+        ngram_ids = self.encode(token=token)
+        if ngram_ids is None:
+            return text
+
+        starts = self._find_occurrences(token_ids=self.get_token_ids(tag=tag), ngram_ids=ngram_ids)
+        if not starts.size:
+            return text
+
+        # overlapping occurrences of repeated words are
+        # removed from left to right, as in regex substitution
+        ngram_size = len(ngram_ids)
+        removed_spans = list()
+        next_start = 0
+        example_spans = self._spans[self._offsets[tag]:self._offsets[tag + 1]]
+        for start in starts.tolist():
+            if start < next_start:
+                continue
+            removed_spans.append((int(example_spans[start][0]), int(example_spans[start + ngram_size - 1][1])))
+            next_start = start + ngram_size
+        return splice_spans(instance=text, spans=removed_spans)
+
+    def remove_token_from_examples(self, tags: List[int], token: Text) -> List[Dict]:
+        """
+        Removes a token, or a whitespace joined n-gram,
+        from the given examples
+
+        Args:
+            tags: tags of the examples
+            token: token or whitespace joined n-gram to be removed
+
+        Returns:
+            list of token removed examples as dicts with
+                'tag', 'intent', and 'example' as keys
+        """
+        return [{
+            'tag': tag,
+            'intent': self.get_intent(tag=tag),
+            'example': self.remove_token(tag=tag, token=token),
+        } for tag in tags]
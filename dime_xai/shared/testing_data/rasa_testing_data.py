@@ -1,7 +1,7 @@
 import logging
 import os
-from copy import deepcopy
-from typing import List, Optional, Text, NoReturn, Union, Dict
+from types import MappingProxyType
+from typing import List, Optional, Text, NoReturn, Union, Dict, Tuple
 
 import pandas as pd
 from rasa.shared.data import get_data_files, is_nlu_file
@@ -12,21 +12,26 @@ from rasa.shared.nlu.training_data.training_data import TrainingData
 from dime_xai.shared.constants import (
     DEFAULT_CASE_SENSITIVE_MODE,
     DEFAULT_DATAFRAME_MODE,
+    DEFAULT_NGRAMS_MODE,
+    DEFAULT_MIN_NGRAMS,
+    DEFAULT_MAX_NGRAMS,
+    DEFAULT_MIN_NGRAM_FREQUENCY,
     NLU_FALLBACK_TAG,
 )
 from dime_xai.shared.exceptions.dime_core_exceptions import NLUDataTaggingException
 from dime_xai.shared.exceptions.dime_io_exceptions import EmptyNLUDatasetException
+from dime_xai.shared.testing_data.corpus_statistics import CorpusStatistics
+from dime_xai.shared.testing_data.encoded_corpus import EncodedCorpus
 from dime_xai.shared.testing_data.testing_data import TestingData
-from dime_xai.utils.fingerprint import generate_dataset_fingerprint
+from dime_xai.utils.fingerprint import (
+    generate_dataset_fingerprint,
+    generate_example_fingerprint,
+)
 from dime_xai.utils.io import (
     get_rasa_testing_data,
     get_unique_list,
 )
-from dime_xai.utils.text_preprocessing import (
-    bag_of_words,
-    get_all_tokens,
-    lowercase_list,
-)
+from dime_xai.utils.text_preprocessing import lowercase_list
 
 logger = logging.getLogger(__name__)
 
@@ -37,9 +42,17 @@ class RASATestingData(TestingData):
             testing_data_dir: Text = None,
             case_sensitive: bool = DEFAULT_CASE_SENSITIVE_MODE,
             from_rasa: bool = False,
+            ngrams: bool = DEFAULT_NGRAMS_MODE,
+            min_ngrams: int = DEFAULT_MIN_NGRAMS,
+            max_ngrams: int = DEFAULT_MAX_NGRAMS,
+            min_ngram_frequency: int = DEFAULT_MIN_NGRAM_FREQUENCY,
     ):
         super().__init__(testing_data_dir, case_sensitive)
         self._from_rasa = from_rasa
+        self.ngrams = ngrams
+        self.min_ngrams = min_ngrams if ngrams else 1
+        self.max_ngrams = max_ngrams if ngrams else 1
+        self.min_ngram_frequency = min_ngram_frequency
         self._initialize_testing_data()
 
     # a rasa method, extracted, to validate
@@ -65,27 +78,34 @@ class RASATestingData(TestingData):
         return training_data
 
     @staticmethod
-    def _tag_examples(testing_data: Dict) -> List:
+    def _tag_examples(testing_data: Dict) -> Tuple:
         logger.info(f"Tagging examples in the dataset...")
 
+        # tagged examples are read-only records, so they can be
+        # shared with callers without copying the whole dataset
+
+        # tags must not change between processes, since cached
+        # model outputs and checkpoints are matched by tag. Intents
+        # are sorted and duplicate examples are dropped in the order
+        # of the dataset, instead of relying on the set order
         examples = testing_data
         tagged_examples = list()
         tag = 0
 
-        for intent, instances in examples.items():
-            unique_instances = list(set(instances))
+        for intent in sorted(examples):
+            unique_instances = list(dict.fromkeys(examples[intent]))
             for instance in unique_instances:
                 tagged_instance = dict()
                 tagged_instance['tag'] = tag
                 tagged_instance['intent'] = intent
                 tagged_instance['example'] = instance
-                tagged_examples.append(tagged_instance)
+                tagged_examples.append(MappingProxyType(tagged_instance))
                 tag += 1
 
         if not tagged_examples:
             raise NLUDataTaggingException(f"Tagged dataset is empty")
 
-        return tagged_examples
+        return tuple(tagged_examples)
 
     def _initialize_testing_data(self) -> NoReturn:
         if self._from_rasa:
@@ -121,15 +141,15 @@ class RASATestingData(TestingData):
             raise EmptyNLUDatasetException("Failed to retrieve testing data")
 
         self._tagged_testing_data = self._tag_examples(self._testing_data)
-
-        all_instances = self.get_instances()
-        dataset_vocabulary = bag_of_words(
-            instances=all_instances,
-            merge=True
+        self._corpus = EncodedCorpus(tagged_data=self._tagged_testing_data)
+        self._statistics = CorpusStatistics(
+            corpus=self._corpus,
+            max_ngrams=self.max_ngrams,
+            min_ngram_frequency=self.min_ngram_frequency,
         )
-        self._vocabulary = sorted(get_unique_list(dataset_vocabulary)) if dataset_vocabulary else []
+
+        self._vocabulary = self._statistics.get_vocabulary()
         self._vocabulary_size = len(self._vocabulary)
-        self._tokens = get_all_tokens(instances=all_instances, merge=True)
         self._fingerprint = self._rasa_testing_data.fingerprint() if self._from_rasa else \
             generate_dataset_fingerprint(self._testing_data)
         logger.info(f"Testing data fingerprint: {self._rasa_testing_data.fingerprint()}")
@@ -137,6 +157,8 @@ class RASATestingData(TestingData):
         logger.info(f'Total number of intents: {self.get_intent_size()}')
         logger.info(f'Total number of data instances: {self.get_instance_size()}')
         logger.info(f'Vocabulary size: {self._vocabulary_size}')
+        if self.ngrams:
+            logger.info(f'Number of indexed n-grams: {len(self._statistics.get_ngrams())}')
 
     def get_testing_data(
             self,
@@ -165,17 +187,17 @@ class RASATestingData(TestingData):
     def get_tagged_data(
             self,
             as_dataframe: bool = DEFAULT_DATAFRAME_MODE,
-    ) -> Union[List, pd.DataFrame]:
+    ) -> Union[Tuple, pd.DataFrame]:
         tagged_data = self._tagged_testing_data
 
         if as_dataframe:
-            dataset = pd.DataFrame(data=tagged_data)
+            dataset = pd.DataFrame(data=[dict(instance) for instance in tagged_data])
             dataset.drop_duplicates(inplace=True)
             dataset.reset_index(inplace=True)
             dataset.drop(columns=['index'], inplace=True)
             return dataset
         else:
-            return deepcopy(tagged_data)
+            return tagged_data
 
     def get_instances(
             self,
@@ -213,10 +235,10 @@ class RASATestingData(TestingData):
         return len(self._testing_data.keys())
 
     def get_tokens(self) -> Optional[List]:
-        return self._tokens
+        return self._corpus.decode(token_ids=self._corpus.get_distinct_ids())
 
     def get_token_size(self) -> Optional[int]:
-        return len(self._tokens)
+        return self._corpus.get_token_size()
 
     def get_vocabulary(self) -> Optional[List]:
         return self._vocabulary
@@ -225,5 +247,56 @@ class RASATestingData(TestingData):
         vocabulary = self.get_vocabulary()
         return len(vocabulary)
 
+    def get_ngram_vocabulary(self) -> List:
+        """
+        Retrieves the unigrams and the indexed n-grams with
+        `min_ngrams` to `max_ngrams` words. Same as the vocabulary
+        if n-grams are disabled
+
+        Returns:
+            sorted list of tokens and n-grams
+        """
+        if not self.ngrams:
+            return self.get_vocabulary()
+
+        vocabulary = self.get_vocabulary() if self.min_ngrams <= 1 else []
+        ngram_vocabulary = [ngram for ngram in self._statistics.get_ngrams()
+                            if self.min_ngrams <= len(ngram.split(' ')) <= self.max_ngrams]
+        return sorted(vocabulary + ngram_vocabulary)
+
+    def get_token_count(self, token: Text) -> int:
+        return self._statistics.get_term_frequency(token=token)
+
+    def get_document_frequency(self, token: Text) -> int:
+        return self._statistics.get_document_frequency(token=token)
+
+    def get_intent_frequencies(self, token: Text) -> Dict[Text, int]:
+        return self._statistics.get_intent_frequencies(token=token)
+
+    def get_encoded_corpus(self) -> EncodedCorpus:
+        return self._corpus
+
+    def get_corpus_statistics(self) -> CorpusStatistics:
+        return self._statistics
+
+    def get_token_postings(self, token: Text) -> List:
+        return self._statistics.get_postings(token=token)
+
+    def get_example_hashes(self) -> List[Text]:
+        """
+        Retrieves content fingerprints of the tagged examples.
+        Fingerprints are generated on the first call and are
+        listed in the tag order
+
+        Returns:
+            list of example fingerprints indexed by tag
+        """
+        if self._example_hashes is None:
+            self._example_hashes = [
+                generate_example_fingerprint(intent=instance['intent'], example=instance['example'])
+                for instance in self._tagged_testing_data
+            ]
+        return self._example_hashes
+
     def get_fingerprint(self) -> Optional[Text]:
         return self._fingerprint
@@ -18,8 +18,10 @@ class TestingData:
         self._testing_data_dir = testing_data_dir
         self._testing_data = None
         self._tagged_testing_data = None
-        self._tokens = list()
+        self._corpus = None
         self._vocabulary = list()
+        self._statistics = None
+        self._example_hashes = None
         self._fingerprint = None
         self.case_sensitive = case_sensitive
 
@@ -1,8 +1,29 @@
+import json
 import logging
-from typing import Text, NoReturn
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import closing
+from typing import Text, NoReturn, Any, Optional, Dict, Tuple, List, Set, Iterable
 
-from dime_xai.shared.constants import DEFAULT_CACHE_PATH
-from dime_xai.utils.io import _create_cache_dir
+from dime_xai.shared.constants import (
+    DEFAULT_CACHE_PATH,
+    DEFAULT_PREDICTION_CACHE_SIZE,
+    EXPLANATION_CACHE,
+    INIT_OUTPUT_CACHE_TABLE,
+    PREDICTION_CACHE_TABLE,
+    FEATURE_SPACE_FINGERPRINT_SUFFIX,
+    GLOBAL_SCORE_CACHE_TABLE,
+    INCREMENTAL_EXAMPLE_TABLE,
+    INCREMENTAL_CONTRIBUTION_TABLE,
+    INCREMENTAL_SCORE_TABLE,
+)
+from dime_xai.shared.exceptions.dime_core_exceptions import DIMECacheException
+from dime_xai.utils.io import (
+    _create_cache_dir,
+    get_timestamp_str,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -26,9 +47,473 @@ def initialize_cache_dir(
 
 class DIMECache:
     """
-    DIME cache container
+    DIME cache container. Persists initial model outputs,
+    perturbed predictions and global feature importance
+    scores in a SQLite database inside the cache directory,
+    keyed by the model and data fingerprints and a config hash
     """
 
-    def __init__(self, cache_dir: Text = DEFAULT_CACHE_PATH):
+    # sqlite limits the number of host parameters per query
+    _MAX_QUERY_PARAMS = 900
+
+    def __init__(
+            self,
+            cache_dir: Text = DEFAULT_CACHE_PATH,
+            model_fingerprint: Text = None,
+            data_fingerprint: Text = None,
+    ):
         self.cache_dir = cache_dir
         initialize_cache_dir(cache_dir)
+        self.cache_file = os.path.join(cache_dir, EXPLANATION_CACHE)
+        self.model_fingerprint = model_fingerprint
+        self.data_fingerprint = data_fingerprint
+        self._create_tables()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.cache_file, timeout=30)
+
+    def _create_tables(self) -> NoReturn:
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute('PRAGMA journal_mode=WAL;')
+                conn.execute(f'CREATE TABLE IF NOT EXISTS {INIT_OUTPUT_CACHE_TABLE} '
+                             f'(cache_key TEXT PRIMARY KEY, '
+                             f'payload TEXT NOT NULL, '
+                             f'timestamp TEXT);')
+                conn.execute(f'CREATE TABLE IF NOT EXISTS {PREDICTION_CACHE_TABLE} '
+                             f'(model_fingerprint TEXT NOT NULL, '
+                             f'text TEXT NOT NULL, '
+                             f'payload TEXT NOT NULL, '
+                             f'PRIMARY KEY (model_fingerprint, text));')
+                conn.execute(f'CREATE TABLE IF NOT EXISTS {GLOBAL_SCORE_CACHE_TABLE} '
+                             f'(cache_key TEXT NOT NULL, '
+                             f'token TEXT NOT NULL, '
+                             f'score REAL NOT NULL, '
+                             f'final INTEGER NOT NULL DEFAULT 1, '
+                             f'PRIMARY KEY (cache_key, token));')
+                conn.execute(f'CREATE TABLE IF NOT EXISTS {INCREMENTAL_EXAMPLE_TABLE} '
+                             f'(run_key TEXT NOT NULL, '
+                             f'example_hash TEXT NOT NULL, '
+                             f'PRIMARY KEY (run_key, example_hash));')
+                conn.execute(f'CREATE TABLE IF NOT EXISTS {INCREMENTAL_CONTRIBUTION_TABLE} '
+                             f'(run_key TEXT NOT NULL, '
+                             f'example_hash TEXT NOT NULL, '
+                             f'token TEXT NOT NULL, '
+                             f'contribution REAL NOT NULL, '
+                             f'PRIMARY KEY (run_key, example_hash, token));')
+                conn.execute(f'CREATE TABLE IF NOT EXISTS {INCREMENTAL_SCORE_TABLE} '
+                             f'(run_key TEXT NOT NULL, '
+                             f'token TEXT NOT NULL, '
+                             f'score REAL NOT NULL, '
+                             f'PRIMARY KEY (run_key, token));')
+            logger.debug(f"DIME explanation cache was initialized at {self.cache_file}")
+        except Exception as e:
+            raise DIMECacheException(e)
+
+    @staticmethod
+    def _to_json(payload: Any) -> Text:
+        return json.dumps(
+            payload,
+            ensure_ascii=False,
+            default=lambda value: value.item() if hasattr(value, 'item') else str(value)
+        )
+
+    def get_cache_key(self, config: Dict = None) -> Text:
+        """
+        Generates a cache key from the model fingerprint,
+        the data fingerprint and the given config
+
+        Args:
+            config: explanation configs that affect the cached values
+
+        Returns:
+            cache key as a string
+        """
+        from rasa.shared.utils.io import deep_container_fingerprint
+        return deep_container_fingerprint([
+            self.model_fingerprint,
+            self.data_fingerprint,
+            config or {},
+        ])
+
+    def load_init_output(self, config: Dict = None) -> Optional[List]:
+        """
+        Loads the cached initial model output
+
+        Args:
+            config: explanation configs that affect the initial model output
+
+        Returns:
+            initial model output, or None if it was not cached
+        """
+        try:
+            with closing(self._connect()) as conn:
+                row = conn.execute(
+                    f'SELECT payload FROM {INIT_OUTPUT_CACHE_TABLE} WHERE cache_key = ?',
+                    (self.get_cache_key(config),)
+                ).fetchone()
+            return json.loads(row[0]) if row else None
+        except Exception as e:
+            raise DIMECacheException(e)
+
+    def save_init_output(self, init_output: List, config: Dict = None) -> NoReturn:
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    f'INSERT OR REPLACE INTO {INIT_OUTPUT_CACHE_TABLE} VALUES (?, ?, ?)',
+                    (self.get_cache_key(config), self._to_json(init_output), get_timestamp_str(sep="-"))
+                )
+        except Exception as e:
+            raise DIMECacheException(e)
+
+    def _get_prediction_fingerprint(self, feature_space: bool = False) -> Text:
+        if feature_space:
+            return f"{self.model_fingerprint}{FEATURE_SPACE_FINGERPRINT_SUFFIX}"
+        return self.model_fingerprint
+
+    def load_predictions(self, texts: List[Text], feature_space: bool = False) -> Dict:
+        """
+        Loads cached raw predictions made by the
+        fingerprinted model for the given texts
+
+        Args:
+            texts: normalized texts
+            feature_space: loads the predictions of the examples
+                perturbed in the feature space, which are kept apart
+                from the predictions of the texts
+
+        Returns:
+            text to raw prediction dictionary for the cached texts
+        """
+        predictions = dict()
+        texts = list(set(texts))
+        try:
+            with closing(self._connect()) as conn:
+                for start in range(0, len(texts), self._MAX_QUERY_PARAMS):
+                    chunk = texts[start:start + self._MAX_QUERY_PARAMS]
+                    rows = conn.execute(
+                        f'SELECT text, payload FROM {PREDICTION_CACHE_TABLE} '
+                        f'WHERE model_fingerprint = ? AND text IN ({", ".join("?" * len(chunk))})',
+                        (self._get_prediction_fingerprint(feature_space=feature_space), *chunk)
+                    ).fetchall()
+                    predictions.update({text: json.loads(payload) for text, payload in rows})
+            return predictions
+        except Exception as e:
+            raise DIMECacheException(e)
+
+    def save_predictions(self, predictions: Dict, feature_space: bool = False) -> NoReturn:
+        if not predictions:
+            return
+        model_fingerprint = self._get_prediction_fingerprint(feature_space=feature_space)
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.executemany(
+                    f'INSERT OR REPLACE INTO {PREDICTION_CACHE_TABLE} VALUES (?, ?, ?)',
+                    [(model_fingerprint, text, self._to_json(prediction))
+                     for text, prediction in predictions.items()]
+                )
+        except Exception as e:
+            raise DIMECacheException(e)
+
+    def load_global_scores(self, config: Dict = None, include_partial: bool = False) -> Dict:
+        """
+        Loads the cached global feature importance scores
+
+        Args:
+            config: explanation configs that affect the global scores
+            include_partial: if True, scores checkpointed by an
+                unfinished global run are also loaded
+
+        Returns:
+            token to global feature importance score dictionary
+        """
+        try:
+            with closing(self._connect()) as conn:
+                rows = conn.execute(
+                    f'SELECT token, score FROM {GLOBAL_SCORE_CACHE_TABLE} '
+                    f'WHERE cache_key = ? AND final >= ?',
+                    (self.get_cache_key(config), 0 if include_partial else 1)
+                ).fetchall()
+            return {token: score for token, score in rows}
+        except Exception as e:
+            raise DIMECacheException(e)
+
+    def save_global_scores(self, scores: Dict, config: Dict = None, final: bool = True) -> NoReturn:
+        """
+        Saves global feature importance scores. Scores of an
+        unfinished global run are saved as partial checkpoints
+
+        Args:
+            scores: token to global feature importance score dictionary
+            config: explanation configs that affect the global scores
+            final: False if the scores are a checkpoint of an
+                unfinished global run
+
+        Returns:
+            no return
+        """
+        if not scores:
+            return
+        cache_key = self.get_cache_key(config)
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.executemany(
+                    f'INSERT OR REPLACE INTO {GLOBAL_SCORE_CACHE_TABLE} VALUES (?, ?, ?, ?)',
+                    [(cache_key, token, float(score), int(final)) for token, score in scores.items()]
+                )
+        except Exception as e:
+            raise DIMECacheException(e)
+
+    def finalize_global_scores(self, config: Dict = None) -> NoReturn:
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    f'UPDATE {GLOBAL_SCORE_CACHE_TABLE} SET final = 1 WHERE cache_key = ? AND final = 0',
+                    (self.get_cache_key(config),)
+                )
+        except Exception as e:
+            raise DIMECacheException(e)
+
+    def clear_partial_global_scores(self, config: Dict = None) -> NoReturn:
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    f'DELETE FROM {GLOBAL_SCORE_CACHE_TABLE} WHERE cache_key = ? AND final = 0',
+                    (self.get_cache_key(config),)
+                )
+        except Exception as e:
+            raise DIMECacheException(e)
+
+    def get_run_key(self, config: Dict = None) -> Text:
+        """
+        Generates a cache key for incremental runs. Unlike
+        `get_cache_key`, the key does not depend on the data
+        fingerprint, so that a run can be compared against the
+        previous run on an older version of the dataset
+
+        Args:
+            config: explanation configs that affect the cached values
+
+        Returns:
+            run key as a string
+        """
+        from rasa.shared.utils.io import deep_container_fingerprint
+        return deep_container_fingerprint([
+            self.model_fingerprint,
+            config or {},
+        ])
+
+    def load_incremental_state(self, config: Dict = None) -> Optional[Tuple[Set[Text], Dict]]:
+        """
+        Loads the example fingerprints and the global feature
+        importance scores of the previous incremental run made
+        with the same model and configs
+
+        Args:
+            config: explanation configs that affect the global scores
+
+        Returns:
+            set of example fingerprints and a token to global
+                score dictionary of the previous run, or None if
+                there is no previous run
+        """
+        run_key = self.get_run_key(config)
+        try:
+            with closing(self._connect()) as conn:
+                example_hashes = {row[0] for row in conn.execute(
+                    f'SELECT example_hash FROM {INCREMENTAL_EXAMPLE_TABLE} WHERE run_key = ?',
+                    (run_key,)
+                )}
+                if not example_hashes:
+                    return None
+                scores = {token: score for token, score in conn.execute(
+                    f'SELECT token, score FROM {INCREMENTAL_SCORE_TABLE} WHERE run_key = ?',
+                    (run_key,)
+                )}
+            return example_hashes, scores
+        except Exception as e:
+            raise DIMECacheException(e)
+
+    def load_contribution_totals(self, example_hashes: Iterable[Text], config: Dict = None) -> Dict:
+        """
+        Sums the persisted per example global score
+        contributions of the given examples by token
+
+        Args:
+            example_hashes: example fingerprints
+            config: explanation configs that affect the global scores
+
+        Returns:
+            token to total contribution dictionary
+        """
+        run_key = self.get_run_key(config)
+        example_hashes = list(example_hashes)
+        totals = dict()
+        try:
+            with closing(self._connect()) as conn:
+                for start in range(0, len(example_hashes), self._MAX_QUERY_PARAMS):
+                    chunk = example_hashes[start:start + self._MAX_QUERY_PARAMS]
+                    rows = conn.execute(
+                        f'SELECT token, SUM(contribution) FROM {INCREMENTAL_CONTRIBUTION_TABLE} '
+                        f'WHERE run_key = ? AND example_hash IN ({", ".join("?" * len(chunk))}) '
+                        f'GROUP BY token',
+                        (run_key, *chunk)
+                    ).fetchall()
+                    for token, total in rows:
+                        totals[token] = totals.get(token, 0.0) + total
+            return totals
+        except Exception as e:
+            raise DIMECacheException(e)
+
+    def save_incremental_state(
+            self,
+            example_hashes: Iterable[Text],
+            scores: Dict,
+            contributions: List[Tuple[Text, Text, float]],
+            removed_hashes: Iterable[Text],
+            config: Dict = None,
+    ) -> NoReturn:
+        """
+        Replaces the persisted incremental run with the current
+        run. Contributions of the removed examples are dropped
+
+        Args:
+            example_hashes: fingerprints of the current examples
+            scores: token to global score dictionary
+            contributions: list of (example fingerprint, token,
+                contribution) tuples of the newly parsed examples
+            removed_hashes: fingerprints of the examples removed
+                since the previous run
+            config: explanation configs that affect the global scores
+
+        Returns:
+            no return
+        """
+        run_key = self.get_run_key(config)
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.executemany(
+                    f'DELETE FROM {INCREMENTAL_CONTRIBUTION_TABLE} WHERE run_key = ? AND example_hash = ?',
+                    [(run_key, example_hash) for example_hash in removed_hashes]
+                )
+                conn.executemany(
+                    f'INSERT OR REPLACE INTO {INCREMENTAL_CONTRIBUTION_TABLE} VALUES (?, ?, ?, ?)',
+                    [(run_key, example_hash, token, float(contribution))
+                     for example_hash, token, contribution in contributions]
+                )
+                conn.execute(f'DELETE FROM {INCREMENTAL_EXAMPLE_TABLE} WHERE run_key = ?', (run_key,))
+                conn.executemany(
+                    f'INSERT OR IGNORE INTO {INCREMENTAL_EXAMPLE_TABLE} VALUES (?, ?)',
+                    [(run_key, example_hash) for example_hash in example_hashes]
+                )
+                conn.execute(f'DELETE FROM {INCREMENTAL_SCORE_TABLE} WHERE run_key = ?', (run_key,))
+                conn.executemany(
+                    f'INSERT OR REPLACE INTO {INCREMENTAL_SCORE_TABLE} VALUES (?, ?, ?)',
+                    [(run_key, token, float(score)) for token, score in scores.items()]
+                )
+        except Exception as e:
+            raise DIMECacheException(e)
+
+
+class PredictionCache:
+    """
+    Bounded in-memory cache for raw model predictions.
+    Predictions are keyed by the model fingerprint and
+    the whitespace-normalized text, and the least
+    recently used predictions are evicted first
+    """
+
+    def __init__(self, max_size: int = DEFAULT_PREDICTION_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._predictions = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(text: Text) -> Text:
+        """
+        Normalizes a text before using it as a cache key.
+        Collapses repeated whitespaces and strips the text
+
+        Args:
+            text: text to be normalized
+
+        Returns:
+            normalized text
+        """
+        return " ".join(text.split()) if text else ""
+
+    def _key(self, model_fingerprint: Optional[Text], text: Text) -> Tuple:
+        return model_fingerprint, self.normalize(text)
+
+    def get(self, model_fingerprint: Optional[Text], text: Text) -> Optional[Any]:
+        """
+        Retrieves a cached prediction and marks it
+        as the most recently used prediction
+
+        Args:
+            model_fingerprint: fingerprint of the model that
+                made the prediction
+            text: parsed text
+
+        Returns:
+            cached prediction, or None on a cache miss
+        """
+        if not self.max_size:
+            self.misses += 1
+            return None
+
+        key = self._key(model_fingerprint, text)
+        with self._lock:
+            prediction = self._predictions.get(key)
+            if prediction is None:
+                self.misses += 1
+                return None
+            self._predictions.move_to_end(key)
+            self.hits += 1
+            return prediction
+
+    def put(self, model_fingerprint: Optional[Text], text: Text, prediction: Any) -> NoReturn:
+        """
+        Caches a prediction and evicts the least recently used
+        predictions when the cache exceeds its maximum size
+
+        Args:
+            model_fingerprint: fingerprint of the model that
+                made the prediction
+            text: parsed text
+            prediction: raw model prediction
+
+        Returns:
+            no return
+        """
+        if not self.max_size or prediction is None:
+            return
+
+        key = self._key(model_fingerprint, text)
+        with self._lock:
+            self._predictions[key] = prediction
+            self._predictions.move_to_end(key)
+            while len(self._predictions) > self.max_size:
+                self._predictions.popitem(last=False)
+
+    def clear(self) -> NoReturn:
+        with self._lock:
+            self._predictions.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> Dict:
+        """
+        Returns the cache statistics
+
+        Returns:
+            dictionary with 'hits', 'misses', 'size' and 'max_size'
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._predictions),
+            'max_size': self.max_size,
+        }
@@ -1,7 +1,7 @@
 import logging
 import os
 from collections import OrderedDict as OrderedDictColl
-from typing import Optional, Dict, Text, List
+from typing import Optional, Dict, Text, List, NoReturn
 
 from dime_xai.shared.constants import (
     DEFAULT_CONFIG_FILE_PATH,
@@ -13,6 +13,8 @@ from dime_xai.shared.constants import (
     MODEL_MODE_LOCAL,
     DEFAULT_RANKING_LENGTH,
     DEFAULT_MAX_NGRAMS,
+    DEFAULT_MIN_NGRAM_FREQUENCY,
+    MAX_NGRAMS,
     OUTPUT_MODE_DUAL,
     OUTPUT_MODE_GLOBAL,
     LANGUAGES_SUPPORTED,
@@ -154,7 +156,14 @@ def get_init_configs(
                     if len(subkey_list) > 1:
                         props[subkey_list[0]] = subkey_list[1:]
 
-            if None in sub_keys or sorted(sub_keys) != sorted(list(DIMEConfig.MAIN_CONFIG_KEYS[key])):
+            if key in DIMEConfig.OPTIONAL_MAIN_KEYS:
+                invalid_keys = [invalid_key for invalid_key in
+                                set(sub_keys).difference((DIMEConfig.MAIN_CONFIG_KEYS[key])) if invalid_key]
+                if None in sub_keys or invalid_keys:
+                    raise InvalidSubKeyException(f"Invalid configs were found under '{key}' key in the "
+                                                 f"'dime_config.yml' file. "
+                                                 f"\nInvalid Keys: {', '.join(invalid_keys)}")
+            elif None in sub_keys or sorted(sub_keys) != sorted(list(DIMEConfig.MAIN_CONFIG_KEYS[key])):
                 missing_keys = set(DIMEConfig.MAIN_CONFIG_KEYS[key]).difference(set(sub_keys))
                 invalid_keys = [invalid_key for invalid_key in
                                 set(sub_keys).difference((DIMEConfig.MAIN_CONFIG_KEYS[key])) if invalid_key]
@@ -168,7 +177,8 @@ def get_init_configs(
                 for k, v in props.items():
                     if k in DIMEConfig.BASE_CONFIG_PROPS:
                         for prop in v:
-                            if prop not in DIMEConfig.BASE_CONFIG_PROPS[k]:
+                            if prop not in DIMEConfig.BASE_CONFIG_PROPS[k] and \
+                                    prop not in DIMEConfig.OPTIONAL_BASE_CONFIG_PROPS.get(k, []):
                                 raise InvalidConfigPropertyException(f"Invalid config property '{prop}' "
                                                                      f"specified under subkey '{k}'")
                     else:
@@ -337,6 +347,13 @@ def get_init_configs(
                     raise InvalidConfigValueException(f"'{DIMEConfig.SUB_KEY_BASE_MODEL_MODE}' must be either "
                                                       f"'{MODEL_MODE_REST}' or '{MODEL_MODE_LOCAL}'")
 
+                url_endpoint = key_content_dict[DIMEConfig.SUB_KEY_BASE_URL_ENDPOINT]
+                if not isinstance(url_endpoint, str) and not (
+                        isinstance(url_endpoint, list) and url_endpoint
+                        and all(isinstance(url, str) for url in url_endpoint)):
+                    raise InvalidConfigValueException(f"'{DIMEConfig.SUB_KEY_BASE_URL_ENDPOINT}' must be a URL "
+                                                      f"or a list of URLs")
+
                 if not isinstance(key_content_dict[DIMEConfig.SUB_KEY_BASE_RANKING_LENGTH], int):
                     raise InvalidConfigValueException(f"'{DIMEConfig.SUB_KEY_BASE_RANKING_LENGTH}' must be a "
                                                       f"positive Integer not greater than "
@@ -373,14 +390,21 @@ def get_init_configs(
 
                     if key_content_dict[DIMEConfig.SUB_KEY_BASE_NGRAMS_MIN] > \
                             key_content_dict[DIMEConfig.SUB_KEY_BASE_NGRAMS_MAX] or \
-                            not 0 < key_content_dict[DIMEConfig.SUB_KEY_BASE_NGRAMS_MIN] <= DEFAULT_MAX_NGRAMS or \
-                            not 0 < key_content_dict[DIMEConfig.SUB_KEY_BASE_NGRAMS_MAX] <= DEFAULT_MAX_NGRAMS:
+                            not 0 < key_content_dict[DIMEConfig.SUB_KEY_BASE_NGRAMS_MIN] <= MAX_NGRAMS or \
+                            not 0 < key_content_dict[DIMEConfig.SUB_KEY_BASE_NGRAMS_MAX] <= MAX_NGRAMS:
                         raise InvalidConfigValueException(f"'{DIMEConfig.SUB_KEY_BASE_NGRAMS_MIN}' and "
                                                           f"'{DIMEConfig.SUB_KEY_BASE_NGRAMS_MAX}' should be positive "
-                                                          f"Integers not lower than {DEFAULT_MAX_NGRAMS} and "
+                                                          f"Integers not greater than {MAX_NGRAMS} and "
                                                           f"'{DIMEConfig.SUB_KEY_BASE_NGRAMS_MIN}' should not exceed "
                                                           f"'{DIMEConfig.SUB_KEY_BASE_NGRAMS_MAX}'")
 
+                key_content_dict.setdefault(DIMEConfig.SUB_KEY_BASE_NGRAMS_MIN_FREQUENCY, DEFAULT_MIN_NGRAM_FREQUENCY)
+                min_ngram_frequency = key_content_dict[DIMEConfig.SUB_KEY_BASE_NGRAMS_MIN_FREQUENCY]
+                if not isinstance(min_ngram_frequency, int) or isinstance(min_ngram_frequency, bool) or \
+                        min_ngram_frequency < 1:
+                    raise InvalidConfigValueException(f"'{DIMEConfig.SUB_KEY_BASE_NGRAMS_MIN_FREQUENCY}' "
+                                                      f"should be a positive Integer")
+
                 if not isinstance(key_content_dict[DIMEConfig.SUB_KEY_BASE_CASE_SENSITIVITY], bool):
                     raise InvalidDataTypeException(f"'{DIMEConfig.SUB_KEY_BASE_CASE_SENSITIVITY}' must be either True "
                                                    f"or False")
@@ -428,8 +452,15 @@ def get_init_configs(
                     logger.warning(f"DIME CLI output mode has been set to '{OUTPUT_MODE_GLOBAL}'."
                                    f"Any data instances specified will be discarded.")
 
+            elif key == DIMEConfig.MAIN_KEY_PERFORMANCE:
+                key_content_dict = get_performance_configs(performance_configs=key_content_dict)
+
             config_content[key] = key_content_dict
 
+        # optional main keys take default values if not specified
+        if DIMEConfig.MAIN_KEY_PERFORMANCE not in config_content:
+            config_content[DIMEConfig.MAIN_KEY_PERFORMANCE] = dict(DIMEConfig.PERFORMANCE_CONFIG_DEFAULTS)
+
         # sanity check in main keys
         if not config_content:
             raise DIMEConfigException("Retrieved configurations are empty.")
@@ -460,6 +491,81 @@ def get_init_configs(
         logger.error(f"{e}")
 
 
+def get_performance_configs(performance_configs: Optional[Dict]) -> Dict:
+    """
+    Merges partially specified performance configs, e.g. the
+    ones of a DIME server request, with the default values
+    and validates them
+
+    Args:
+        performance_configs: performance configs, or
+            None to use the default values
+
+    Returns:
+        performance configs with all sub keys
+    """
+    performance_configs = performance_configs or dict()
+    if not isinstance(performance_configs, dict):
+        raise InvalidDataTypeException(f"'{DIMEConfig.MAIN_KEY_PERFORMANCE}' must be a Dictionary")
+
+    for sub_key in performance_configs:
+        if not DIMEConfig.verify_performance_config_key(sub_key):
+            raise InvalidSubKeyException(f"Invalid config key was found under "
+                                         f"'{DIMEConfig.MAIN_KEY_PERFORMANCE}': {sub_key}")
+
+    performance_configs = {**DIMEConfig.PERFORMANCE_CONFIG_DEFAULTS, **performance_configs}
+    _validate_performance_configs(performance_configs=performance_configs)
+    return performance_configs
+
+
+def _validate_performance_configs(performance_configs: Dict) -> NoReturn:
+    """
+    Validates the configs under the performance key
+
+    Args:
+        performance_configs: performance configs
+            merged with the default values
+
+    Returns:
+        no return
+    """
+    for sub_key in [DIMEConfig.SUB_KEY_PERFORMANCE_GLOBAL_WORKERS,
+                    DIMEConfig.SUB_KEY_PERFORMANCE_TF_THREADS,
+                    DIMEConfig.SUB_KEY_PERFORMANCE_CHECKPOINT_INTERVAL,
+                    DIMEConfig.SUB_KEY_PERFORMANCE_APPROXIMATION_SAMPLE_SIZE,
+                    DIMEConfig.SUB_KEY_PERFORMANCE_REST_RETRIES]:
+        value = performance_configs[sub_key]
+        if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+            raise InvalidConfigValueException(f"'{sub_key}' of '{DIMEConfig.MAIN_KEY_PERFORMANCE}' "
+                                              f"must be a non-negative Integer")
+
+    confidence = performance_configs[DIMEConfig.SUB_KEY_PERFORMANCE_APPROXIMATION_CONFIDENCE]
+    if not isinstance(confidence, float) or not 0 < confidence < 1:
+        raise InvalidConfigValueException(f"'{DIMEConfig.SUB_KEY_PERFORMANCE_APPROXIMATION_CONFIDENCE}' of "
+                                          f"'{DIMEConfig.MAIN_KEY_PERFORMANCE}' must be a Float "
+                                          f"between 0 and 1")
+
+    rest_concurrency = performance_configs[DIMEConfig.SUB_KEY_PERFORMANCE_REST_CONCURRENCY]
+    if not isinstance(rest_concurrency, int) or isinstance(rest_concurrency, bool) or rest_concurrency < 1:
+        raise InvalidConfigValueException(f"'{DIMEConfig.SUB_KEY_PERFORMANCE_REST_CONCURRENCY}' of "
+                                          f"'{DIMEConfig.MAIN_KEY_PERFORMANCE}' must be a positive Integer")
+
+    for sub_key in [DIMEConfig.SUB_KEY_PERFORMANCE_REST_BACKOFF,
+                    DIMEConfig.SUB_KEY_PERFORMANCE_REST_EJECTION_TIME,
+                    DIMEConfig.SUB_KEY_PERFORMANCE_REST_TIMEOUT]:
+        value = performance_configs[sub_key]
+        if not isinstance(value, (int, float)) or isinstance(value, bool) or value < 0:
+            raise InvalidConfigValueException(f"'{sub_key}' of '{DIMEConfig.MAIN_KEY_PERFORMANCE}' "
+                                              f"must be a non-negative Float")
+
+    for sub_key in [DIMEConfig.SUB_KEY_PERFORMANCE_APPROXIMATION_ADAPTIVE,
+                    DIMEConfig.SUB_KEY_PERFORMANCE_FEATURE_SPACE,
+                    DIMEConfig.SUB_KEY_PERFORMANCE_REST_HEDGING]:
+        if not isinstance(performance_configs[sub_key], bool):
+            raise InvalidConfigValueException(f"'{sub_key}' of '{DIMEConfig.MAIN_KEY_PERFORMANCE}' "
+                                              f"must be a Boolean")
+
+
 def get_def_configs(
 ) -> Dict:
     """
@@ -483,6 +589,7 @@ def get_def_configs(
             "ngrams": DEFAULT_NGRAMS_MODE,
             "min_ngrams": DEFAULT_MIN_NGRAMS,
             "max_ngrams": DEFAULT_MAX_NGRAMS,
+            "min_ngram_frequency": DEFAULT_MIN_NGRAM_FREQUENCY,
             "case_sensitive": DEFAULT_CASE_SENSITIVE_MODE,
             "metric": DEFAULT_METRIC,
         },
@@ -493,7 +600,8 @@ def get_def_configs(
         },
         "dime_cli_configs": {
             "output_mode": OUTPUT_MODE_DUAL
-        }
+        },
+        "dime_performance_configs": dict(DIMEConfig.PERFORMANCE_CONFIG_DEFAULTS),
     }
 
     return default_configs
@@ -94,6 +94,21 @@ def generate_dataset_fingerprint(
     return fingerprint
 
 
+def generate_example_fingerprint(intent: Text, example: Text) -> Text:
+    """
+    Generates a content fingerprint for a single
+    NLU example that depends on its intent and text
+
+    Args:
+        intent: intent of the example
+        example: text of the example
+
+    Returns:
+        example fingerprint as a string
+    """
+    return deep_container_fingerprint([intent, example])
+
+
 class Fingerprint:
     """
     A container class for holding RASA model
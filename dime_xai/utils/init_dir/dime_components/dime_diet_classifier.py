@@ -8,7 +8,7 @@ import os
 import scipy.sparse
 import tensorflow as tf
 
-from typing import Any, Dict, List, Optional, Text, Tuple, Union, Type
+from typing import Any, Dict, List, Optional, Set, Text, Tuple, Union, Type
 
 import rasa.shared.utils.io
 import rasa.utils.io as io_utils
@@ -43,6 +43,7 @@ from rasa.nlu.config import RasaNLUModelConfig
 from rasa.shared.exceptions import InvalidConfigException
 from rasa.shared.nlu.training_data.training_data import TrainingData
 from rasa.shared.nlu.training_data.message import Message
+from rasa.shared.nlu.training_data.features import Features
 from rasa.nlu.model import Metadata
 from rasa.utils.tensorflow.constants import (
     LABEL,
@@ -988,10 +989,39 @@ class DIETClassifier(IntentClassifier, EntityExtractor):
 
         return entities
 
-    def process(self, message: Message, **kwargs: Any) -> None:
-        """Augments the message with intents, entities, and diagnostic data."""
-        out = self._predict(message)
+    def _predict_batch(
+        self, messages: List[Message]
+    ) -> Optional[Dict[Text, Union[np.ndarray, Dict[Text, Any]]]]:
+        if self.model is None:
+            logger.debug(
+                f"There is no trained model for '{self.__class__.__name__}': The "
+                f"component is either not trained or didn't receive enough training "
+                f"data."
+            )
+            return None
+
+        # create session data from all messages and run a single
+        # padded forward pass over the whole batch
+        model_data = self._create_model_data(messages, training=False)
+        return self.model.run_inference(model_data, batch_size=len(messages))
+
+    @staticmethod
+    def _slice_batch_output(
+        batch_out: Dict[Text, Union[np.ndarray, Dict[Text, Any]]], index: int
+    ) -> Dict[Text, np.ndarray]:
+        """Extracts the output of a single message from a batch output.
+
+        Diagnostic data are not sliced and are dropped from the batch output.
+        """
+        return {
+            key: value[index : index + 1]
+            for key, value in batch_out.items()
+            if key != DIAGNOSTIC_DATA and isinstance(value, np.ndarray)
+        }
 
+    def _process_predict_out(
+        self, message: Message, out: Optional[Dict[Text, Any]]
+    ) -> None:
         if self.component_config[INTENT_CLASSIFICATION]:
             label, label_ranking = self._predict_label(out)
 
@@ -1006,6 +1036,168 @@ class DIETClassifier(IntentClassifier, EntityExtractor):
         if out and DIAGNOSTIC_DATA in out:
             message.add_diagnostic_data(self.unique_name, out.get(DIAGNOSTIC_DATA))
 
+    def process(self, message: Message, **kwargs: Any) -> None:
+        """Augments the message with intents, entities, and diagnostic data."""
+        out = self._predict(message)
+        self._process_predict_out(message, out)
+
+    def process_batch(self, messages: List[Message], **kwargs: Any) -> None:
+        """Augments a batch of messages with intents and entities.
+
+        Used by DIME to run one forward pass over a batch of messages
+        instead of one forward pass per message.
+        """
+        if not messages:
+            return
+
+        batch_out = self._predict_batch(messages)
+        for index, message in enumerate(messages):
+            out = (
+                self._slice_batch_output(batch_out, index)
+                if batch_out is not None
+                else None
+            )
+            self._process_predict_out(message, out)
+
+    @staticmethod
+    def _mask_features(
+        message: Message, keep: np.ndarray
+    ) -> List[Features]:
+        """Drops the rows of the masked tokens from the text sequence features.
+
+        Sparse sentence features are reduced by the dropped sequence rows of
+        the same featurizer, which is exact for count based featurizers. Dense
+        sentence features are mean pooled over the kept sequence rows.
+        """
+        sequence_features = {
+            (features.origin, features.is_sparse()): features.features
+            for features in message.features
+            if features.attribute == TEXT and features.type == SEQUENCE
+        }
+        for features in sequence_features.values():
+            if features.shape[0] != keep.shape[0]:
+                raise ValueError(
+                    f"Sequence features of '{message.get(TEXT)}' are not aligned "
+                    f"with its tokens and cannot be masked."
+                )
+
+        masked_features = []
+        for features in message.features:
+            values = features.features
+            if features.attribute == TEXT and features.type == SEQUENCE:
+                values = (
+                    values.tocsr()[keep].tocoo() if features.is_sparse() else values[keep]
+                )
+            elif features.attribute == TEXT and features.type == SENTENCE:
+                sequence_values = sequence_features.get(
+                    (features.origin, features.is_sparse())
+                )
+                if sequence_values is not None and features.is_sparse():
+                    dropped = scipy.sparse.csr_matrix(
+                        sequence_values.tocsr()[~keep].sum(axis=0)
+                    )
+                    values = (values.tocsr() - dropped).maximum(0).tocoo()
+                elif sequence_values is not None:
+                    values = sequence_values[keep].mean(axis=0, keepdims=True)
+            masked_features.append(
+                Features(values, features.type, features.attribute, features.origin)
+            )
+        return masked_features
+
+    @staticmethod
+    def is_decomposable(message: Message, origins: Set[Text]) -> bool:
+        """Checks whether the text features of a message can be masked exactly.
+
+        The text features are decomposable when they only come from the given
+        featurizers, which must featurize each token on its own, and the sparse
+        sentence features of each featurizer equal the sum of its sequence
+        features. Dropping tokens in the feature space then gives the same
+        features as featurizing the text without these tokens.
+        """
+        sequence_features = {}
+        sentence_features = {}
+        for features in message.features:
+            if features.attribute != TEXT:
+                continue
+            if (
+                not features.is_sparse()
+                or not isinstance(features.origin, str)
+                or features.origin not in origins
+            ):
+                return False
+            if features.type == SEQUENCE:
+                sequence_features[features.origin] = features.features
+            else:
+                sentence_features[features.origin] = features.features
+
+        for origin, values in sentence_features.items():
+            sequence_values = sequence_features.get(origin)
+            if sequence_values is None:
+                return False
+            difference = values.tocsr() - scipy.sparse.csr_matrix(
+                sequence_values.tocsr().sum(axis=0)
+            )
+            if difference.count_nonzero():
+                return False
+        return bool(sequence_features)
+
+    def _build_masked_message(
+        self, message: Message, mask: List[int]
+    ) -> Optional[Message]:
+        tokens = message.get(TOKENS_NAMES[TEXT], [])
+        keep = np.ones(len(tokens), dtype=bool)
+        keep[list(mask)] = False
+        if not keep.any():
+            return None
+
+        data = dict(message.data)
+        data[TOKENS_NAMES[TEXT]] = [token for token, kept in zip(tokens, keep) if kept]
+        return Message(
+            data=data,
+            output_properties=set(message.output_properties),
+            features=self._mask_features(message, keep),
+        )
+
+    def process_masked(
+        self, message: Message, masks: List[List[int]], **kwargs: Any
+    ) -> List[Optional[Message]]:
+        """Predicts the intents of a featurized message with tokens dropped.
+
+        Used by DIME to explain a message in the feature space. The message is
+        featurized once by the preceding pipeline components, and each mask
+        lists the token positions to drop. Masked messages are built from the
+        features of the message and all masks run in a single forward pass.
+
+        Returns:
+            a processed masked message per mask, or None for masks that
+            drop every token of the message
+        """
+        return self.process_masked_batch(
+            [(message, mask) for mask in masks], **kwargs
+        )
+
+    def process_masked_batch(
+        self, masked_messages: List[Tuple[Message, List[int]]], **kwargs: Any
+    ) -> List[Optional[Message]]:
+        """Predicts the intents of featurized messages with tokens dropped.
+
+        Same as `process_masked`, but each mask is applied to its own
+        featurized message, so that the perturbations of many messages
+        run in a single forward pass.
+
+        Returns:
+            a processed masked message per message and mask pair, or
+            None for masks that drop every token of the message
+        """
+        processed_messages = [
+            self._build_masked_message(message, mask)
+            for message, mask in masked_messages
+        ]
+        self.process_batch(
+            [message for message in processed_messages if message], **kwargs
+        )
+        return processed_messages
+
     def persist(self, file_name: Text, model_dir: Text) -> Dict[Text, Any]:
         """Persist this model into the passed directory.
 
@@ -9,7 +9,6 @@ from os import path
 from typing import List, Optional, Text, OrderedDict, Dict, NoReturn, Union, Tuple
 from uuid import uuid4
 
-from rasa.shared.data import get_data_files, is_nlu_file
 from ruamel import yaml as yaml
 from ruamel.yaml.error import YAMLError
 
@@ -598,6 +597,8 @@ def testing_data_dir_exists(dir_path: Text) -> bool:
     if not os.path.exists(dir_path):
         return False
 
+    # imported here to keep the io utilities usable without RASA
+    from rasa.shared.data import get_data_files, is_nlu_file
     data_list = get_data_files(paths=[dir_path], filter_predicate=is_nlu_file)
     if len(data_list) == 0:
         return False
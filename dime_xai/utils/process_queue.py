@@ -7,6 +7,7 @@ import psutil
 from dime_xai.shared.constants import (
     PROCESS_QUEUE,
     PROCESS_QUEUE_TABLE,
+    PROCESS_TERMINATION_GRACE_PERIOD,
 )
 from dime_xai.shared.exceptions.dime_server_exceptions import (
     ProcessTerminationException,
@@ -37,17 +38,32 @@ def create_in_memory_process_queue(data_source_path: Text = PROCESS_QUEUE) -> No
 
 
 # https://stackoverflow.com/questions/1230669/subprocess-deleting-child-processes-in-windows
-def kill_process_tree(process_id: int, including_parent: bool = True) -> bool:
+def kill_process_tree(
+        process_id: int,
+        including_parent: bool = True,
+        grace_period: float = PROCESS_TERMINATION_GRACE_PERIOD,
+) -> bool:
     try:
         parent = psutil.Process(process_id)
-        children = parent.children(recursive=True)
-        for child in children:
-            child.kill()
-        # disabled to avoid already killed exception
-        # gone, still_alive = psutil.wait_procs(children, timeout=5)
+        processes = parent.children(recursive=True)
         if including_parent:
-            parent.kill()
-            parent.wait(5)
+            processes.insert(0, parent)
+
+        # processes are asked to terminate first (SIGTERM on POSIX systems), so
+        # that DIME can checkpoint its results, and are only killed if they are
+        # still alive once the grace period has passed
+        for process in processes:
+            try:
+                process.terminate()
+            except psutil.NoSuchProcess:
+                pass
+        _, still_alive = psutil.wait_procs(processes, timeout=grace_period)
+        for process in still_alive:
+            try:
+                process.kill()
+            except psutil.NoSuchProcess:
+                pass
+        psutil.wait_procs(still_alive, timeout=5)
         return True
     except Exception as e:
         raise ProcessTerminationException(e)
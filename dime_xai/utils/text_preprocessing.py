@@ -1,9 +1,54 @@
-from typing import Text, Optional, List, Union, Dict
-from copy import deepcopy
+from functools import lru_cache
+from typing import Text, Optional, List, Union, Dict, Tuple
 import regex
 
+from dime_xai.shared.constants import TOKEN_SPAN_CACHE_SIZE
 from dime_xai.utils.io import get_unique_list
 
+# same logic from rasa tokenizer
+# to inherit the same tokenizing logic
+TOKEN_SEPARATOR_REGEX = regex.compile(
+    # there is a space or an end of a string after it
+    r"[^\w#@&]+(?=\s|$)|"
+    # there is a space or beginning of a string before it
+    # not followed by a number
+    r"(\s|^)[^\w#@&]+(?=[^0-9\s])|"
+    # not in between numbers and not . or @ or & or - or #
+    # e.g. 10'000.00 or blabla@gmail.com
+    # and not url characters
+    r"(?<=[^0-9\s])[^\w._~:/?#\[\]()@!$&*+,;=-]+(?=[^0-9\s])"
+)
+WORD_REGEX = regex.compile(r"\S+")
+
+
+@lru_cache(maxsize=TOKEN_SPAN_CACHE_SIZE)
+def tokenize_spans(instance: Text) -> Tuple[Tuple[int, int], ...]:
+    """
+    Tokenizes a whitespace tokenize-able language and
+    returns the start and end offsets of each token.
+    Characters matched by the tokenizer pattern are
+    treated as whitespaces, same as in Rasa
+    WhitespaceTokenizer component. Spans are cached
+    per string since every example is perturbed once
+    per token it contains
+
+    Args:
+        instance: whitespace tokenize-able string
+
+    Returns:
+        tuple of (start, end) offsets of the tokens
+    """
+    if not instance:
+        return tuple()
+
+    spans = list()
+    segment_start = 0
+    for separator in TOKEN_SEPARATOR_REGEX.finditer(instance):
+        spans += [word.span() for word in WORD_REGEX.finditer(instance, segment_start, separator.start())]
+        segment_start = separator.end()
+    spans += [word.span() for word in WORD_REGEX.finditer(instance, segment_start, len(instance))]
+    return tuple(spans)
+
 
 def tokenize(instance: Text) -> Optional[List]:
     """
@@ -20,24 +65,7 @@ def tokenize(instance: Text) -> Optional[List]:
     if not instance:
         return None
 
-    # same logic from rasa tokenizer
-    # to inherit the same tokenizing logic
-    words = regex.sub(
-        # there is a space or an end of a string after it
-        r"[^\w#@&]+(?=\s|$)|"
-        # there is a space or beginning of a string before it
-        # not followed by a number
-        r"(\s|^)[^\w#@&]+(?=[^0-9\s])|"
-        # not in between numbers and not . or @ or & or - or #
-        # e.g. 10'000.00 or blabla@gmail.com
-        # and not url characters
-        r"(?<=[^0-9\s])[^\w._~:/?#\[\]()@!$&*+,;=-]+(?=[^0-9\s])",
-        " ",
-        instance,
-    ).split()
-
-    tokens = [w for w in words if w]
-    return tokens
+    return [instance[start:end] for start, end in tokenize_spans(instance)]
 
 
 def bag_of_words(
@@ -60,29 +88,78 @@ def bag_of_words(
         bag of words list for a string or a merged list of strings [List],
             bag of words list per each string in a list of strings [Dict], or None
     """
-    instances_copy = deepcopy(instances)
-    if not instances_copy:
+    if not instances:
         return None
 
-    if merge and isinstance(instances_copy, List):
-        instances_copy = ' '.join(instances_copy)
+    if merge and isinstance(instances, List):
+        instances = ' '.join(instances)
 
-    if isinstance(instances_copy, List):
+    if isinstance(instances, List):
         instance_vocabulary = dict()
-        for instance in instances_copy:
+        for instance in instances:
             bow = list()
             bow += tokenize(instance=instance)
             bow = sorted(get_unique_list(bow)) if bow else []
             instance_vocabulary[instance] = bow
         return instance_vocabulary
 
-    elif isinstance(instances_copy, Text):
+    elif isinstance(instances, Text):
         vocabulary = list()
-        vocabulary += tokenize(instance=instances_copy)
+        vocabulary += tokenize(instance=instances)
         vocabulary = sorted(get_unique_list(vocabulary)) if vocabulary else []
         return vocabulary
 
 
+def get_ngrams(
+        tokens: List,
+        min_ngrams: int = 1,
+        max_ngrams: int = 1,
+) -> List:
+    """
+    Generates the n-grams of a list of tokens. Words
+    of an n-gram are joined by a single whitespace
+
+    Args:
+        tokens: list of tokens in the order of the text
+        min_ngrams: minimum number of words in an n-gram
+        max_ngrams: maximum number of words in an n-gram
+
+    Returns:
+        list of n-grams, ordered by n and the position in the text
+    """
+    if not tokens:
+        return []
+
+    ngrams = list()
+    for n in range(max(min_ngrams, 1), max_ngrams + 1):
+        ngrams += [' '.join(tokens[i:i + n]) for i in range(len(tokens) - n + 1)]
+    return ngrams
+
+
+def bag_of_ngrams(
+        instance: Text,
+        min_ngrams: int = 1,
+        max_ngrams: int = 1,
+) -> List:
+    """
+    Returns the unique list of n-grams of a string
+
+    Args:
+        instance: whitespace tokenize-able string
+        min_ngrams: minimum number of words in an n-gram
+        max_ngrams: maximum number of words in an n-gram
+
+    Returns:
+        sorted list of unique n-grams
+    """
+    ngrams = get_ngrams(
+        tokens=tokenize(instance=instance),
+        min_ngrams=min_ngrams,
+        max_ngrams=max_ngrams,
+    )
+    return sorted(get_unique_list(ngrams)) if ngrams else []
+
+
 def get_token_count(token_list: List, token: Text) -> int:
     """
     Counts the number of instances of a token
@@ -115,42 +192,118 @@ def get_all_tokens(
             for a list of unmerged strings, returns the list
             of tokens per each string instance as a dictionary
     """
-    instances_copy = deepcopy(instances)
-    if not instances_copy:
+    if not instances:
         return None
 
-    if merge and isinstance(instances_copy, List):
-        instances_copy = ' '.join(instances_copy)
+    if merge and isinstance(instances, List):
+        instances = ' '.join(instances)
 
-    if isinstance(instances_copy, List):
+    if isinstance(instances, List):
         instance_vocabulary = dict()
-        for instance in instances_copy:
+        for instance in instances:
             bow = list()
             bow += tokenize(instance=instance)
             instance_vocabulary[instance] = bow
         return instance_vocabulary
 
-    elif isinstance(instances_copy, Text):
+    elif isinstance(instances, Text):
         vocabulary = list()
-        vocabulary += tokenize(instance=instances_copy)
+        vocabulary += tokenize(instance=instances)
         return vocabulary
 
 
 def remove_token(instance: Text, token: Text) -> Text:
     """
     Removes instances of a specified token
-    from a single string instance
+    from a single string instance. Only whole
+    tokens of the instance are removed, by
+    splicing out their spans along with a single
+    adjacent whitespace. N-grams are matched
+    regardless of the characters that the
+    tokenizer drops between their words
 
     Args:
         instance: string instance where the token should be removed from
-        token: token to be removed
+        token: token or whitespace joined n-gram to be removed
 
     Returns:
         token removed single string instance
     """
-    instance = regex.sub(token + " ", "", instance)
-    instance = regex.sub(" " + token, "", instance)
-    return regex.sub(token, "", instance)
+    if not instance or not token:
+        return instance
+
+    spans = tokenize_spans(instance)
+    words = token.split(' ')
+    word_size = len(words)
+
+    removed_spans = list()
+    index = 0
+    while index <= len(spans) - word_size:
+        if all(instance[start:end] == word for (start, end), word in zip(spans[index:index + word_size], words)):
+            removed_spans.append((spans[index][0], spans[index + word_size - 1][1]))
+            index += word_size
+        else:
+            index += 1
+
+    return splice_spans(instance=instance, spans=removed_spans)
+
+
+def get_token_positions(tokens: List[Text], token: Text) -> List[int]:
+    """
+    Finds the positions of a token, or of the words of
+    a whitespace joined n-gram, in a list of tokens.
+    Occurrences are matched from left to right without
+    overlapping, same as in `remove_token`
+
+    Args:
+        tokens: list of tokens in the order of the text
+        token: token or whitespace joined n-gram
+
+    Returns:
+        list of positions of the matched tokens
+    """
+    words = token.split(' ')
+    word_size = len(words)
+
+    positions = list()
+    index = 0
+    while index <= len(tokens) - word_size:
+        if tokens[index:index + word_size] == words:
+            positions += range(index, index + word_size)
+            index += word_size
+        else:
+            index += 1
+    return positions
+
+
+def splice_spans(instance: Text, spans: List[Tuple[int, int]]) -> Text:
+    """
+    Removes the given character spans from a single
+    string instance along with a single adjacent
+    whitespace, which is the following whitespace, or
+    the preceding whitespace at the end of the string
+
+    Args:
+        instance: string instance where the spans should be removed from
+        spans: non-overlapping (start, end) offsets in the ascending order
+
+    Returns:
+        spans removed single string instance
+    """
+    if not spans:
+        return instance
+
+    pieces = list()
+    kept_start = 0
+    for start, end in spans:
+        if end < len(instance) and instance[end].isspace():
+            end += 1
+        elif end == len(instance) and start > kept_start and instance[start - 1].isspace():
+            start -= 1
+        pieces.append(instance[kept_start:start])
+        kept_start = end
+    pieces.append(instance[kept_start:])
+    return ''.join(pieces)
 
 
 def remove_token_from_dataset(
@@ -162,7 +315,7 @@ def remove_token_from_dataset(
     token from the given dataset
 
     Args:
-        testing_data: data instances as a list, or dictionary.
+        testing_data: data instances as a list or a tuple, or dictionary.
             If passed as dictionary, instances should be mentioned
             as a list under 'example' key under each intent/class
 
@@ -171,16 +324,14 @@ def remove_token_from_dataset(
     Returns:
         token removed list or dictionary
     """
-    testing_data_copy = deepcopy(testing_data)
-
-    if isinstance(testing_data_copy, Dict):
-        for intent, examples in testing_data_copy.items():
-            testing_data_copy[intent] = [remove_token(example, token) for example in examples]
-        return testing_data_copy
+    # builds new containers with the token removed examples
+    # instead of cloning and mutating the whole dataset
+    if isinstance(testing_data, Dict):
+        return {intent: [remove_token(example, token) for example in examples]
+                for intent, examples in testing_data.items()}
     else:
-        for instance in testing_data_copy:
-            instance['example'] = remove_token(instance=instance['example'], token=token)
-        return testing_data_copy
+        return [{**instance, 'example': remove_token(instance=instance['example'], token=token)}
+                for instance in testing_data]
 
 
 def lowercase_list(instances_list: List) -> List:
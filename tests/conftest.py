@@ -0,0 +1,199 @@
+import math
+
+import pytest
+
+from dime_xai.utils.text_preprocessing import tokenize
+
+NLU_DATA = {
+    'greet': ["hello there", "hi there friend", "hello friend", "good morning"],
+    'goodbye': ["bye for now", "see you later friend", "good night", "bye bye"],
+    'book': ["book a table", "book a table for two", "a table for tonight please", "reserve a table"],
+}
+
+KEYWORD_WEIGHTS = {
+    'greet': {'hello': 2.0, 'hi': 2.0, 'morning': 1.5, 'friend': 0.5, 'there': 0.25},
+    'goodbye': {'bye': 2.0, 'later': 1.5, 'night': 1.5, 'see': 0.5, 'now': 0.25},
+    'book': {'book': 2.0, 'reserve': 2.0, 'table': 1.5, 'two': 0.5, 'tonight': 0.5, 'please': 0.25},
+}
+
+
+def write_nlu_data(data_dir, nlu_data):
+    data_dir.mkdir(parents=True, exist_ok=True)
+    lines = ['version: "2.0"', 'nlu:']
+    for intent, examples in nlu_data.items():
+        lines += [f'- intent: {intent}', '  examples: |']
+        lines += [f'    - {example}' for example in examples]
+    (data_dir / 'nlu.yml').write_text('\n'.join(lines) + '\n', encoding='utf8')
+
+
+class StubToken:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubTokenizer:
+    """
+    Stand-in for the tokenizer of a RASA pipeline,
+    which splits texts into the DIME tokens
+    """
+
+    def process(self, message, **kwargs):
+        from rasa.nlu.constants import TOKENS_NAMES
+        from rasa.shared.nlu.constants import TEXT
+
+        message.set(TOKENS_NAMES[TEXT], [StubToken(token) for token in tokenize(message.get(TEXT)) or []])
+
+
+class StubIntentClassifier:
+    """
+    Stand-in for the intent classifier of a RASA pipeline. Intents
+    are ranked by the softmax of the summed keyword weights of the
+    tokens of a message. The texts of the processed messages are
+    recorded, so that tests can count the parsed texts
+    """
+
+    def __init__(self, keyword_weights):
+        self.keyword_weights = keyword_weights
+        self.processed_texts = list()
+
+    def rank(self, tokens):
+        logits = {intent: sum(weights.get(token, 0.0) for token in tokens)
+                  for intent, weights in self.keyword_weights.items()}
+        normalizer = sum(math.exp(logit) for logit in logits.values())
+        ranking = [{'name': intent, 'confidence': math.exp(logit) / normalizer} for intent, logit in logits.items()]
+        return sorted(ranking, key=lambda ranked_intent: -ranked_intent['confidence'])
+
+    def _classify(self, message, tokens):
+        ranking = self.rank(tokens)
+        message.set('intent', ranking[0], add_to_output=True)
+        message.set('intent_ranking', ranking, add_to_output=True)
+
+    def process(self, message, **kwargs):
+        from rasa.shared.nlu.constants import TEXT
+
+        self.processed_texts.append(message.get(TEXT))
+        self._classify(message, tokenize(message.get(TEXT)) or [])
+
+
+class StubMaskedIntentClassifier(StubIntentClassifier):
+    """
+    Stub intent classifier that also predicts tokenized
+    messages with tokens dropped, like the DIME DIET classifier
+    """
+
+    def __init__(self, keyword_weights):
+        super().__init__(keyword_weights)
+        self.masked_messages = 0
+
+    @staticmethod
+    def is_decomposable(message, origins):
+        return True
+
+    def process_masked_batch(self, masked_messages, **kwargs):
+        from rasa.nlu.constants import TOKENS_NAMES
+        from rasa.shared.nlu.constants import TEXT
+        from rasa.shared.nlu.training_data.message import Message
+
+        processed_messages = list()
+        for message, mask in masked_messages:
+            tokens = [token.text for position, token in enumerate(message.get(TOKENS_NAMES[TEXT]))
+                      if position not in mask]
+            if not tokens:
+                processed_messages.append(None)
+                continue
+            masked_message = Message(data=dict(message.data), output_properties=set(message.output_properties))
+            self._classify(masked_message, tokens)
+            processed_messages.append(masked_message)
+        self.masked_messages += len(masked_messages)
+        return processed_messages
+
+    def process_masked(self, message, masks, **kwargs):
+        return self.process_masked_batch([(message, mask) for mask in masks], **kwargs)
+
+
+class StubInterpreter:
+    """
+    Stand-in for a loaded RASA NLU model, with a pipeline of
+    a stub tokenizer and a stub keyword intent classifier
+    """
+
+    def __init__(self, classifier=None):
+        self.classifier = classifier or StubIntentClassifier(KEYWORD_WEIGHTS)
+        self.pipeline = [StubTokenizer(), self.classifier]
+        self.context = dict()
+
+    def parse(self, text):
+        from rasa.nlu.model import Interpreter
+        from rasa.shared.nlu.constants import TEXT
+        from rasa.shared.nlu.training_data.message import Message
+
+        output = Interpreter.default_output_attributes()
+        if not text.strip():
+            output[TEXT] = ""
+            return output
+        output[TEXT] = text
+        message = Message(data=output.copy())
+        for component in self.pipeline:
+            component.process(message, **self.context)
+        output.update(message.as_dict(only_output_properties=True))
+        return output
+
+
+def stub_model_loader(interpreter):
+    """
+    Returns a replacement of `RASAModel._load_model`,
+    which loads the given stub interpreter
+    """
+
+    def _load_model(model, model_name=None):
+        model._nlu_model = interpreter
+        model._fingerprint = "stub model"
+
+    return _load_model
+
+
+@pytest.fixture
+def stub_interpreter(monkeypatch):
+    """
+    Makes local RASA models load a stub interpreter instead
+    of a trained model, and returns the stub interpreter
+    """
+    pytest.importorskip("rasa")
+    from dime_xai.shared.model.rasa_model import RASAModel
+
+    interpreter = StubInterpreter()
+    monkeypatch.setattr(RASAModel, '_load_model', stub_model_loader(interpreter))
+    return interpreter
+
+
+@pytest.fixture
+def masked_stub_interpreter(stub_interpreter, monkeypatch):
+    """
+    Same as `stub_interpreter`, with a stub classifier that
+    predicts messages with dropped tokens in the feature space
+    """
+    from dime_xai.shared.model.rasa_model import RASAModel
+
+    interpreter = StubInterpreter(classifier=StubMaskedIntentClassifier(KEYWORD_WEIGHTS))
+    monkeypatch.setattr(RASAModel, '_load_model', stub_model_loader(interpreter))
+    return interpreter
+
+
+@pytest.fixture
+def write_testing_data(tmp_path):
+    """
+    Writes an intent to examples dictionary as the
+    NLU data in `data` of the DIME project
+    """
+    return lambda nlu_data: write_nlu_data(tmp_path / 'data', nlu_data)
+
+
+@pytest.fixture
+def dime_project(tmp_path, monkeypatch, write_testing_data):
+    """
+    Working directory of a DIME project with the stub NLU data
+    in `data`. DIME caches are created in the same directory
+    """
+    write_testing_data(NLU_DATA)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,141 @@
+import pytest
+
+from dime_xai.utils.cache import DIMECache, PredictionCache
+
+PREDICTION = {
+    'text': "hello there",
+    'intent': {'name': 'greet', 'confidence': 0.9},
+    'intent_ranking': [{'name': 'greet', 'confidence': 0.9}, {'name': 'goodbye', 'confidence': 0.1}],
+}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    # cache keys are fingerprinted with RASA
+    pytest.importorskip("rasa")
+    return DIMECache(cache_dir=str(tmp_path), model_fingerprint="model", data_fingerprint="data")
+
+
+def test_init_output_round_trip(cache):
+    init_output = [{'tag': 0, 'intent': 'greet', 'example': "hello there", 'predicted_intent': 'greet'}]
+    config = {'case_sensitive': False}
+
+    assert cache.load_init_output(config=config) is None
+    cache.save_init_output(init_output=init_output, config=config)
+    assert cache.load_init_output(config=config) == init_output
+    assert cache.load_init_output(config={'case_sensitive': True}) is None
+
+
+def test_init_output_is_keyed_by_fingerprints(cache, tmp_path):
+    cache.save_init_output(init_output=[{'tag': 0}])
+    other_data = DIMECache(cache_dir=str(tmp_path), model_fingerprint="model", data_fingerprint="other")
+    same_data = DIMECache(cache_dir=str(tmp_path), model_fingerprint="model", data_fingerprint="data")
+
+    assert other_data.load_init_output() is None
+    assert same_data.load_init_output() == [{'tag': 0}]
+
+
+def test_predictions_round_trip(cache):
+    cache.save_predictions(predictions={"hello there": PREDICTION})
+
+    assert cache.load_predictions(texts=["hello there", "bye"]) == {"hello there": PREDICTION}
+
+
+def test_feature_space_predictions_are_kept_apart(cache):
+    masked_prediction = {**PREDICTION, 'intent': {'name': 'goodbye', 'confidence': 0.6}}
+    cache.save_predictions(predictions={"hello there": PREDICTION})
+    cache.save_predictions(predictions={"hello there": masked_prediction}, feature_space=True)
+
+    assert cache.load_predictions(texts=["hello there"]) == {"hello there": PREDICTION}
+    assert cache.load_predictions(texts=["hello there"], feature_space=True) == {"hello there": masked_prediction}
+
+
+def test_predictions_beyond_the_query_parameter_limit(cache):
+    predictions = {f"text {index}": {'index': index} for index in range(2000)}
+    cache.save_predictions(predictions=predictions)
+
+    assert cache.load_predictions(texts=list(predictions)) == predictions
+
+
+def test_global_score_checkpoints(cache):
+    config = {'metric': 'confidence'}
+    cache.save_global_scores(scores={'hello': 0.5}, config=config, final=False)
+
+    assert cache.load_global_scores(config=config) == {}
+    assert cache.load_global_scores(config=config, include_partial=True) == {'hello': 0.5}
+
+    cache.finalize_global_scores(config=config)
+    assert cache.load_global_scores(config=config) == {'hello': 0.5}
+
+
+def test_clear_partial_global_scores(cache):
+    cache.save_global_scores(scores={'hello': 0.5})
+    cache.save_global_scores(scores={'there': 0.25}, final=False)
+    cache.clear_partial_global_scores()
+
+    assert cache.load_global_scores(include_partial=True) == {'hello': 0.5}
+
+
+def test_incremental_state_round_trip(cache):
+    assert cache.load_incremental_state() is None
+
+    cache.save_incremental_state(
+        example_hashes=['a', 'b'],
+        scores={'hello': 0.75},
+        contributions=[('a', 'hello', 0.5), ('b', 'hello', 0.25), ('b', 'there', 0.125)],
+        removed_hashes=[],
+    )
+    assert cache.load_incremental_state() == ({'a', 'b'}, {'hello': 0.75})
+    assert cache.load_contribution_totals(example_hashes=['b']) == {'hello': 0.25, 'there': 0.125}
+
+    cache.save_incremental_state(
+        example_hashes=['a', 'c'],
+        scores={'hello': 1.0},
+        contributions=[('c', 'hello', 0.5)],
+        removed_hashes=['b'],
+    )
+    assert cache.load_incremental_state() == ({'a', 'c'}, {'hello': 1.0})
+    assert cache.load_contribution_totals(example_hashes=['a', 'b', 'c']) == {'hello': 1.0}
+
+
+def test_incremental_runs_are_keyed_by_config(cache, tmp_path):
+    cache.save_incremental_state(
+        example_hashes=['a'],
+        scores={'hello': 0.5},
+        contributions=[('a', 'hello', 0.5)],
+        removed_hashes=[],
+        config={'ngrams': False},
+    )
+    new_data = DIMECache(cache_dir=str(tmp_path), model_fingerprint="model", data_fingerprint="new data")
+
+    assert new_data.load_incremental_state(config={'ngrams': False}) == ({'a'}, {'hello': 0.5})
+    assert new_data.load_incremental_state(config={'ngrams': {'max_ngrams': 2}}) is None
+
+
+def test_prediction_cache_normalizes_texts():
+    prediction_cache = PredictionCache(max_size=10)
+    prediction_cache.put("model", "  hello   there ", PREDICTION)
+
+    assert prediction_cache.get("model", "hello there") is PREDICTION
+    assert prediction_cache.get("other model", "hello there") is None
+    assert prediction_cache.info() == {'hits': 1, 'misses': 1, 'size': 1, 'max_size': 10}
+
+
+def test_prediction_cache_evicts_least_recently_used():
+    prediction_cache = PredictionCache(max_size=2)
+    prediction_cache.put("model", "a", {'text': "a"})
+    prediction_cache.put("model", "b", {'text': "b"})
+    prediction_cache.get("model", "a")
+    prediction_cache.put("model", "c", {'text': "c"})
+
+    assert prediction_cache.get("model", "b") is None
+    assert prediction_cache.get("model", "a") == {'text': "a"}
+    assert prediction_cache.get("model", "c") == {'text': "c"}
+
+
+def test_disabled_prediction_cache():
+    prediction_cache = PredictionCache(max_size=0)
+    prediction_cache.put("model", "a", {'text': "a"})
+
+    assert prediction_cache.get("model", "a") is None
+    assert prediction_cache.info()['size'] == 0
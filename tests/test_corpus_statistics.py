@@ -0,0 +1,65 @@
+import pytest
+
+from dime_xai.shared.testing_data.corpus_statistics import CorpusStatistics
+from dime_xai.shared.testing_data.encoded_corpus import EncodedCorpus
+
+TAGGED_DATA = [
+    {'tag': 0, 'intent': 'book', 'example': "book a table"},
+    {'tag': 1, 'intent': 'book', 'example': "a table for two"},
+    {'tag': 2, 'intent': 'greet', 'example': "hello hello"},
+    {'tag': 3, 'intent': 'greet', 'example': "hello a friend"},
+]
+
+
+@pytest.fixture
+def corpus():
+    return EncodedCorpus(tagged_data=TAGGED_DATA)
+
+
+def test_token_statistics(corpus):
+    statistics = CorpusStatistics(corpus=corpus)
+
+    assert statistics.get_vocabulary() == sorted(corpus.get_vocabulary())
+    assert statistics.get_ngrams() == []
+    assert statistics.get_term_frequency("hello") == 3
+    assert statistics.get_document_frequency("hello") == 2
+    assert statistics.get_intent_frequencies("a") == {'book': 2, 'greet': 1}
+    assert statistics.get_term_frequency("chair") == 0
+    assert statistics.get_intent_frequencies("chair") == {}
+
+
+def test_texts_of_several_intents_are_counted_once():
+    corpus = EncodedCorpus(tagged_data=[*TAGGED_DATA, {'tag': 4, 'intent': 'book', 'example': "hello hello"}])
+    statistics = CorpusStatistics(corpus=corpus, max_ngrams=2, min_ngram_frequency=1)
+
+    assert statistics.get_term_frequency("hello") == 3
+    assert statistics.get_term_frequency("hello hello") == 1
+    assert statistics.get_document_frequency("hello") == 3
+    assert statistics.get_intent_frequencies("hello") == {'book': 2, 'greet': 3}
+    assert statistics.get_postings("hello") == [2, 3, 4]
+
+
+def test_postings_match_the_encoded_corpus(corpus):
+    statistics = CorpusStatistics(corpus=corpus, max_ngrams=3, min_ngram_frequency=1)
+
+    for token in statistics.get_vocabulary() + statistics.get_ngrams():
+        assert statistics.get_postings(token) == corpus.get_postings(token)
+
+
+def test_rare_ngrams_are_pruned(corpus):
+    statistics = CorpusStatistics(corpus=corpus, max_ngrams=2, min_ngram_frequency=2)
+
+    # "a table" is the only bigram found in two examples
+    assert statistics.get_ngrams() == ["a table"]
+    assert statistics.get_postings("a table") == [0, 1]
+    assert statistics.get_postings("table for") == []
+    assert statistics.pruned_ngrams == 6
+    # tokens are never pruned
+    assert "two" in statistics.get_vocabulary()
+
+
+def test_ngrams_do_not_span_across_examples(corpus):
+    statistics = CorpusStatistics(corpus=corpus, max_ngrams=2, min_ngram_frequency=1)
+
+    assert "table a" not in statistics.get_ngrams()
+    assert "two hello" not in statistics.get_ngrams()
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from dime_xai.core.dime_core import (
+    allocate_stratified_sample,
+    estimate_stratified_total,
+    get_confidence_arrays,
+    get_global_confidence_delta,
+)
+from dime_xai.shared.model.prediction_batch import PredictionBatch
+
+
+def test_allocation_is_proportional():
+    allocation = allocate_stratified_sample(population_sizes=np.array([60, 30, 10]), sample_size=10)
+    assert allocation.tolist() == [6, 3, 1]
+
+
+def test_allocation_samples_every_stratum():
+    population_sizes = np.array([97, 2, 1])
+    allocation = allocate_stratified_sample(population_sizes=population_sizes, sample_size=10)
+
+    assert allocation.sum() == 10
+    assert (allocation >= 1).all()
+    assert (allocation <= population_sizes).all()
+
+
+def test_allocation_of_the_whole_population():
+    population_sizes = np.array([3, 4])
+    assert allocate_stratified_sample(population_sizes=population_sizes, sample_size=7).tolist() == [3, 4]
+    assert allocate_stratified_sample(population_sizes=population_sizes, sample_size=20).tolist() == [3, 4]
+
+
+def test_estimate_of_a_census_is_exact():
+    values = np.array([1.0, 2.0, 3.0, 10.0, 20.0])
+    strata = np.array(['a', 'a', 'a', 'b', 'b'])
+    estimate, standard_error = estimate_stratified_total(
+        sample_values=values,
+        sample_strata=strata,
+        population_sizes={'a': 3, 'b': 2},
+    )
+
+    assert estimate == pytest.approx(36.0)
+    assert standard_error == pytest.approx(0.0)
+
+
+def test_estimate_scales_stratum_means():
+    values = np.array([1.0, 3.0, 10.0, 10.0])
+    strata = np.array([0, 0, 1, 1])
+    estimate, standard_error = estimate_stratified_total(
+        sample_values=values,
+        sample_strata=strata,
+        population_sizes={0: 10, 1: 4},
+    )
+
+    assert estimate == pytest.approx(10 * 2.0 + 4 * 10.0)
+    # only the first stratum varies: 10^2 * (1 - 2/10) * 2 / 2
+    assert standard_error == pytest.approx(np.sqrt(80.0))
+
+
+def test_estimate_of_an_empty_sample():
+    assert estimate_stratified_total(
+        sample_values=np.array([]),
+        sample_strata=np.array([]),
+        population_sizes={'a': 5},
+    ) == (0.0, 0.0)
+
+
+def test_confidence_delta_over_affected_tags():
+    def _batch(tags, confidences):
+        return PredictionBatch.from_responses(
+            intent_index={'greet': 0},
+            examples=[""] * len(tags),
+            responses=[{'intent': {'name': 'greet', 'confidence': confidence},
+                        'intent_ranking': [{'name': 'greet', 'confidence': confidence}]}
+                       for confidence in confidences],
+            tags=tags,
+            intents=['greet'] * len(tags),
+        )
+
+    init_arrays = get_confidence_arrays(model_output=_batch(tags=[2, 0, 1], confidences=[0.5, 0.75, 1.0]))
+    token_arrays = get_confidence_arrays(model_output=_batch(tags=[1, 2], confidences=[0.25, 0.5]))
+
+    assert init_arrays['tag'].tolist() == [0, 1, 2]
+    assert get_global_confidence_delta(init_arrays=init_arrays, token_arrays=token_arrays) == pytest.approx(0.75)
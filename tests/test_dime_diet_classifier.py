@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("tensorflow")
+pytest.importorskip("rasa")
+
+from rasa.nlu.constants import FEATURIZER_CLASS_ALIAS  # noqa: E402
+from rasa.nlu.featurizers.sparse_featurizer.count_vectors_featurizer import CountVectorsFeaturizer  # noqa: E402
+from rasa.nlu.tokenizers.whitespace_tokenizer import WhitespaceTokenizer  # noqa: E402
+from rasa.shared.nlu.constants import INTENT, TEXT  # noqa: E402
+from rasa.shared.nlu.training_data.message import Message  # noqa: E402
+from rasa.shared.nlu.training_data.training_data import TrainingData  # noqa: E402
+
+from dime_xai.utils.init_dir.dime_components.dime_diet_classifier import DIETClassifier  # noqa: E402
+from dime_xai.utils.text_preprocessing import remove_token  # noqa: E402
+from conftest import NLU_DATA  # noqa: E402
+
+INSTANCE = "book a table for two"
+
+
+@pytest.fixture(scope="module")
+def training_data():
+    return TrainingData(training_examples=[Message(data={TEXT: example, INTENT: intent})
+                                           for intent, examples in NLU_DATA.items()
+                                           for example in examples])
+
+
+@pytest.fixture(scope="module")
+def featurizers(training_data):
+    tokenizer = WhitespaceTokenizer()
+    featurizer = CountVectorsFeaturizer()
+    tokenizer.train(training_data)
+    featurizer.train(training_data)
+    return tokenizer, featurizer
+
+
+def _featurize(featurizers, text):
+    message = Message(data={TEXT: text})
+    for component in featurizers:
+        component.process(message)
+    return message
+
+
+def _get_origins(featurizers):
+    return {featurizer.component_config.get(FEATURIZER_CLASS_ALIAS) or featurizer.name
+            for featurizer in featurizers if isinstance(featurizer, CountVectorsFeaturizer)}
+
+
+def _text_features(message):
+    return {(features.type, features.origin): features.features.toarray()
+            for features in message.features if features.attribute == TEXT}
+
+
+def test_count_vector_features_are_decomposable(featurizers):
+    message = _featurize(featurizers, INSTANCE)
+
+    assert DIETClassifier.is_decomposable(message, _get_origins(featurizers))
+    assert not DIETClassifier.is_decomposable(message, set())
+
+
+def test_masked_features_match_the_features_of_the_token_removed_text(featurizers):
+    message = _featurize(featurizers, INSTANCE)
+    keep = np.array([token != "table" for token in INSTANCE.split()])
+
+    masked_message = Message(data=dict(message.data), features=DIETClassifier._mask_features(message, keep))
+    token_removed_message = _featurize(featurizers, remove_token(instance=INSTANCE, token="table"))
+
+    masked_features = _text_features(masked_message)
+    token_removed_features = _text_features(token_removed_message)
+    assert masked_features.keys() == token_removed_features.keys()
+    for key, values in masked_features.items():
+        np.testing.assert_array_equal(values, token_removed_features[key])
+
+
+def test_masked_batch_predicts_like_token_removed_texts(training_data, featurizers):
+    classifier = DIETClassifier(component_config={'epochs': 1, 'entity_recognition': False, 'random_seed': 0})
+    classifier.train(training_data)
+    instances = [INSTANCE, "hello friend", "see you later friend", "hello friend"]
+    masks = [[2], [1], [0, 1], [0, 1]]
+    messages = [_featurize(featurizers, instance) for instance in instances]
+
+    masked_messages = classifier.process_masked_batch(list(zip(messages, masks)))
+
+    # masks that drop every token of a message are not predicted
+    assert masked_messages[-1] is None
+    for instance, mask, masked_message in zip(instances[:-1], masks[:-1], masked_messages[:-1]):
+        tokens = [token for position, token in enumerate(instance.split()) if position not in mask]
+        token_removed_message = _featurize(featurizers, " ".join(tokens))
+        classifier.process(token_removed_message)
+        assert masked_message.get(INTENT)['name'] == token_removed_message.get(INTENT)['name']
+        assert masked_message.get(INTENT)['confidence'] == pytest.approx(
+            token_removed_message.get(INTENT)['confidence'], abs=1e-5)
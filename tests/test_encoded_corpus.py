@@ -0,0 +1,84 @@
+import pytest
+
+from dime_xai.shared.testing_data.encoded_corpus import EncodedCorpus
+
+TAGGED_DATA = [
+    {'tag': 0, 'intent': 'greet', 'example': "hello there, friend!"},
+    {'tag': 1, 'intent': 'book', 'example': "book a table for two"},
+    {'tag': 2, 'intent': 'greet', 'example': "hello hello"},
+    {'tag': 3, 'intent': 'book', 'example': "a table a table"},
+]
+
+
+@pytest.fixture
+def corpus():
+    return EncodedCorpus(tagged_data=TAGGED_DATA)
+
+
+def test_encodes_tokens_and_intents(corpus):
+    assert corpus.get_size() == 4
+    assert corpus.get_token_size() == 14
+    assert corpus.get_intents() == ['book', 'greet']
+    assert corpus.get_intent(tag=1) == 'book'
+    assert corpus.get_text(tag=0) == "hello there, friend!"
+    assert corpus.decode(corpus.get_token_ids(tag=0)) == ['hello', 'there', 'friend']
+
+
+def test_encode_unknown_token(corpus):
+    assert corpus.encode("table") is not None
+    assert corpus.encode("a chair") is None
+
+
+def test_frequencies(corpus):
+    term_frequencies = corpus.get_term_frequencies()
+    document_frequencies = corpus.get_document_frequencies()
+    hello = int(corpus.encode("hello")[0])
+    table = int(corpus.encode("table")[0])
+
+    assert term_frequencies[hello] == 3
+    assert document_frequencies[hello] == 2
+    assert term_frequencies[table] == 3
+    assert document_frequencies[table] == 2
+
+
+def test_postings_of_tokens_and_ngrams(corpus):
+    assert corpus.get_postings("hello") == [0, 2]
+    assert corpus.get_postings("a table") == [1, 3]
+    assert corpus.get_postings("table for two") == [1]
+    assert corpus.get_postings("chair") == []
+
+
+def test_ngrams_do_not_span_across_examples(corpus):
+    # "friend" ends example 0 and "book" starts example 1
+    assert corpus.get_postings("friend book") == []
+    assert corpus.get_postings("two a") == []
+
+
+def test_remove_token_keeps_the_rest_of_the_text(corpus):
+    assert corpus.remove_token(tag=0, token="there") == "hello , friend!"
+    assert corpus.remove_token(tag=2, token="hello") == ""
+    assert corpus.remove_token(tag=3, token="a table") == ""
+    assert corpus.remove_token(tag=1, token="chair") == "book a table for two"
+
+
+def test_remove_token_from_examples(corpus):
+    assert corpus.remove_token_from_examples(tags=[1, 3], token="table") == [
+        {'tag': 1, 'intent': 'book', 'example': "book a for two"},
+        {'tag': 3, 'intent': 'book', 'example': "a a"},
+    ]
+
+
+def test_texts_of_several_intents_are_counted_once():
+    corpus = EncodedCorpus(tagged_data=[
+        *TAGGED_DATA,
+        {'tag': 4, 'intent': 'book', 'example': "hello hello"},
+    ])
+    hello = int(corpus.encode("hello")[0])
+
+    assert corpus.get_size() == 5
+    assert corpus.get_token_size() == 14
+    assert corpus.decode(corpus.get_distinct_ids()) == corpus.decode(corpus.get_ids()[:14])
+    assert corpus.get_term_frequencies()[hello] == 3
+    # each tagged example is perturbed, hence it has its own postings
+    assert corpus.get_document_frequencies()[hello] == 3
+    assert corpus.get_postings("hello") == [0, 2, 4]
@@ -0,0 +1,102 @@
+import numpy as np
+
+from dime_xai.shared.model.prediction_batch import PredictionBatch
+
+
+def _response(intent, ranking):
+    return {
+        'intent': {'name': intent, 'confidence': dict(ranking)[intent]},
+        'intent_ranking': [{'name': name, 'confidence': confidence} for name, confidence in ranking],
+    }
+
+
+def _batch(intent_index=None):
+    return PredictionBatch.from_responses(
+        intent_index=intent_index if intent_index is not None else dict(),
+        examples=["hello there", "bye now", "thanks"],
+        responses=[
+            _response('greet', [('greet', 0.9), ('goodbye', 0.1)]),
+            _response('goodbye', [('goodbye', 0.7), ('greet', 0.3)]),
+            _response('thank', [('thank', 0.6), ('greet', 0.4)]),
+        ],
+        tags=[0, 1, 2],
+        intents=['greet', 'goodbye', 'goodbye'],
+    )
+
+
+def test_from_responses_builds_confidence_matrix():
+    intent_index = dict()
+    batch = _batch(intent_index=intent_index)
+
+    assert intent_index == {'greet': 0, 'goodbye': 1, 'thank': 2}
+    assert batch.confidences.dtype == np.float64
+    assert batch.confidences.shape == (3, 3)
+    assert batch.get_predicted_intents() == ['greet', 'goodbye', 'thank']
+    assert batch.get_intents() == ['greet', 'goodbye', 'goodbye']
+    # intents missing from a ranking are NaN
+    assert np.isnan(batch.confidences[0, 2])
+    assert np.isnan(batch.confidences[2, 1])
+
+
+def test_intent_confidence_of_unranked_labels_is_zero():
+    batch = _batch()
+    np.testing.assert_allclose(batch.get_intent_confidence(), [0.9, 0.7, 0.0])
+
+
+def test_records_round_trip():
+    batch = _batch()
+    records = batch.to_records()
+
+    assert records[0] == {
+        'tag': 0,
+        'intent': 'greet',
+        'example': "hello there",
+        'predicted_intent': 'greet',
+        'predicted_confidence': 0.9,
+        'intent_confidence': 0.9,
+        'intent_ranking': [
+            {'name': 'greet', 'confidence': 0.9},
+            {'name': 'goodbye', 'confidence': 0.1},
+        ],
+    }
+
+    restored = PredictionBatch.from_records(intent_index=dict(), records=records)
+    assert restored.to_records() == records
+
+
+def test_take_selects_positions_in_order():
+    batch = _batch().take([2, 0])
+
+    assert batch.examples == ["thanks", "hello there"]
+    assert batch.tags.tolist() == [2, 0]
+    assert batch.get_predicted_intents() == ['thank', 'greet']
+
+
+def test_replace_aligns_batches_of_another_intent_index():
+    batch = _batch()
+    other = PredictionBatch.from_responses(
+        intent_index=dict(),
+        examples=["there"],
+        responses=[_response('affirm', [('affirm', 0.8), ('greet', 0.2)])],
+        tags=[0],
+        intents=['greet'],
+    )
+    replaced = batch.replace(positions=np.array([0]), other=other)
+
+    assert replaced.examples == ["there", "bye now", "thanks"]
+    assert replaced.get_predicted_intents() == ['affirm', 'goodbye', 'thank']
+    np.testing.assert_allclose(replaced.get_intent_confidence(), [0.2, 0.7, 0.0])
+    # the replaced batch is left untouched
+    assert batch.examples[0] == "hello there"
+    assert batch.get_predicted_intents()[0] == 'greet'
+
+
+def test_get_confidences_pads_intents_added_later():
+    intent_index = dict()
+    batch = _batch(intent_index=intent_index)
+    intent_index['affirm'] = len(intent_index)
+
+    confidences = batch.get_confidences()
+    assert confidences.shape == (3, 4)
+    assert np.isnan(confidences[:, 3]).all()
+    assert batch.has_ranking().all()
@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+psutil = pytest.importorskip("psutil")
+
+from dime_xai.utils.process_queue import kill_process_tree  # noqa: E402
+
+pytestmark = pytest.mark.skipif(os.name != 'posix', reason="SIGTERM handlers are only run on POSIX systems")
+
+# writes a marker file on SIGTERM, like the checkpoint of DIME
+TERMINATION_HANDLER = '''
+import signal, sys, time
+def _terminate(signum, frame):
+    open(sys.argv[1], 'w').close()
+    sys.exit(0)
+signal.signal(signal.SIGTERM, _terminate)
+print('ready', flush=True)
+time.sleep(60)
+'''
+
+# ignores SIGTERM, so that it has to be killed
+STUCK_PROCESS = '''
+import signal, time
+signal.signal(signal.SIGTERM, signal.SIG_IGN)
+print('ready', flush=True)
+time.sleep(60)
+'''
+
+
+def _start(script, *args):
+    process = subprocess.Popen([sys.executable, '-c', script, *args], stdout=subprocess.PIPE)
+    assert process.stdout.readline().strip() == b'ready'
+    return process
+
+
+def test_process_is_terminated_before_it_is_killed(tmp_path):
+    marker = tmp_path / 'terminated'
+    process = _start(TERMINATION_HANDLER, str(marker))
+
+    kill_process_tree(process.pid, grace_period=5)
+
+    process.wait(5)
+    assert marker.exists()
+
+
+def test_process_is_killed_after_the_grace_period():
+    process = _start(STUCK_PROCESS)
+
+    start_time = time.monotonic()
+    kill_process_tree(process.pid, grace_period=0.5)
+
+    process.wait(5)
+    assert not psutil.pid_exists(process.pid)
+    assert 0.5 <= time.monotonic() - start_time < 5
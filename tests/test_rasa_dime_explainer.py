@@ -0,0 +1,347 @@
+import json
+import time
+from itertools import islice
+
+import pytest
+
+pytest.importorskip("rasa")
+
+from dime_xai.core import rasa_dime_explainer  # noqa: E402
+from dime_xai.core.rasa_dime_explainer import RasaDIMEExplainer  # noqa: E402
+from dime_xai.shared.constants import (  # noqa: E402
+    EXPLANATION_EVENT_END,
+    Metrics,
+    MODEL_MODE_LOCAL,
+    OUTPUT_MODE_DUAL,
+    OUTPUT_MODE_GLOBAL,
+)
+from dime_xai.shared.explanation import DIMEExplanationStream  # noqa: E402
+from dime_xai.utils.text_preprocessing import remove_token, tokenize  # noqa: E402
+
+# delay of scoring a token in the global feature importance workers
+WORKER_SCORE_DELAY = 0.2
+
+# the stub NLU data with "hello friend" changed,
+# "bye bye" removed and "book a table for tonight" added
+CHANGED_NLU_DATA = {
+    'greet': ["hello there", "hi there friend", "hello my friend", "good morning"],
+    'goodbye': ["bye for now", "see you later friend", "good night"],
+    'book': ["book a table", "book a table for two", "a table for tonight please", "reserve a table",
+             "book a table for tonight"],
+}
+CHANGED_EXAMPLES = ["hello my friend", "book a table for tonight"]
+
+# instances of dual feature importance, one of which has
+# no tokens of the testing data to select features from
+DUAL_INSTANCES = ["hello friend, book a table for two", "see you later", "qwerty uiop",
+                  "good night friend", "reserve a table please"]
+
+
+@pytest.fixture
+def explainers(stub_interpreter, dime_project):
+    created = list()
+
+    def _create(**kwargs):
+        configs = {
+            'models_path': "models",
+            'model_name': "stub",
+            'testing_data_path': "data",
+            'model_mode': MODEL_MODE_LOCAL,
+            'data_instances': ["hello friend, book a table for two"],
+            'metric': Metrics.CONFIDENCE,
+            'output_mode': OUTPUT_MODE_GLOBAL,
+            'quiet_mode': True,
+            **kwargs,
+        }
+        explainer = RasaDIMEExplainer(**configs)
+        created.append(explainer)
+        return explainer
+
+    yield _create
+    for explainer in created:
+        explainer.close()
+
+
+def _full_run_scores(explainers, vocabulary, **kwargs):
+    explainer = explainers(use_cache=False, **kwargs)
+    return explainer._global(vocabulary=vocabulary)["global_raw_scores"]
+
+
+@pytest.mark.parametrize('ngrams', [False, True])
+def test_incremental_run_matches_a_full_run(explainers, write_testing_data, stub_interpreter, ngrams):
+    ngram_configs = {'ngrams': ngrams, 'max_ngrams': 2, 'min_ngram_frequency': 2}
+    explainers(incremental=True, **ngram_configs).explain(persist=False)
+
+    write_testing_data(CHANGED_NLU_DATA)
+    explainer = explainers(incremental=True, **ngram_configs)
+    vocabulary = explainer.testing_data.get_ngram_vocabulary()
+    processed_texts = stub_interpreter.classifier.processed_texts
+    parsed_before = len(processed_texts)
+    incremental_scores = explainer._global_incremental(vocabulary=vocabulary)["global_raw_scores"]
+    incremental_texts = set(processed_texts[parsed_before:])
+
+    assert incremental_scores == pytest.approx(_full_run_scores(explainers, vocabulary, **ngram_configs))
+    if not ngrams:
+        # only the added and changed examples are perturbed
+        assert incremental_texts
+        assert incremental_texts <= {remove_token(instance=example, token=token)
+                                     for example in CHANGED_EXAMPLES for token in vocabulary}
+
+
+def test_new_ngrams_are_scored_in_all_examples(explainers, write_testing_data):
+    ngram_configs = {'ngrams': True, 'max_ngrams': 2, 'min_ngram_frequency': 2}
+    explainers(incremental=True, **ngram_configs).explain(persist=False)
+
+    write_testing_data(CHANGED_NLU_DATA)
+    explainer = explainers(incremental=True, **ngram_configs)
+    vocabulary = explainer.testing_data.get_ngram_vocabulary()
+    incremental_scores = explainer._global_incremental(vocabulary=vocabulary)["global_raw_scores"]
+
+    # "for tonight" only reaches the n-gram frequency with the added example
+    assert "for tonight" in vocabulary
+    assert incremental_scores["for tonight"] == pytest.approx(
+        _full_run_scores(explainers, vocabulary, **ngram_configs)["for tonight"])
+
+
+def test_unchanged_data_is_not_perturbed_again(explainers, stub_interpreter):
+    first_scores = explainers(incremental=True).explain(persist=False).explanation['global']
+
+    explainer = explainers(incremental=True)
+    parsed_before = len(stub_interpreter.classifier.processed_texts)
+    second_scores = explainer.explain(persist=False).explanation['global']
+
+    assert len(stub_interpreter.classifier.processed_texts) == parsed_before
+    assert second_scores['feature_importance'] == pytest.approx(first_scores['feature_importance'])
+
+
+class TokenScorer:
+    """
+    Wraps the global scoring of tokens to record the scored
+    tokens, and to interrupt the scoring like a SIGTERM once
+    `interrupt_after` tokens are scored
+    """
+
+    def __init__(self, get_token_global_score):
+        self.get_token_global_score = get_token_global_score
+        self.interrupt_after = None
+        self.tokens = list()
+
+    def __call__(self, token, **kwargs):
+        if self.interrupt_after is not None and len(self.tokens) >= self.interrupt_after:
+            raise KeyboardInterrupt()
+        self.tokens.append(token)
+        return self.get_token_global_score(token=token, **kwargs)
+
+
+@pytest.fixture
+def token_scorer(monkeypatch):
+    scorer = TokenScorer(rasa_dime_explainer.get_token_global_score)
+    monkeypatch.setattr(rasa_dime_explainer, 'get_token_global_score', scorer)
+    return scorer
+
+
+def test_interrupted_run_is_resumed_from_its_checkpoints(explainers, token_scorer):
+    explainer = explainers(checkpoint_interval=2)
+    vocabulary = explainer.testing_data.get_vocabulary()
+    token_scorer.interrupt_after = 5
+
+    with pytest.raises(KeyboardInterrupt):
+        explainer._global(vocabulary=vocabulary)
+    interrupted_tokens = list(token_scorer.tokens)
+
+    token_scorer.interrupt_after = None
+    token_scorer.tokens.clear()
+    resumed_scores = explainers(resume=True)._global(vocabulary=vocabulary)["global_raw_scores"]
+
+    # the scores of the interrupted run are checkpointed, including
+    # those scored after the last checkpoint interval
+    assert len(interrupted_tokens) == 5
+    assert not set(token_scorer.tokens) & set(interrupted_tokens)
+    assert resumed_scores == pytest.approx(_full_run_scores(explainers, vocabulary))
+
+
+def test_partial_scores_are_discarded_without_resume(explainers, token_scorer):
+    explainer = explainers(checkpoint_interval=2)
+    vocabulary = explainer.testing_data.get_vocabulary()
+    token_scorer.interrupt_after = 5
+
+    with pytest.raises(KeyboardInterrupt):
+        explainer._global(vocabulary=vocabulary)
+
+    token_scorer.interrupt_after = None
+    token_scorer.tokens.clear()
+    explainers()._global(vocabulary=vocabulary)
+
+    assert len(token_scorer.tokens) == len(vocabulary)
+
+
+def init_stub_global_worker(*args):
+    # spawned workers load the stub interpreter instead of a trained model
+    from conftest import StubInterpreter, stub_model_loader
+    from dime_xai.shared.model.rasa_model import RASAModel
+
+    RASAModel._load_model = stub_model_loader(StubInterpreter())
+    rasa_dime_explainer.init_global_worker(*args)
+
+
+def score_global_token_slowly(token_task):
+    time.sleep(WORKER_SCORE_DELAY)
+    return rasa_dime_explainer.score_global_token(token_task)
+
+
+def test_interrupted_parallel_run_is_resumed(explainers, token_scorer, monkeypatch):
+    monkeypatch.setattr(rasa_dime_explainer, 'init_global_worker', init_stub_global_worker)
+    monkeypatch.setattr(rasa_dime_explainer, 'score_global_token', score_global_token_slowly)
+    explainer = explainers(global_workers=2, checkpoint_interval=1)
+    vocabulary = explainer.testing_data.get_vocabulary()
+
+    global_scores = explainer._iter_global_scores(vocabulary=vocabulary)
+    interrupted_scores = dict(islice(global_scores, 3))
+    interrupt_time = time.monotonic()
+    with pytest.raises(KeyboardInterrupt):
+        global_scores.throw(KeyboardInterrupt())
+
+    # the run stops without scoring the pending tokens
+    assert time.monotonic() - interrupt_time < WORKER_SCORE_DELAY * len(vocabulary) / 4
+    resumed_scores = explainers(resume=True)._global(vocabulary=vocabulary)["global_raw_scores"]
+    assert not set(token_scorer.tokens) & set(interrupted_scores)
+    assert resumed_scores == pytest.approx(_full_run_scores(explainers, vocabulary))
+
+
+def _read_explanation_stream(explanation_stream):
+    with open(explanation_stream.full_file_path, encoding='utf8') as stream_file:
+        return [json.loads(line) for line in stream_file]
+
+
+def test_global_scores_are_streamed_as_they_are_calculated(explainers, token_scorer):
+    explainer = explainers(use_cache=False)
+    vocabulary = explainer.testing_data.get_ngram_vocabulary()
+
+    with DIMEExplanationStream(name="dime_results.jsonl") as explanation_stream:
+        events = explanation_stream.write_all(explainer.explain_iter())
+        first_event = next(events)
+
+        # the first score is persisted before the other tokens are scored
+        assert token_scorer.tokens == [first_event['token']]
+        assert _read_explanation_stream(explanation_stream) == [first_event]
+        events = [first_event, *events]
+
+    assert events[-1]['event'] == EXPLANATION_EVENT_END
+    assert {event['token']: event['score'] for event in events[:-1]} == pytest.approx(
+        _full_run_scores(explainers, vocabulary))
+    assert len(_read_explanation_stream(explanation_stream)) == len(vocabulary) + 1
+
+
+def _top_tokens(scores, ranking_length):
+    return sorted(scores, key=lambda token: scores[token], reverse=True)[:ranking_length]
+
+
+def _record_sampled_tags(explainer, monkeypatch):
+    # tags of the examples perturbed per token
+    sampled_tags = dict()
+    get_token_model_output = explainer._get_token_model_output
+
+    def _get_token_model_output(token, token_tags, **kwargs):
+        sampled_tags.setdefault(token, list()).extend(token_tags)
+        return get_token_model_output(token=token, token_tags=token_tags, **kwargs)
+
+    monkeypatch.setattr(explainer, '_get_token_model_output', _get_token_model_output)
+    return sampled_tags
+
+
+def test_approximation_of_all_examples_is_exact(explainers):
+    explainer = explainers(approximation_sample_size=100)
+    vocabulary = explainer.testing_data.get_vocabulary()
+
+    approximate_output = explainer._global_approximate(vocabulary=vocabulary)
+
+    assert approximate_output["global_raw_scores"] == pytest.approx(_full_run_scores(explainers, vocabulary))
+    assert set(approximate_output["global_standard_errors"].values()) == {0.0}
+
+
+def test_approximation_samples_an_example_per_intent(explainers, monkeypatch):
+    explainer = explainers(approximation_sample_size=1)
+    vocabulary = explainer.testing_data.get_vocabulary()
+    corpus = explainer.testing_data.get_encoded_corpus()
+    token_postings = {token: explainer.testing_data.get_token_postings(token=token) for token in vocabulary}
+    sampled_tags = _record_sampled_tags(explainer, monkeypatch)
+    approximate_scores = explainer._global_approximate(vocabulary=vocabulary)["global_raw_scores"]
+    exact_scores = _full_run_scores(explainers, vocabulary)
+
+    for token, token_tags in token_postings.items():
+        assert sorted(corpus.get_intent(tag=tag) for tag in sampled_tags[token]) == sorted(
+            {corpus.get_intent(tag=tag) for tag in token_tags})
+        # tokens of a single example are scored exactly
+        if len(token_tags) == 1:
+            assert approximate_scores[token] == pytest.approx(exact_scores[token])
+
+
+def test_adaptive_approximation_ranks_the_top_tokens_exactly(explainers, monkeypatch):
+    explainer = explainers(approximation_sample_size=1, approximation_adaptive=True, ranking_length=3)
+    vocabulary = explainer.testing_data.get_vocabulary()
+    sampled_tags = _record_sampled_tags(explainer, monkeypatch)
+
+    approximate_scores = explainer._global_approximate(vocabulary=vocabulary)["global_raw_scores"]
+    exact_scores = _full_run_scores(explainers, vocabulary)
+
+    assert _top_tokens(approximate_scores, 3) == _top_tokens(exact_scores, 3)
+    assert sum(map(len, sampled_tags.values())) < sum(
+        len(explainer.testing_data.get_token_postings(token=token)) for token in vocabulary)
+
+
+def test_dual_batch_matches_instances_explained_one_at_a_time(explainers):
+    explainer = explainers(output_mode=OUTPUT_MODE_DUAL, data_instances=DUAL_INSTANCES)
+
+    batch_scores = explainer._get_dual_batch_scores(instances=DUAL_INSTANCES)
+    instance_scores = [explainer._get_dual_batch_scores(instances=[instance])[0] for instance in DUAL_INSTANCES]
+
+    assert [scores['instance'] for scores in batch_scores] == DUAL_INSTANCES
+    assert batch_scores == instance_scores
+    assert not batch_scores[2]['dual']['feature_importance']
+
+
+def test_dual_scores_are_confidence_differences_of_the_predicted_intent(explainers, stub_interpreter):
+    explainer = explainers(output_mode=OUTPUT_MODE_DUAL, data_instances=DUAL_INSTANCES)
+    classifier = stub_interpreter.classifier
+
+    for scores in explainer._get_dual_batch_scores(instances=DUAL_INSTANCES):
+        instance = scores['instance']
+        init_ranking = classifier.rank(tokenize(instance) or [])
+        dual_scores = scores['dual']['feature_importance']
+        if scores['global']['feature_selection']:
+            assert scores['global']['predicted_intent'] == init_ranking[0]['name']
+            assert dual_scores
+        for token, dual_score in dual_scores.items():
+            token_ranking = classifier.rank(tokenize(remove_token(instance=instance, token=token)) or [])
+            token_confidence = {intent['name']: intent['confidence'] for intent in token_ranking}
+            assert dual_score == pytest.approx(init_ranking[0]['confidence'] - token_confidence[init_ranking[0]['name']])
+
+
+def test_feature_space_perturbation_matches_text_perturbation(explainers, masked_stub_interpreter):
+    explainer = explainers(feature_space=True, output_mode=OUTPUT_MODE_DUAL, data_instances=DUAL_INSTANCES)
+    text_explainer = explainers(use_cache=False, output_mode=OUTPUT_MODE_DUAL, data_instances=DUAL_INSTANCES)
+    vocabulary = explainer.testing_data.get_vocabulary()
+
+    feature_space_scores = explainer._global(vocabulary=vocabulary)["global_raw_scores"]
+    global_masked_messages = masked_stub_interpreter.classifier.masked_messages
+    feature_space_dual_scores = explainer._get_dual_batch_scores(instances=DUAL_INSTANCES)
+
+    assert global_masked_messages > 0
+    assert masked_stub_interpreter.classifier.masked_messages > global_masked_messages
+    assert feature_space_scores == pytest.approx(text_explainer._global(vocabulary=vocabulary)["global_raw_scores"])
+    for feature_space_instance_scores, instance_scores in zip(
+            feature_space_dual_scores, text_explainer._get_dual_batch_scores(instances=DUAL_INSTANCES)):
+        assert feature_space_instance_scores['dual']['feature_importance'] == pytest.approx(
+            instance_scores['dual']['feature_importance'])
+
+
+def test_texts_are_perturbed_unless_features_are_decomposable(explainers, masked_stub_interpreter, monkeypatch):
+    monkeypatch.setattr(masked_stub_interpreter.classifier, 'is_decomposable', lambda message, origins: False)
+    explainer = explainers(feature_space=True, output_mode=OUTPUT_MODE_DUAL, data_instances=DUAL_INSTANCES)
+    vocabulary = explainer.testing_data.get_vocabulary()
+
+    feature_space_scores = explainer._global(vocabulary=vocabulary)["global_raw_scores"]
+    explainer._get_dual_batch_scores(instances=DUAL_INSTANCES)
+
+    assert masked_stub_interpreter.classifier.masked_messages == 0
+    assert feature_space_scores == pytest.approx(_full_run_scores(explainers, vocabulary))
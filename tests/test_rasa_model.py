@@ -0,0 +1,77 @@
+import pytest
+
+from dime_xai.shared.constants import MODEL_MODE_LOCAL
+
+TEXTS = ["hello there", "book a table", "  hello   there ", "", "see you later friend", "book a table"]
+
+
+def _without_text(output):
+    return {key: value for key, value in output.items() if key != 'text'}
+
+
+@pytest.fixture
+def models(stub_interpreter):
+    from dime_xai.shared.model.rasa_model import RASAModel
+
+    created = list()
+
+    def _create(**kwargs):
+        model = RASAModel(model_mode=MODEL_MODE_LOCAL, models_path="models", model_name="stub",
+                          quiet_mode=True, **kwargs)
+        created.append(model)
+        return model
+
+    yield _create
+    for model in created:
+        model.close()
+
+
+@pytest.mark.parametrize('batch_size', [1, 2, 64])
+def test_parsed_texts_match_the_interpreter(models, stub_interpreter, batch_size):
+    expected_outputs = [stub_interpreter.parse(text) for text in TEXTS]
+    processed_texts = stub_interpreter.classifier.processed_texts
+    parsed_before = len(processed_texts)
+
+    outputs = models().parse_texts(data_instances=TEXTS, batch_size=batch_size)
+
+    # whitespace variants share the output of the first variant parsed
+    assert [_without_text(output) for output in outputs] == [_without_text(output) for output in expected_outputs]
+    # duplicates and whitespace variants are parsed once, and blank strings are not parsed
+    assert sorted(processed_texts[parsed_before:]) == ["book a table", "hello there", "see you later friend"]
+
+
+def test_cached_texts_are_not_parsed_again(models, stub_interpreter):
+    model = models()
+    first_outputs = model.parse_texts(data_instances=TEXTS)
+    parsed_before = len(stub_interpreter.classifier.processed_texts)
+
+    second_outputs = model.parse_texts(data_instances=list(reversed(TEXTS)))
+
+    assert len(stub_interpreter.classifier.processed_texts) == parsed_before
+    assert second_outputs == list(reversed(first_outputs))
+    assert model.get_prediction_cache_info()['hits'] == 4
+
+
+def test_texts_are_deduplicated_without_a_prediction_cache(models, stub_interpreter):
+    model = models(prediction_cache_size=0)
+
+    model.parse_texts(data_instances=TEXTS)
+    model.parse_texts(data_instances=TEXTS)
+
+    assert len(stub_interpreter.classifier.processed_texts) == 2 * 3
+    assert model.get_prediction_cache_info()['size'] == 0
+
+
+def test_persisted_predictions_are_reused(models, stub_interpreter, tmp_path):
+    from dime_xai.utils.cache import DIMECache
+
+    model = models()
+    model.set_persistent_cache(DIMECache(cache_dir=str(tmp_path), model_fingerprint=model.get_fingerprint()))
+    outputs = model.parse_texts(data_instances=TEXTS)
+    parsed_before = len(stub_interpreter.classifier.processed_texts)
+
+    new_model = models()
+    new_model.set_persistent_cache(DIMECache(cache_dir=str(tmp_path), model_fingerprint=new_model.get_fingerprint()))
+
+    assert new_model.parse_texts(data_instances=TEXTS) == outputs
+    assert len(stub_interpreter.classifier.processed_texts) == parsed_before
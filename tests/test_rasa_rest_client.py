@@ -0,0 +1,285 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from dime_xai.shared.constants import REST_HEDGING_MIN_SAMPLES
+from dime_xai.shared.exceptions.dime_core_exceptions import RESTModelLoadException
+from dime_xai.shared.model.rasa_rest_client import RasaRESTClient
+
+
+class StubRasaServer:
+    """
+    Threaded stand-in for the HTTP API of a RASA server. Responses
+    of the next requests can be set to fail with a status code, to
+    be delayed, or to trickle in with a delay between their bytes,
+    and the requests in flight are counted
+    """
+
+    def __init__(self, fingerprint=None, delay=0.0):
+        self.fingerprint = fingerprint
+        self.delay = delay
+        self.statuses = list()
+        self.delays = list()
+        self.trickles = list()
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, trickle=0.0):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                if not trickle:
+                    return self.wfile.write(payload)
+                for index in range(len(payload)):
+                    self.wfile.write(payload[index:index + 1])
+                    self.wfile.flush()
+                    time.sleep(trickle)
+
+            def do_GET(self):
+                if self.path != '/status':
+                    return self._send(404, {})
+                self._send(200, {'fingerprint': stub.fingerprint} if stub.fingerprint else {})
+
+            def do_POST(self):
+                text = json.loads(self.rfile.read(int(self.headers['Content-Length'])))['text']
+                status, delay, trickle = stub._begin()
+                time.sleep(delay)
+                stub._end()
+                if status != 200:
+                    return self._send(status, {'error': "stub failure"})
+                self._send(200, {
+                    'text': text,
+                    'intent': {'name': 'greet', 'confidence': 0.9},
+                    'intent_ranking': [{'name': 'greet', 'confidence': 0.9}],
+                }, trickle=trickle)
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def _begin(self):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            status = self.statuses.pop(0) if self.statuses else 200
+            delay = self.delays.pop(0) if self.delays else self.delay
+            trickle = self.trickles.pop(0) if self.trickles else 0.0
+        return status, delay, trickle
+
+    def _end(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def stub_servers():
+    servers = list()
+
+    def _create(**kwargs):
+        server = StubRasaServer(**kwargs)
+        servers.append(server)
+        return server
+
+    yield _create
+    for server in servers:
+        server.close()
+
+
+@pytest.fixture
+def clients():
+    created = list()
+
+    def _create(**kwargs):
+        client = RasaRESTClient(**kwargs)
+        created.append(client)
+        return client
+
+    yield _create
+    for client in created:
+        client.close()
+
+
+def test_parse_batch_keeps_order_and_bounds_concurrency(stub_servers, clients):
+    server = stub_servers(delay=0.02)
+    client = clients(url=server.url, concurrency=4)
+    texts = [f"hello {index}" for index in range(40)]
+
+    responses = client.parse_batch(data_instances=texts)
+
+    assert [response['text'] for response in responses] == texts
+    assert 1 < server.max_in_flight <= 4
+
+
+def test_retryable_status_is_retried(stub_servers, clients):
+    server = stub_servers()
+    server.statuses = [503, 502]
+    client = clients(url=server.url, retries=2, backoff=0)
+
+    assert client.parse(data_instance="hello")['intent']['name'] == 'greet'
+    assert server.requests == 3
+
+
+def test_request_fails_once_retries_run_out(stub_servers, clients):
+    server = stub_servers()
+    server.statuses = [503, 503, 503]
+    client = clients(url=server.url, retries=1, backoff=0)
+
+    with pytest.raises(RESTModelLoadException):
+        client.parse(data_instance="hello")
+    assert server.requests == 2
+
+
+def test_other_status_codes_are_not_retried(stub_servers, clients):
+    server = stub_servers()
+    server.statuses = [400]
+    client = clients(url=server.url, retries=3, backoff=0)
+
+    with pytest.raises(RESTModelLoadException):
+        client.parse(data_instance="hello")
+    assert server.requests == 1
+
+
+def test_timed_out_request_is_retried(stub_servers, clients):
+    server = stub_servers()
+    server.delays = [1.0]
+    client = clients(url=server.url, retries=1, backoff=0, timeout=0.2)
+
+    assert client.parse(data_instance="hello")['text'] == "hello"
+    assert server.requests == 2
+
+
+def test_trickling_response_is_abandoned_after_the_timeout(stub_servers, clients):
+    server = stub_servers()
+    # each byte arrives within the timeout, but the whole response does not
+    server.trickles = [0.01]
+    client = clients(url=server.url, retries=1, backoff=0, timeout=0.5)
+
+    start_time = time.monotonic()
+    assert client.parse(data_instance="hello")['text'] == "hello"
+    assert time.monotonic() - start_time < 1.5
+    assert server.requests == 2
+
+
+def test_request_fails_once_the_timeout_passes(stub_servers, clients):
+    server = stub_servers()
+    server.trickles = [0.01]
+    client = clients(url=server.url, retries=0, timeout=0.5)
+
+    start_time = time.monotonic()
+    with pytest.raises(RESTModelLoadException):
+        client.parse(data_instance="hello")
+    assert time.monotonic() - start_time < 1.5
+
+
+def test_failed_endpoint_is_ejected(stub_servers, clients):
+    healthy_server = stub_servers()
+    failing_server = stub_servers()
+    failing_server.statuses = [503] * 100
+    client = clients(url=[failing_server.url, healthy_server.url], concurrency=1,
+                     retries=1, backoff=0, ejection_time=60)
+
+    responses = client.parse_batch(data_instances=[f"hello {index}" for index in range(20)])
+
+    assert len(responses) == 20
+    assert failing_server.requests == 1
+    assert healthy_server.requests == 20
+    stats = {endpoint_stats['url']: endpoint_stats for endpoint_stats in client.get_endpoint_stats()}
+    assert stats[failing_server.url]['failures'] == 1
+    assert stats[healthy_server.url]['failures'] == 0
+    assert stats[healthy_server.url]['requests'] == 20
+
+
+def test_ejected_endpoint_is_reinstated(stub_servers, clients):
+    first_server = stub_servers()
+    second_server = stub_servers()
+    first_server.statuses = [503]
+    client = clients(url=[first_server.url, second_server.url], concurrency=1,
+                     retries=1, backoff=0, ejection_time=0.2)
+
+    client.parse(data_instance="hello")
+    time.sleep(0.3)
+    for index in range(10):
+        client.parse(data_instance=f"hello {index}")
+
+    assert first_server.requests > 1
+    assert second_server.requests > 1
+
+
+def test_slow_request_is_hedged(stub_servers, clients):
+    server = stub_servers(delay=0.01)
+    client = clients(url=server.url, concurrency=4, hedging=True, timeout=5)
+    client.parse_batch(data_instances=[f"hello {index}" for index in range(REST_HEDGING_MIN_SAMPLES)])
+
+    server.delays = [2.0]
+    start_time = time.monotonic()
+    response = client.parse(data_instance="slow hello")
+
+    assert response['text'] == "slow hello"
+    assert time.monotonic() - start_time < 1.0
+    assert client.hedged_requests == 1
+
+
+def test_losing_hedged_request_is_not_retried(stub_servers, clients):
+    server = stub_servers(delay=0.01)
+    client = clients(url=server.url, concurrency=4, hedging=True, retries=3, backoff=0, timeout=0.5)
+    client.parse_batch(data_instances=[f"hello {index}" for index in range(REST_HEDGING_MIN_SAMPLES)])
+
+    server.delays = [2.0]
+    assert client.parse(data_instance="slow hello")['text'] == "slow hello"
+    # the slow copy times out after the duplicate won
+    time.sleep(1.0)
+
+    assert client.hedged_requests == 1
+    assert server.requests == REST_HEDGING_MIN_SAMPLES + 2
+
+
+def test_requests_are_not_hedged_by_default(stub_servers, clients):
+    server = stub_servers(delay=0.01)
+    client = clients(url=server.url, concurrency=4, timeout=5)
+    client.parse_batch(data_instances=[f"hello {index}" for index in range(REST_HEDGING_MIN_SAMPLES)])
+
+    server.delays = [0.3]
+    client.parse(data_instance="slow hello")
+
+    assert client.hedged_requests == 0
+    assert server.requests == REST_HEDGING_MIN_SAMPLES + 1
+
+
+def test_fingerprints_of_the_endpoints(stub_servers, clients):
+    pytest.importorskip("rasa")
+    first_server = stub_servers(fingerprint={'version': "2.8.8", 'trained_at': 1})
+    second_server = stub_servers(fingerprint={'version': "2.8.8", 'trained_at': 1})
+    unreported_server = stub_servers()
+    client = clients(url=[first_server.url, second_server.url, unreported_server.url], timeout=1)
+
+    fingerprints = client.get_fingerprints()
+
+    assert fingerprints[first_server.url] is not None
+    assert fingerprints[first_server.url] == fingerprints[second_server.url]
+    assert fingerprints[unreported_server.url] is None
+
+
+def test_client_requires_a_url():
+    with pytest.raises(RESTModelLoadException):
+        RasaRESTClient(url=[])